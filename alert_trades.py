@@ -1,42 +1,76 @@
 #!/usr/bin/env python
+"""
+alert_trades.py – Discord alerts when an open trade's price enters an FVG /
+Order-Block zone.  Runs as the `alerts` stage of pipeline.py, which supplies
+the day's bars:
+
+  python alert_trades.py        (same as `python pipeline.py alerts`)
+"""
 import os, json, pathlib, requests
 from datetime import date
-import utils, ict_signals
+import utils, ict_signals, indicators
 
-# 1) Load open trades
-docs_file = pathlib.Path("docs/trades.json")
-trades = json.loads(docs_file.read_text()) if docs_file.exists() else []
+DOCS_FILE = pathlib.Path("docs/trades.json")
 
-# 2) Discord webhook URL (set in your secrets)
+# Discord webhook URL (set in your secrets)
 WEBHOOK = os.getenv("DISCORD_WEBHOOK_URL")
-if not WEBHOOK:
-    print("⚠️ No Discord webhook URL set.")
-    exit(0)
-
-today = date.today().isoformat()
-alerts = []
-
-for t in trades:
-    sym = t["symbol"]
-    # fetch current price
-    df = utils.fetch_ohlc(sym, days=1)
-    if not df: continue
-    price = float(df["close"].iloc[-1])
-
-    # check FVG
-    gaps = ict_signals.detect_fvg(sym, lookback=5)
-    for hi, lo in gaps:
-        if lo < price < hi:
-            alerts.append(f"🔔 {sym}: price {price} entered FVG [{lo:.2f}-{hi:.2f}]")
-
-    # check Order‑Blocks
-    obs = ict_signals.detect_order_blocks(sym, lookback=10)
-    for hi, lo in obs:
-        if lo < price < hi:
-            alerts.append(f"🔔 {sym}: price {price} entered Order‑Block [{lo:.2f}-{hi:.2f}]")
-
-# 3) send alerts
-if alerts:
-    payload = {"content": f"**Trade Alerts {today}**\n" + "\n".join(alerts)}
-    r = requests.post(WEBHOOK, json=payload)
-    print("✅ Sent", len(alerts), "alerts" if r.ok else "❌ failed")
+
+
+def find_alerts(trades: list, frames: dict) -> list:
+    """Alert lines for trades whose latest close sits inside a zone."""
+    frames = {sym: df for sym, df in frames.items() if not df.empty}
+    panel  = indicators.build_panel(frames)
+    syms   = panel["symbols"]
+
+    # FVG / Order‑Block zones for all symbols in one pass each
+    fvgs = ict_signals.zones(syms, *ict_signals.fvg_zones(panel["high"], panel["low"], lookback=5))
+    obs  = ict_signals.zones(syms, *ict_signals.order_block_zones(panel["high"], panel["low"], lookback=10))
+
+    alerts = []
+    for t in trades:
+        sym = t["symbol"]
+        if sym not in frames:
+            continue
+        # current price = latest close
+        price = float(frames[sym]["close"].iloc[-1])
+
+        # check FVG
+        for hi, lo in fvgs[sym]:
+            if lo < price < hi:
+                alerts.append(f"🔔 {sym}: price {price} entered FVG [{lo:.2f}-{hi:.2f}]")
+
+        # check Order‑Blocks
+        for hi, lo in obs[sym]:
+            if lo < price < hi:
+                alerts.append(f"🔔 {sym}: price {price} entered Order‑Block [{lo:.2f}-{hi:.2f}]")
+    return alerts
+
+
+def send_alerts(frames: dict) -> int:
+    """
+    Check every trade in docs/trades.json against `frames` ({symbol: bars};
+    symbols missing from it are fetched) and post the alerts.  Returns the
+    number of alerts found.
+    """
+    if not WEBHOOK:
+        print("⚠️ No Discord webhook URL set.")
+        return 0
+    trades  = json.loads(DOCS_FILE.read_text()) if DOCS_FILE.exists() else []
+    missing = sorted({t["symbol"] for t in trades} - set(frames))
+    if missing:
+        frames = {**frames, **utils.prefetch_bars(missing, days=30)}
+
+    alerts = find_alerts(trades, frames)
+    if alerts:
+        payload = {"content": f"**Trade Alerts {date.today().isoformat()}**\n" + "\n".join(alerts)}
+        r = requests.post(WEBHOOK, json=payload)
+        print("✅ Sent", len(alerts), "alerts" if r.ok else "❌ failed")
+    return len(alerts)
+
+
+if __name__ == "__main__":
+    if not WEBHOOK:
+        print("⚠️ No Discord webhook URL set.")
+        raise SystemExit(0)
+    import pipeline
+    pipeline.run(["alerts"])
@@ -1,29 +1,32 @@
 from flask import Flask, render_template
-import json
-import os
 
-# Import the trade updater logic
-from trade_updater import run_trade_updater
+# Trade status logic + shared price cache / API blueprint
+from trade_updater import update_trade_status
+from trades import trades_api, PRICE_CACHE, TRADES_STORE
+from trade_store import TradeStore
 
 app = Flask(__name__)
+app.register_blueprint(trades_api)
 
-@app.route('/')
-def index():
-    # Update the trades before rendering
-    run_trade_updater()
+# ✅ Load from root directory (not data/) – once, reloaded on change
+ROOT_STORE = TradeStore("trades.json", date_field=None)
+_rendered  = (None, None)
 
-    # ✅ Load from root directory (not data/)
-    trades_file = "trades.json"
-    trades = []
 
-    if os.path.exists(trades_file):
-        with open(trades_file, 'r', encoding='utf-8') as f:
-            try:
-                trades = json.load(f)
-            except json.JSONDecodeError:
-                trades = []
+@app.route('/')
+def index():
+    global _rendered
+    # Update the trades in memory from cached prices (no Kite call / file rewrite per view)
+    trades = ROOT_STORE.records()
+    prices = PRICE_CACHE.get(trades)
 
-    return render_template('index.html', trades=trades)
+    key = (ROOT_STORE.version, frozenset(prices.items()))
+    if _rendered[0] != key:
+        updated   = update_trade_status([dict(t) for t in trades], prices)
+        _rendered = (key, render_template('index.html', trades=updated))
+    return _rendered[1]
 
 if __name__ == '__main__':
+    # Keep open-trade prices warm so page views never wait on Kite
+    PRICE_CACHE.start_refresher(lambda: ROOT_STORE.records() + TRADES_STORE.records())
     app.run(host='0.0.0.0', port=10000)
@@ -1,36 +1,46 @@
 #!/usr/bin/env python
 """
-backtest.py
+backtest.py – vectorized, look-ahead-free back-test of the Sniper entry rule.
 
-1) Authenticate Kite via env vars (KITE_API_KEY & KITE_ACCESS_TOKEN)
-2) Inject Kite into utils
-3) Loop through your parameter grid and symbols
-4) Fetch OHLC & indicators via utils.fetch_*
-5) Record results to results.json
+1) Authenticate Kite via env vars (KITE_API_KEY & KITE_ACCESS_TOKEN) –
+   skipped when SNIPER_BAR_STORE_OFFLINE=1 (bars come from the store only)
+2) Load every symbol's daily bars ONCE and align them on a common calendar
+3) Compute indicator arrays for the whole universe in one pass; the value at
+   bar i only ever uses bars ≤ i
+4) For each parameter combo, evaluate entries (RSI ≥ RSI_MIN & ADX ≥ ADX_MIN)
+   and their SL / target exits (close ∓ / ± VOL_MULTIPLIER·ATR, first touch
+   within HOLD_BARS bars after entry) as NumPy operations over every bar
+5) Record win rate, P&L, drawdown and Sharpe per combo to results.json
+
+The grid runs on a process pool sharing memory-mapped indicator arrays and
+streams results.json as combos finish; an interrupted run resumes where it
+stopped (`--fresh` starts over, `--workers N` sizes the pool).
 """
 
-import os
+import argparse
+import hashlib
 import json
-from datetime import date
+import os
+import pathlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from kiteconnect import KiteConnect
+import numpy as np
+import pandas as pd
 
+import indicators
 import utils
-from utils import fetch_ohlc, fetch_rsi, fetch_adx, fetch_macd
-from instruments import FNO_SYMBOLS
+from indicators import first_true, forward_windows
+from config import FNO_SYMBOLS, HOLD_BARS
 
-# ── 1) AUTHENTICATE via environment variables ──────────────────────────────
-API_KEY      = os.getenv("KITE_API_KEY")
-ACCESS_TOKEN = os.getenv("KITE_ACCESS_TOKEN")
-if not (API_KEY and ACCESS_TOKEN):
-    raise RuntimeError("Both KITE_API_KEY and KITE_ACCESS_TOKEN must be set as secrets")
+BASE = pathlib.Path(__file__).parent
 
-kite = KiteConnect(api_key=API_KEY)
-kite.set_access_token(ACCESS_TOKEN)
-utils.set_kite(kite)
+# Bars of history loaded per symbol (~3 years of daily bars)
+HISTORY_DAYS = 800
+PERIOD       = 14
 
-# ── 2) Define your parameter grid ──────────────────────────────────────────
-# Example grid: (RSI_MIN, ADX_MIN, VOL_MULTIPLIER, DONCHIAN_WINDOW, SIGMA)
+# ── 1) Parameter grid ───────────────────────────────────────────────────────
+# (RSI_MIN, ADX_MIN, VOL_MULTIPLIER, DONCHIAN_WINDOW, SIGMA)
 grid = [
     (rsi_min, adx_min, vol_mul, dc_win, sigma)
     for rsi_min in [45, 50, 55]
@@ -40,58 +50,282 @@ grid = [
     for sigma in [1, 2]
 ]
 
-# ── 3) Per‐symbol backtest logic ────────────────────────────────────────────
-def run_symbol(sym, rsi_min, adx_min, vol_mul, dc_win, sigma):
-    df = fetch_ohlc(sym, 800)   # ~3 years of daily bars
-    if df is None or df.empty:
-        return []
-
-    results = []
-    # --- Example logic: simple RSI+ADX filter ---
-    for i in range(dc_win, len(df)):
-        price = df["close"].iloc[i]
-        if fetch_rsi(sym) is None or fetch_adx(sym) is None:
-            continue
-        if fetch_rsi(sym) >= rsi_min and fetch_adx(sym) >= adx_min:
-            # simulate a buy at 'price'
-            # placeholder: you can expand this to track SL, Target, P&L, etc.
-            results.append({
-                "symbol": sym,
-                "date":    df.index[i].strftime("%Y-%m-%d") if hasattr(df.index[i], "strftime") else str(df.index[i]),
-                "entry":   round(price, 2),
-                "rsi":     round(fetch_rsi(sym), 2),
-                "adx":     round(fetch_adx(sym), 2),
-                "macd":    round(fetch_macd(sym) or 0.0, 2),
-            })
-    return results
 
-# ── 4) Aggregate metrics per combo ─────────────────────────────────────────
-def run_combo(rsi_min, adx_min, vol_mul, dc_win, sigma):
-    all_trades = []
-    for sym in FNO_SYMBOLS:
-        trades = run_symbol(sym, rsi_min, adx_min, vol_mul, dc_win, sigma)
-        all_trades.extend(trades)
+def authenticate():
+    """Inject a Kite client into utils unless running purely off the bar store."""
+    if os.getenv("SNIPER_BAR_STORE_OFFLINE") == "1":
+        return
+    from kiteconnect import KiteConnect
+
+    api_key      = os.getenv("KITE_API_KEY")
+    access_token = os.getenv("KITE_ACCESS_TOKEN")
+    if not (api_key and access_token):
+        raise RuntimeError("Both KITE_API_KEY and KITE_ACCESS_TOKEN must be set as secrets")
+    kite = KiteConnect(api_key=api_key)
+    kite.set_access_token(access_token)
+    utils.set_kite(kite)
+
+
+# ── 2) Load bars once & precompute indicators ──────────────────────────────
+def load_universe(symbols: list, days: int = HISTORY_DAYS, period: int = PERIOD) -> dict:
+    """
+    Panel of every symbol's bars on a shared date axis (NaN where a symbol
+    has no bar), plus `dates` and the indicator arrays from indicators.compute.
+    """
+    frames = {s: df for s, df in utils.prefetch_bars(symbols, days=days).items() if len(df)}
+    dates  = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values())))) \
+        if frames else pd.DatetimeIndex([])
+    panel  = indicators.build_panel({s: df.reindex(dates) for s, df in frames.items()})
+    panel["dates"] = dates
+    panel.update(indicators.compute(panel, period))
+    return panel
+
+
+# ── 3) Simulation ──────────────────────────────────────────────────────────
+def exits(panel: dict, vol_mul, hold: int = HOLD_BARS) -> dict:
+    """
+    Exit outcome for a hypothetical entry at EVERY bar – these depend only on
+    (vol_mul, hold), so combos that differ in entry thresholds share them.
+
+    Exits are checked from the next bar on; if a bar touches both levels the
+    SL is assumed first, and a gap through the SL fills at that bar's open.
+    Entries whose window runs past the end of the data without a hit are
+    still open (`resolved` False).
+    """
+    close, atr = panel["close"], panel["atr"]
+    n_bars     = close.shape[1]
+
+    sl  = close - vol_mul * atr
+    tgt = close + vol_mul * atr
+
+    f_high  = forward_windows(panel["high"],  hold)
+    f_low   = forward_windows(panel["low"],   hold)
+
+    with np.errstate(invalid="ignore"):
+        sl_at  = first_true(f_low  <= sl[..., None])
+        tgt_at = first_true(f_high >= tgt[..., None])
+
+    is_sl   = sl_at < hold
+    is_sl  &= sl_at <= tgt_at
+    is_tgt  = (tgt_at < hold) & ~is_sl
+    timed   = ~is_sl & ~is_tgt & (np.arange(n_bars) + hold < n_bars)
+
+    k     = np.where(is_sl, sl_at, np.where(is_tgt, tgt_at, hold - 1))
+    at_k  = lambda a: np.take_along_axis(forward_windows(a, hold), k[..., None], axis=-1)[..., 0]
+    price = np.where(is_sl, np.fmin(sl, at_k(panel["open"])),
+                     np.where(is_tgt, tgt, at_k(close)))
+    return {
+        # a time exit landing on a missing bar (suspension) can't be priced
+        "resolved": (is_sl | is_tgt | timed) & ~np.isnan(price),
+        "offset":   k + 1,
+        "price":    price,
+        "outcome":  np.where(is_sl, -1, np.where(is_tgt, 1, 0)),
+    }
+
+
+def simulate(panel: dict, rsi_min, adx_min, vol_mul, dc_win, sigma,
+             hold: int = HOLD_BARS, exit_table: dict = None) -> dict:
+    """
+    All trades for one combo as parallel arrays: sym, entry_bar, exit_bar,
+    entry, exit, pnl_pct and outcome (1 target, -1 SL, 0 time exit).
+
+    Entries are taken at the close of the signal bar; see `exits()` for how
+    they are closed.  Pass a precomputed `exit_table` to reuse it across combos.
+    `sigma` only applies to the live strangle leg and does not affect entries.
+    """
+    close, atr = panel["close"], panel["atr"]
+    bar        = np.arange(close.shape[1])
+    ex         = exit_table if exit_table is not None else exits(panel, vol_mul, hold)
+
+    with np.errstate(invalid="ignore"):
+        signal = (panel["rsi"] >= rsi_min) & (panel["adx"] >= adx_min) & (atr > 0)
+    # skip each symbol's first `dc_win` bars of its own history
+    signal &= bar >= np.argmax(~np.isnan(close), axis=1)[:, None] + dc_win
+
+    s, i  = np.nonzero(signal & ex["resolved"])
+    entry = close[s, i]
+    exit_ = ex["price"][s, i]
+    return {
+        "sym":       s,
+        "entry_bar": i,
+        "exit_bar":  i + ex["offset"][s, i],
+        "entry":     entry,
+        "exit":      exit_,
+        "pnl_pct":   (exit_ - entry) / entry * 100,
+        "outcome":   ex["outcome"][s, i],
+    }
+
+
+# ── 4) Metrics per combo ────────────────────────────────────────────────────
+def metrics(trades: dict, n_bars: int) -> dict:
+    """
+    Win rate, P&L, drawdown and Sharpe for equal-weight (1 unit per trade)
+    positions, with P&L booked on the exit bar.
+    """
+    pnl   = trades["pnl_pct"]
+    count = len(pnl)
+    daily = np.bincount(trades["exit_bar"], weights=pnl, minlength=n_bars)
+    equity   = np.cumsum(daily)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    sd       = daily.std()
+    return {
+        "trade_count":      count,
+        "wins":             int((pnl > 0).sum()),
+        "target_hits":      int((trades["outcome"] == 1).sum()),
+        "sl_hits":          int((trades["outcome"] == -1).sum()),
+        "time_exits":       int((trades["outcome"] == 0).sum()),
+        "win_rate":         round(float((pnl > 0).mean() * 100), 2) if count else 0.0,
+        "total_pnl_pct":    round(float(pnl.sum()), 2),
+        "avg_pnl_pct":      round(float(pnl.mean()), 3) if count else 0.0,
+        "max_drawdown_pct": round(float(drawdown.max()), 2) if n_bars else 0.0,
+        "sharpe":           round(float(daily.mean() / sd * np.sqrt(252)), 3) if sd > 0 else 0.0,
+    }
+
 
+def run_combo(panel: dict, rsi_min, adx_min, vol_mul, dc_win, sigma, exit_table: dict = None) -> dict:
+    trades = simulate(panel, rsi_min, adx_min, vol_mul, dc_win, sigma, exit_table=exit_table)
     return {
-        "RSI_MIN":        rsi_min,
-        "ADX_MIN":        adx_min,
-        "VOL_MULTIPLIER": vol_mul,
+        "RSI_MIN":         rsi_min,
+        "ADX_MIN":         adx_min,
+        "VOL_MULTIPLIER":  vol_mul,
         "DONCHIAN_WINDOW": dc_win,
         "N_SIGMA_PRIMARY": sigma,
-        "trade_count":    len(all_trades),
-        # You can compute additional metrics here, e.g. win-rate, avg P&L, sharpe, etc.
+        **metrics(trades, panel["close"].shape[1]),
     }
 
-# ── 5) Execute grid and write results ───────────────────────────────────────
+
+# ── 5) Parallel grid ────────────────────────────────────────────────────────
+# Indicator arrays are written once as .npy files and memory-mapped read-only
+# by every worker process, so the pool shares one copy of the panel.  Each
+# finished combo is appended to progress.jsonl next to the arrays; a rerun on
+# the same data resumes from there unless --fresh is given.
+GRID_DIR     = BASE / "data" / "backtest"
+RESULTS_FILE = BASE / "results.json"
+SHARED       = ("open", "high", "low", "close", "rsi", "adx", "atr")
+COMBO_KEYS   = ("RSI_MIN", "ADX_MIN", "VOL_MULTIPLIER", "DONCHIAN_WINDOW", "N_SIGMA_PRIMARY")
+
+
+def fingerprint(panel: dict) -> str:
+    """Identity of the data a grid runs on (symbols, bars, indicator period, hold)."""
+    h = hashlib.sha1(json.dumps([panel["symbols"], PERIOD, HOLD_BARS]).encode())
+    h.update(np.ascontiguousarray(panel["close"]).tobytes())
+    return h.hexdigest()[:16]
+
+
+def share(panel: dict, root: pathlib.Path = GRID_DIR) -> pathlib.Path:
+    """Write the arrays workers need under root/<fingerprint>/ (once); prune older runs."""
+    path = root / fingerprint(panel)
+    path.mkdir(parents=True, exist_ok=True)
+    for field in SHARED:
+        target = path / f"{field}.npy"
+        if not target.exists():
+            tmp = path / f"{field}.tmp.npy"
+            np.save(tmp, np.ascontiguousarray(panel[field]))
+            os.replace(tmp, target)
+    for old in root.iterdir():
+        if old.is_dir() and old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def attach(path) -> dict:
+    """Read-only memory-mapped panel written by `share()`."""
+    path = pathlib.Path(path)
+    return {field: np.load(path / f"{field}.npy", mmap_mode="r") for field in SHARED}
+
+
+_worker_panel = None
+_worker_exits = {}
+
+
+def _init_worker(path: str):
+    global _worker_panel
+    _worker_panel = attach(path)
+    _worker_exits.clear()
+
+
+def _run_shared(combo: tuple) -> dict:
+    vol_mul = combo[2]
+    if vol_mul not in _worker_exits:
+        _worker_exits[vol_mul] = exits(_worker_panel, vol_mul)
+    return run_combo(_worker_panel, *combo, exit_table=_worker_exits[vol_mul])
+
+
+def _write_results(results: list, out: pathlib.Path):
+    tmp = out.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(results, indent=2))
+    os.replace(tmp, out)
+
+
+def run_grid(panel: dict, combos: list, workers: int = None, fresh: bool = False,
+             out: pathlib.Path = RESULTS_FILE) -> list:
+    """
+    Evaluate `combos` across a process pool.  results.json is rewritten
+    (atomically, in grid order) as each combo finishes.
+    """
+    path     = share(panel)
+    progress = path / "progress.jsonl"
+    if fresh and progress.exists():
+        progress.unlink()
+
+    done = {}
+    text = progress.read_text() if progress.exists() else ""
+    torn = bool(text) and not text.endswith("\n")
+    for line in text.splitlines():
+        try:
+            res = json.loads(line)
+        except json.JSONDecodeError:
+            continue              # torn last line from an interrupted run
+        done[tuple(res[k] for k in COMBO_KEYS)] = res
+    todo = [c for c in combos if tuple(c) not in done]
+    if done:
+        print(f"⏩ Resuming: {len(combos) - len(todo)}/{len(combos)} combos already done")
+
+    # group by VOL_MULTIPLIER so each worker reuses its exit table
+    todo.sort(key=lambda c: c[2])
+    workers = workers or os.cpu_count() or 1
+
+    def ordered():
+        return [done[tuple(c)] for c in combos if tuple(c) in done]
+
+    with open(progress, "a") as log:
+        if torn:
+            log.write("\n")      # start the next record on a fresh line
+
+        def finished(combo, res):
+            log.write(json.dumps(res) + "\n")
+            log.flush()
+            done[tuple(combo)] = res
+            _write_results(ordered(), out)
+            print(f"🔄 Completed combo {combo} → trades: {res['trade_count']}, "
+                  f"win {res['win_rate']}%, P&L {res['total_pnl_pct']}%, sharpe {res['sharpe']}")
+
+        if workers == 1 or len(todo) <= 1:
+            _init_worker(str(path))
+            for combo in todo:
+                finished(combo, _run_shared(combo))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(path),)) as pool:
+                futures = {pool.submit(_run_shared, combo): combo for combo in todo}
+                for fut in as_completed(futures):
+                    finished(futures[fut], fut.result())
+
+    results = ordered()
+    _write_results(results, out)
+    return results
+
+
+# ── 6) Execute grid and write results ───────────────────────────────────────
 if __name__ == "__main__":
-    results = []
-    for combo in grid:
-        res = run_combo(*combo)
-        results.append(res)
-        print(f"🔄 Completed combo {combo} → trades: {res['trade_count']}")
+    ap = argparse.ArgumentParser(description="Back-test the Sniper parameter grid.")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--fresh", action="store_true", help="ignore progress from an interrupted run")
+    args = ap.parse_args()
 
-    # write out results.json for review
-    with open("results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    authenticate()
+    panel = load_universe(FNO_SYMBOLS)
+    print(f"📊 Loaded {len(panel['symbols'])} symbols × {len(panel['dates'])} bars")
 
-    print(f"✅ Backtest complete; wrote {len(results)} parameter combos to results.json.")
+    results = run_grid(panel, grid, workers=args.workers, fresh=args.fresh)
+    print(f"✅ Backtest complete; wrote {len(results)} parameter combos to {RESULTS_FILE.name}.")
@@ -0,0 +1,95 @@
+"""
+bar_cache.py – per-run OHLC bar cache shared by every utils.fetch_* helper.
+
+fetch_rsi / fetch_adx / fetch_atr and the engine all ask for bars of the same
+symbol with different `days=` windows.  The cache keeps one frame per
+(token, interval) covering the widest date range fetched so far and serves any
+narrower request by slicing it, so each symbol costs one historical_data call
+per run instead of 6–8.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Minimum look-back fetched on a miss.  Wide enough that the engine's 60-day
+# scan, the 42-day indicator windows and the 30-day PoP features all land on a
+# single request per symbol.
+MIN_DAYS = 90
+
+
+def _naive_index(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """Bar timestamps as exchange wall-clock time (Kite returns +05:30 aware)."""
+    idx = df.index
+    return idx.tz_localize(None) if getattr(idx, "tz", None) is not None else idx
+
+
+class BarCache:
+    """
+    In-memory bar cache keyed by (token, interval) → (from_date, to_date, frame).
+
+    `get()` answers a (token, interval, from_date, to_date) request from the
+    cached frame when its range covers the request, otherwise it calls
+    `fetch(token, interval, from_date, to_date)` once for the union of the
+    cached and requested ranges (never narrower than MIN_DAYS).
+
+    Thread-safe: concurrent requests for the same key wait for the one fetch
+    in flight instead of issuing their own.
+    """
+
+    def __init__(self, min_days: int = MIN_DAYS):
+        self.min_days   = min_days
+        self.hits       = 0
+        self.misses     = 0
+        self._bars      = {}
+        self._lock      = threading.Lock()
+        self._key_locks = {}
+
+    def clear(self):
+        with self._lock:
+            self._bars.clear()
+            self._key_locks.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters; every hit is one historical_data call saved."""
+        return {
+            "hits":        self.hits,
+            "misses":      self.misses,
+            "saved_calls": self.hits,
+            "entries":     len(self._bars),
+        }
+
+    def get(self, token, interval: str, from_date: datetime, to_date: datetime, fetch) -> pd.DataFrame:
+        key = (token, interval)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._bars.get(key)
+            if entry is not None:
+                have_from, have_to, df = entry
+                if have_from <= from_date and have_to.date() >= to_date.date():
+                    with self._lock:
+                        self.hits += 1
+                    return self._slice(df, from_date, to_date)
+
+            # Miss → fetch the widest window we know of in a single call
+            with self._lock:
+                self.misses += 1
+            wide_from = min(from_date, to_date - timedelta(days=self.min_days))
+            if entry is not None:
+                wide_from = min(wide_from, entry[0])
+            df = fetch(token, interval, wide_from, to_date)
+            self._bars[key] = (wide_from, to_date, df)
+            return self._slice(df, from_date, to_date)
+
+    @staticmethod
+    def _slice(df: pd.DataFrame, from_date: datetime, to_date: datetime) -> pd.DataFrame:
+        if df.empty:
+            return df.copy()
+        idx  = _naive_index(df)
+        mask = (idx >= pd.Timestamp(from_date)) & (idx <= pd.Timestamp(to_date))
+        # Callers may add scratch columns – never hand out the cached frame
+        return df[mask].copy()
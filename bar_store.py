@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+"""
+bar_store.py – persistent on-disk historical bar store.
+
+One memory-mappable NumPy file per (instrument token, interval) under
+data/bars/, plus an index.json recording which date range each file covers.
+utils.fetch_ohlc reads through the store and only asks Kite for the days the
+store doesn't have yet (normally just today's bar), so repeat runs are
+near-zero I/O and stay well inside the rate limit.
+
+Environment:
+  SNIPER_BAR_STORE          store directory (point it at a fixture dir for tests)
+  SNIPER_BAR_STORE_OFFLINE  "1" → never call Kite, serve only what's on disk
+
+CLI:
+  python bar_store.py verify  [--root DIR]   sanity-check every file + index
+  python bar_store.py compact [--root DIR]   sort/dedupe files, rebuild index
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+BASE = pathlib.Path(__file__).parent
+
+STORE_DIR = pathlib.Path(os.getenv("SNIPER_BAR_STORE", BASE / "data" / "bars"))
+OFFLINE   = os.getenv("SNIPER_BAR_STORE_OFFLINE", "") == "1"
+
+BAR_DTYPE = np.dtype([
+    ("date",   "datetime64[s]"),
+    ("open",   "f8"),
+    ("high",   "f8"),
+    ("low",    "f8"),
+    ("close",  "f8"),
+    ("volume", "i8"),
+])
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+
+# ── Frame ↔ record conversion ──────────────────────────────────────────────
+def to_records(df: pd.DataFrame) -> np.ndarray:
+    """OHLCV DataFrame (date index) → structured array in BAR_DTYPE."""
+    out = np.empty(len(df), dtype=BAR_DTYPE)
+    if df.empty:
+        return out
+    idx = df.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_localize(None)          # keep exchange wall-clock time
+    out["date"] = idx.values.astype("datetime64[s]")
+    for col in PRICE_FIELDS:
+        out[col] = df[col].to_numpy(dtype="f8")
+    out["volume"] = df["volume"].fillna(0).to_numpy(dtype="i8")
+    return out
+
+
+def to_frame(rec: np.ndarray) -> pd.DataFrame:
+    """Structured array → OHLCV DataFrame indexed by date."""
+    df = pd.DataFrame({col: np.asarray(rec[col]) for col in PRICE_FIELDS + ("volume",)})
+    df.index = pd.DatetimeIndex(np.asarray(rec["date"]).astype("datetime64[ns]"), name="date")
+    return df
+
+
+def merge(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Union of two bar arrays, sorted by date; on duplicate dates `new` wins."""
+    both = np.concatenate([np.asarray(old, dtype=BAR_DTYPE), np.asarray(new, dtype=BAR_DTYPE)])
+    # stable sort keeps `new` after `old` for equal dates → take the last of each run
+    both = both[np.argsort(both["date"], kind="stable")]
+    if len(both) < 2:
+        return both
+    keep = np.append(both["date"][1:] != both["date"][:-1], True)
+    return both[keep]
+
+
+# ── Store ──────────────────────────────────────────────────────────────────
+class BarStore:
+    """
+    Directory of `<token>_<interval>.npy` bar files + `index.json` coverage map.
+
+    Coverage is tracked separately from the bars themselves so weekends,
+    holidays and pre-listing dates don't look like gaps to re-fetch.  Only
+    complete days are marked covered: today's (still forming) bar is stored
+    but re-fetched on the next call.
+    """
+
+    def __init__(self, root=STORE_DIR, offline: bool = OFFLINE):
+        self.root    = pathlib.Path(root)
+        self.offline = offline
+        self._lock   = threading.RLock()     # re-entrant: _extend_coverage → _load_index
+        self._index  = None
+
+    # -- paths & index ------------------------------------------------------
+    def path(self, token, interval: str) -> pathlib.Path:
+        return self.root / f"{token}_{interval}.npy"
+
+    @property
+    def index_file(self) -> pathlib.Path:
+        return self.root / "index.json"
+
+    def _load_index(self) -> dict:
+        with self._lock:
+            if self._index is None:
+                try:
+                    self._index = json.loads(self.index_file.read_text())
+                except (FileNotFoundError, json.JSONDecodeError):
+                    self._index = {}
+            return self._index
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self._index, indent=2, sort_keys=True))
+        os.replace(tmp, self.index_file)
+
+    def coverage(self, token, interval: str):
+        """(first_day, last_complete_day) covered for this file, or None."""
+        with self._lock:
+            cov = self._load_index().get(f"{token}_{interval}")
+        if not cov:
+            return None
+        return date.fromisoformat(cov["from"]), date.fromisoformat(cov["to"])
+
+    # -- bar files ------------------------------------------------------------
+    def read(self, token, interval: str) -> np.ndarray:
+        """Memory-mapped bars for a token (empty array if nothing stored)."""
+        p = self.path(token, interval)
+        if not p.exists():
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.load(p, mmap_mode="r")
+
+    def write(self, token, interval: str, rec: np.ndarray):
+        self.root.mkdir(parents=True, exist_ok=True)
+        p   = self.path(token, interval)
+        tmp = p.with_suffix(".npy.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(rec, dtype=BAR_DTYPE))
+        os.replace(tmp, p)
+
+    # -- read-through load ----------------------------------------------------
+    def load(self, token, interval: str, from_date: datetime, to_date: datetime, fetch) -> pd.DataFrame:
+        """
+        Bars for [from_date, to_date], fetching only the head/tail days that
+        the store doesn't cover via `fetch(token, interval, from, to)`.
+        """
+        cov   = self.coverage(token, interval)
+        parts = []
+
+        if not self.offline:
+            if cov is None:
+                parts.append(fetch(token, interval, from_date, to_date))
+            else:
+                have_from, have_to = cov
+                if from_date.date() < have_from:
+                    head_to = datetime.combine(have_from, datetime.min.time()) - timedelta(seconds=1)
+                    parts.append(fetch(token, interval, from_date, head_to))
+                if to_date.date() > have_to:
+                    tail_from = datetime.combine(have_to + timedelta(days=1), datetime.min.time())
+                    parts.append(fetch(token, interval, tail_from, to_date))
+
+        rec = self.read(token, interval)
+        if parts:
+            fresh = np.concatenate([to_records(df) for df in parts])
+            rec   = merge(rec, fresh)
+            self.write(token, interval, rec)
+            self._extend_coverage(token, interval, from_date.date(), to_date.date())
+
+        lo = np.searchsorted(rec["date"], np.datetime64(from_date, "s"), side="left")
+        hi = np.searchsorted(rec["date"], np.datetime64(to_date, "s"), side="right")
+        return to_frame(rec[lo:hi])
+
+    def _extend_coverage(self, token, interval: str, first: date, last: date):
+        # today's bar is still forming – only mark days up to yesterday as complete
+        last = min(last, date.today() - timedelta(days=1))
+        with self._lock:
+            index = self._load_index()
+            key   = f"{token}_{interval}"
+            cov   = index.get(key)
+            if cov:
+                first = min(first, date.fromisoformat(cov["from"]))
+                last  = max(last,  date.fromisoformat(cov["to"]))
+            index[key] = {"from": first.isoformat(), "to": last.isoformat()}
+            self._save_index()
+
+    # -- maintenance ------------------------------------------------------------
+    def files(self):
+        return sorted(self.root.glob("*_*.npy"))
+
+    def verify(self) -> list[str]:
+        """Return a list of problems (empty list → store is healthy)."""
+        problems = []
+        index    = self._load_index()
+        seen     = set()
+
+        for p in self.files():
+            key = p.stem
+            seen.add(key)
+            try:
+                rec = np.load(p, mmap_mode="r")
+            except Exception as e:
+                problems.append(f"{key}: unreadable ({e})")
+                continue
+            if rec.dtype != BAR_DTYPE:
+                problems.append(f"{key}: unexpected dtype {rec.dtype}")
+                continue
+            if len(rec) == 0:
+                continue
+            if np.any(np.diff(rec["date"].astype("i8")) <= 0):
+                problems.append(f"{key}: dates not strictly increasing")
+            prices = np.column_stack([rec[c] for c in PRICE_FIELDS])
+            if np.isnan(prices).any():
+                problems.append(f"{key}: NaN prices")
+            if np.any(rec["high"] < rec["low"]):
+                problems.append(f"{key}: high < low on {int(np.sum(rec['high'] < rec['low']))} bars")
+            if np.any(rec["volume"] < 0):
+                problems.append(f"{key}: negative volume")
+            if key not in index:
+                problems.append(f"{key}: missing from index.json")
+            else:
+                first = rec["date"][0].astype("datetime64[D]").item()
+                if first < date.fromisoformat(index[key]["from"]):
+                    problems.append(f"{key}: bars start before indexed coverage")
+
+        for key in index:
+            if key not in seen:
+                problems.append(f"{key}: indexed but no bar file")
+        return problems
+
+    def compact(self) -> int:
+        """Sort + dedupe every file, drop stale temp files, rebuild the index. Returns files rewritten."""
+        for tmp in self.root.glob("*.tmp"):
+            tmp.unlink()
+        index     = self._load_index()
+        rewritten = 0
+        keys      = set()
+
+        for p in self.files():
+            key = p.stem
+            keys.add(key)
+            token, interval = key.rsplit("_", 1)
+            rec   = np.load(p)
+            clean = merge(np.empty(0, dtype=BAR_DTYPE), rec)
+            clean = clean[~np.isnan(np.column_stack([clean[c] for c in PRICE_FIELDS])).any(axis=1)]
+            if len(clean) != len(rec) or not np.array_equal(clean, rec):
+                self.write(token, interval, clean)
+                rewritten += 1
+            if key not in index and len(clean):
+                index[key] = {
+                    "from": clean["date"][0].astype("datetime64[D]").item().isoformat(),
+                    "to":   clean["date"][-1].astype("datetime64[D]").item().isoformat(),
+                }
+
+        for key in [k for k in index if k not in keys]:
+            del index[key]
+        self._save_index()
+        return rewritten
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain the on-disk bar store.")
+    ap.add_argument("command", choices=["verify", "compact"])
+    ap.add_argument("--root", default=str(STORE_DIR), help="store directory (default: %(default)s)")
+    args = ap.parse_args()
+
+    store = BarStore(args.root, offline=True)
+    if args.command == "compact":
+        n = store.compact()
+        print(f"🧹 Compacted {args.root}: rewrote {n} of {len(store.files())} files.")
+
+    problems = store.verify()
+    for msg in problems:
+        print(f"❌ {msg}")
+    if problems:
+        raise SystemExit(1)
+    print(f"✅ Bar store OK — {len(store.files())} files in {args.root}")
@@ -42,6 +42,9 @@ STRANGLE_SD_BANDS = [1.0, 1.5, 2.0]
 # PoP (%) threshold required to allow trades in weak sectors
 SECTOR_POP_EXCEPT = 90
 
+# Max bars a trade is held before a time exit (backtest + historical PoP)
+HOLD_BARS = 10
+
 # Path to sniper_params.json for self‑tuning
 PARAMS_FILE = pathlib.Path(__file__).parent / "sniper_params.json"
 if PARAMS_FILE.exists():
@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+"""
+exit_monitor.py – intraday SL / target exits from a live tick stream.
+
+monitor_trades.py looks at one price per trade per day, so intraday hits are
+missed.  The exit monitor subscribes every open trade's instrument to a tick
+stream (KiteTicker, or ReplayTicker for recorded / synthetic ticks) and
+checks each tick against a ThresholdBook:
+
+  • per instrument token, the open trades' stops and targets are kept in
+    sorted lists, so a tick that hits nothing costs two comparisons and a
+    hit is found with one bisect – O(log n) per tick however many trades
+    share the token
+  • a trade past its holding period (HOLD_BARS business days, or its own
+    "holding_days") exits as "Time Exit" on its next tick
+
+Every exit is journalled immediately ("close" event) with the exact trigger
+price and tick timestamp, and docs/trades.json is rewritten without it.
+
+CLI:
+  python exit_monitor.py [--until 15:25]            live KiteTicker until IST time
+  python exit_monitor.py --replay ticks.jsonl|.npz  replay recorded ticks (dry run)
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+import token_resolver
+import trade_journal
+from config import HOLD_BARS
+
+BASE        = pathlib.Path(__file__).parent
+TRADES_FILE = BASE / "docs" / "trades.json"
+IST         = timezone(timedelta(hours=5, minutes=30))
+
+
+def trade_token(trade: dict):
+    """Instrument token a trade is priced on (None if it can't be resolved)."""
+    ttype = str(trade.get("type", "Cash")).lower()
+    if ttype == "futures":
+        return token_resolver.resolve_future(trade["symbol"])
+    if ttype == "options":
+        return token_resolver.resolve(trade["symbol"], "NFO")
+    return token_resolver.resolve(trade["symbol"].split()[0])
+
+
+# ── Threshold book ──────────────────────────────────────────────────────────
+class ThresholdBook:
+    """
+    Long trades indexed by token: sorted (sl, id) and (target, id) lists.
+    `hits(token, price)` returns the ids whose stop or target the price
+    crossed (a stop wins if both somehow are).
+    """
+
+    def __init__(self):
+        self.sl     = {}    # token → sorted [(sl, id)]
+        self.target = {}    # token → sorted [(target, id)]
+
+    def add(self, token: int, trade_id: int, sl: float, target: float):
+        if sl is not None:
+            ls = self.sl.setdefault(token, [])
+            ls.insert(bisect_left(ls, (sl, trade_id)), (sl, trade_id))
+        if target is not None:
+            lt = self.target.setdefault(token, [])
+            lt.insert(bisect_left(lt, (target, trade_id)), (target, trade_id))
+
+    def remove(self, token: int, trade_id: int, sl: float, target: float):
+        for book, level in ((self.sl, sl), (self.target, target)):
+            levels = book.get(token)
+            if levels and level is not None:
+                i = bisect_left(levels, (level, trade_id))
+                if i < len(levels) and levels[i] == (level, trade_id):
+                    del levels[i]
+
+    def hits(self, token: int, price: float) -> list:
+        """[(trade id, "sl" | "target")] crossed by `price`."""
+        out = []
+        sl, tgt = self.sl.get(token), self.target.get(token)
+        if sl and sl[-1][0] >= price:                    # every stop ≥ price
+            out += [(i, "sl") for _, i in sl[bisect_left(sl, (price, -1)):]]
+        if tgt and tgt[0][0] <= price:                   # every target ≤ price
+            hit = {i for i, _ in out}
+            out += [(i, "target") for _, i in tgt[:bisect_right(tgt, (price, float("inf")))]
+                    if i not in hit]
+        return out
+
+    def __len__(self):
+        return sum(map(len, self.target.values()))
+
+
+# ── Monitor ─────────────────────────────────────────────────────────────────
+def _tick_time(tick: dict) -> datetime:
+    ts = tick.get("exchange_timestamp") or tick.get("last_trade_time") or tick.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return datetime.fromtimestamp(ts, IST)
+    if isinstance(ts, str):
+        return datetime.fromisoformat(ts)
+    return ts or datetime.now(IST)
+
+
+class ExitMonitor:
+    """
+    Watches `trades` (dicts as in docs/trades.json) and closes them on ticks.
+    `on_exit(trades)` is called with each tick batch's closed trades; the
+    default journals them and rewrites TRADES_FILE.
+    """
+
+    def __init__(self, trades: list, on_exit=None, today: date = None):
+        self.trades  = {}
+        self.tokens  = {}
+        self.due     = {}      # token → ids already past their holding period
+        self.book    = ThresholdBook()
+        self.closed  = []
+        self.last    = {}      # token → last traded price seen
+        self.on_exit = on_exit or self.journal
+        today = today or date.today()
+        for i, t in enumerate(trades):
+            if trade_journal.is_closed(t):
+                continue
+            token = trade_token(t)
+            if not token:
+                print(f"⚠️ No instrument token for {t.get('symbol')} — not monitored")
+                continue
+            self.trades[i], self.tokens[i] = t, token
+            self.book.add(token, i, t.get("sl"), t.get("target"))
+            if self._past_hold(t, today):
+                self.due.setdefault(token, set()).add(i)
+
+    @staticmethod
+    def _past_hold(trade: dict, today: date) -> bool:
+        entry = str(trade.get("entry_date") or trade.get("date") or "")[:10]
+        if not entry:
+            return False
+        hold = int(trade.get("holding_days", HOLD_BARS))
+        return np.busday_count(entry, today.isoformat()) >= hold
+
+    def subscribed(self) -> list:
+        return sorted(set(self.tokens.values()))
+
+    # -- ticks ----------------------------------------------------------------
+    def check(self, token: int, price: float, when: datetime) -> list:
+        """Exit every trade this tick triggers; returns the closed trades."""
+        hits = self.book.hits(token, price)
+        due  = self.due.pop(token, None)
+        if due:
+            hit   = {i for i, _ in hits}
+            hits += [(i, "time") for i in sorted(due) if i not in hit]
+        return [self._close(i, trigger, price, when) for i, trigger in hits]
+
+    def on_ticks(self, ws, ticks: list):
+        """KiteTicker callback."""
+        closed = []
+        for tick in ticks:
+            token = tick["instrument_token"]
+            self.last[token] = tick["last_price"]
+            if token in self.book.sl or token in self.book.target or token in self.due:
+                closed += self.check(token, tick["last_price"], _tick_time(tick))
+        if closed:
+            self.on_exit(closed)
+            if not self.trades and ws is not None:
+                ws.stop()
+
+    def _close(self, i: int, trigger: str, price: float, when: datetime) -> dict:
+        t = self.trades.pop(i)
+        token = self.tokens.pop(i)
+        self.book.remove(token, i, t.get("sl"), t.get("target"))
+        for ids in self.due.values():
+            ids.discard(i)
+        entry = t.get("entry")
+        t.update({
+            "status":        {"sl": "SL Hit", "target": "Target Hit", "time": "Time Exit"}[trigger],
+            "trigger":       trigger,
+            "trigger_price": price,
+            "exit_price":    price,
+            "exit_ts":       when.isoformat(),
+            "exit_date":     when.date().isoformat(),
+            "cmp":           price,
+        })
+        if entry:
+            t["pnl"]        = round(price - entry, 2)
+            t["return_pct"] = round((price - entry) / entry * 100, 2)
+        self.closed.append(t)
+        return t
+
+    # -- persistence --------------------------------------------------------------
+    def open_trades(self) -> list:
+        return [self.trades[i] for i in sorted(self.trades)]
+
+    def mark(self):
+        """Stamp the last seen price on every still-open trade and write them back."""
+        for i, t in self.trades.items():
+            if self.tokens[i] in self.last:
+                t["cmp"] = self.last[self.tokens[i]]
+        write_open(self.open_trades())
+
+    def journal(self, closed: list):
+        trade_journal.record("close", closed, run_date=closed[0]["exit_date"])
+        write_open(self.open_trades())
+        report(closed)
+
+
+def load_open(path: pathlib.Path = TRADES_FILE) -> list:
+    return json.loads(path.read_text()) if path.exists() else []
+
+
+def write_open(trades: list, path: pathlib.Path = TRADES_FILE):
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(trades, indent=2))
+    os.replace(tmp, path)
+
+
+# ── Replay stand-in for KiteTicker ──────────────────────────────────────────
+def load_ticks(path: pathlib.Path) -> dict:
+    """
+    {"token", "price", "ts"} arrays from a recorded tick file: .npz with those
+    arrays, or JSONL of {"instrument_token", "last_price", "timestamp"} rows
+    (timestamp as epoch seconds or ISO string).
+    """
+    path = pathlib.Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as z:
+            return {k: z[k] for k in ("token", "price", "ts")}
+    rows = list(trade_journal.replay(path))
+    return {
+        "token": np.array([r["instrument_token"] for r in rows], dtype=np.int64),
+        "price": np.array([r["last_price"] for r in rows], dtype=float),
+        "ts":    np.array([_tick_time(r).timestamp() for r in rows], dtype=float),
+    }
+
+
+class ReplayTicker:
+    """
+    KiteTicker look-alike that plays back tick arrays: same callbacks
+    (on_connect / on_ticks / on_close), subscribe / set_mode, connect / stop.
+    `speed` – 1.0 replays in real time, 10 ten times faster, 0 as fast as
+    possible.  Ticks are delivered `batch` at a time, like KiteTicker frames.
+    """
+    MODE_LTP, MODE_QUOTE, MODE_FULL = "ltp", "quote", "full"
+
+    def __init__(self, ticks: dict, speed: float = 0.0, batch: int = 100):
+        self.ticks    = ticks
+        self.speed    = speed
+        self.batch    = batch
+        self.tokens   = set()
+        self.stopped  = threading.Event()
+        self.on_connect = self.on_ticks = self.on_close = None
+
+    def subscribe(self, tokens: list):
+        self.tokens.update(tokens)
+
+    def set_mode(self, mode: str, tokens: list):
+        pass
+
+    def stop(self):
+        self.stopped.set()
+
+    close = stop
+
+    def connect(self, threaded: bool = False):
+        if threaded:
+            threading.Thread(target=self._run, daemon=True).start()
+        else:
+            self._run()
+
+    def _run(self):
+        if self.on_connect:
+            self.on_connect(self, {})
+        token, price, ts = self.ticks["token"], self.ticks["price"], self.ticks["ts"]
+        if self.tokens:
+            keep  = np.isin(token, list(self.tokens))
+            token, price, ts = token[keep], price[keep], ts[keep]
+        start = time.perf_counter()
+        for lo in range(0, len(token), self.batch):
+            if self.stopped.is_set():
+                break
+            if self.speed:
+                wait = (ts[lo] - ts[0]) / self.speed - (time.perf_counter() - start)
+                if wait > 0:
+                    time.sleep(wait)
+            hi = lo + self.batch
+            frame = [{"instrument_token": int(k), "last_price": float(p), "timestamp": float(s)}
+                     for k, p, s in zip(token[lo:hi], price[lo:hi], ts[lo:hi])]
+            if self.on_ticks:
+                self.on_ticks(self, frame)
+        if self.on_close:
+            self.on_close(self, 1000, "replay finished")
+
+
+# ── Running ─────────────────────────────────────────────────────────────────
+def run(monitor: ExitMonitor, ticker, until: datetime = None):
+    """Subscribe the monitor's tokens on `ticker` and block until it stops."""
+    tokens = monitor.subscribed()
+
+    def on_connect(ws, response):
+        ws.subscribe(tokens)
+        ws.set_mode(ws.MODE_FULL, tokens)     # full mode carries exchange_timestamp
+        print(f"📡 Watching {len(monitor.trades)} trades on {len(tokens)} instruments")
+
+    ticker.on_connect = on_connect
+    ticker.on_ticks   = monitor.on_ticks
+    if until is not None:
+        delay = max((until - datetime.now(IST)).total_seconds(), 0)
+        if isinstance(ticker, ReplayTicker):
+            timer = threading.Timer(delay, ticker.stop)
+            timer.daemon = True
+            timer.start()
+        else:
+            # KiteTicker.stop() stops the twisted reactor – only safe from the reactor thread
+            from twisted.internet import reactor
+            reactor.callLater(delay, ticker.stop)
+    ticker.connect(threaded=False)
+
+
+def seed(monitor: ExitMonitor, kite):
+    """One batched LTP pass before streaming, so pre-open moves are not missed."""
+    import price_snapshot
+    keys   = {i: token_resolver.instrument_key(t["symbol"], t.get("type", "Cash"))
+              for i, t in monitor.trades.items()}
+    prices = price_snapshot.quote_keys(kite, sorted(set(keys.values())))
+    now    = datetime.now(IST)
+    monitor.on_ticks(None, [
+        {"instrument_token": monitor.tokens[i], "last_price": prices[k], "timestamp": now.timestamp()}
+        for i, k in keys.items() if k in prices
+    ])
+
+
+def report(closed: list):
+    """Dry-run on_exit: print the exits without journalling them."""
+    for t in closed:
+        print(f"🔔 {t['symbol']}: {t['status']} @ {t['trigger_price']} ({t['exit_ts']})")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Stream ticks and close trades on SL / target.")
+    ap.add_argument("--replay", help="tick file (.jsonl / .npz) instead of KiteTicker (dry run)")
+    ap.add_argument("--speed", type=float, default=0.0, help="replay speed (0 = as fast as possible)")
+    ap.add_argument("--until", default="15:25", help="stop at this IST time (live mode)")
+    args = ap.parse_args()
+
+    if args.replay:
+        monitor = ExitMonitor(load_open(), on_exit=report)
+        run(monitor, ReplayTicker(load_ticks(args.replay), speed=args.speed))
+        print(f"✅ Replay: {len(monitor.closed)} exits, {len(monitor.trades)} trades still open")
+        raise SystemExit(0)
+
+    import kite_patch  # noqa: F401
+    from kiteconnect import KiteTicker
+    from token_manager import refresh_if_needed
+    kite = refresh_if_needed()
+    token_resolver.set_kite(kite)
+
+    monitor = ExitMonitor(load_open())
+    if not monitor.trades:
+        print("ℹ️ No open trades to monitor")
+        raise SystemExit(0)
+    seed(monitor, kite)
+    if monitor.trades:
+        hh, mm = map(int, args.until.split(":"))
+        until  = datetime.now(IST).replace(hour=hh, minute=mm, second=0, microsecond=0)
+        run(monitor, KiteTicker(kite.api_key, kite.access_token), until)
+
+    monitor.mark()
+    trade_journal.export_legacy()
+    print(f"✅ {len(monitor.closed)} exits, {len(monitor.trades)} trades still open")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+feature_store.py – point-in-time ML features keyed by (symbol, entry_date).
+
+The engine records the exact vector `_compute_pop` scored at signal time
+(FEATURES order, the model's input order) in feature_store.jsonl – append-only,
+written under the same lock as the trade journal.  Trades that predate the
+store are backfilled in bulk from the bar store with no Kite calls:
+
+  • RSI / ADX / ATR / volume over the same trailing window the engine's
+    indicator snapshot uses, ending at the close *before* the entry date –
+    the engine scores at 10:15 IST on a still-forming bar, so the entry
+    day's completed bar would leak the rest of that session
+  • hist_pop counting only past entries whose HOLD_BARS window had closed
+    before the entry date
+
+so ml_optimize.py trains on what was knowable at signal time.
+
+CLI:
+  python feature_store.py backfill   add rows for every closed journal trade missing one
+"""
+
+import argparse
+import pathlib
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import indicators
+import pop_index
+import token_resolver
+import trade_journal
+from config import HOLD_BARS
+
+BASE         = pathlib.Path(__file__).parent
+FEATURE_FILE = BASE / "feature_store.jsonl"
+
+FEATURES    = ("rsi", "adx", "atr", "volume", "hist_pop")
+PERIOD      = 14
+WINDOW_DAYS = PERIOD * 3      # trailing window of utils.indicator_snapshot
+
+
+def vector(ind, hist_pop: float) -> list:
+    """Model input for one signal: an indicator-snapshot row + its hist_pop."""
+    return [float(ind["rsi"]), float(ind["adx"]), float(ind["atr"]),
+            int(ind["volume"] or 0), float(hist_pop)]
+
+
+def make_row(symbol: str, entry_date: str, values, source: str = "engine") -> dict:
+    return {
+        "ts":         datetime.now().isoformat(timespec="seconds"),
+        "symbol":     symbol,
+        "entry_date": entry_date,
+        "source":     source,
+        **dict(zip(FEATURES, values)),
+    }
+
+
+def entry_date(trade: dict) -> str:
+    return str(trade.get("entry_date") or trade.get("date") or "")[:10]
+
+
+# ── Store I/O ───────────────────────────────────────────────────────────────
+def record(rows: list, path: pathlib.Path = FEATURE_FILE):
+    trade_journal.append(rows, path)
+
+
+def record_trades(trades: list, path: pathlib.Path = FEATURE_FILE):
+    """Record the "features" the engine attached to each trade."""
+    record([make_row(t["symbol"], entry_date(t), [t["features"][f] for f in FEATURES])
+            for t in trades if t.get("features")], path)
+
+
+def load(path: pathlib.Path = FEATURE_FILE) -> pd.DataFrame:
+    """
+    One row per (symbol, entry_date), indexed by that pair; an engine-recorded
+    row wins over a backfilled one, otherwise the latest row wins.
+    """
+    df = pd.DataFrame(list(trade_journal.replay(path)))
+    if df.empty:
+        return pd.DataFrame(columns=list(FEATURES),
+                            index=pd.MultiIndex.from_tuples([], names=["symbol", "entry_date"]))
+    df["_engine"] = df["source"] == "engine"
+    df = (df.sort_values("_engine", kind="stable")
+            .drop_duplicates(["symbol", "entry_date"], keep="last")
+            .drop(columns="_engine"))
+    return df.set_index(["symbol", "entry_date"]).sort_index()
+
+
+# ── Point-in-time backfill from the bar store ───────────────────────────────
+def _levels(trade: dict):
+    entry = float(trade["entry"])
+    tgt   = float(trade.get("target", trade.get("Target")))
+    sl    = float(trade.get("sl", trade.get("SL")))
+    return (tgt - entry) / entry * 100, (entry - sl) / entry * 100
+
+
+def _pop_asof(mfe: np.ndarray, done: int, tgt_pct: float, sl_pct: float) -> float:
+    """pop_index.query restricted to the first `done` entries."""
+    col = mfe[:done, pop_index.level_for(sl_pct)]
+    col = col[~np.isnan(col)]
+    if len(col) < pop_index.MIN_ENTRIES:
+        return pop_index.default_pop()
+    return float((col >= tgt_pct).mean() * 100)
+
+
+def backfill(trades: list, store: bar_store.BarStore = None) -> list:
+    """Feature rows for `trades` as of the close before each entry date (trades without bars are skipped)."""
+    store  = store or bar_store.BarStore()
+    by_sym = defaultdict(list)
+    for t in trades:
+        by_sym[t["symbol"]].append(t)
+
+    windows, meta = {}, {}
+    for sym, group in by_sym.items():
+        token = token_resolver.resolve(sym)
+        df    = bar_store.to_frame(store.read(token, "day")) if token else None
+        if df is None or df.empty:
+            print(f"⚠️ No stored bars for {sym} – {len(group)} trade(s) not backfilled")
+            continue
+        days = df.index.normalize()
+        mfe  = pop_index.excursions(df["high"], df["low"], df["close"])
+        # an entry's outcome is known once its last window bar has printed
+        known = days[HOLD_BARS:HOLD_BARS + len(mfe)]
+
+        for t in group:
+            when = pd.Timestamp(entry_date(t))
+            end  = days.searchsorted(when, side="left")      # last bar: the prior session
+            if end == 0:
+                continue
+            start = days.searchsorted(when - pd.Timedelta(days=WINDOW_DAYS), side="right")
+            key   = f"{sym}|{entry_date(t)}"
+            windows[key] = df.iloc[start:end]
+            meta[key]    = _pop_asof(mfe, known.searchsorted(when, side="left"), *_levels(t))
+
+    if not windows:
+        return []
+    panel = indicators.build_panel(windows)
+    snap  = indicators.latest(panel, indicators.compute(panel, PERIOD))
+    snap[["rsi", "adx", "atr"]] = snap[["rsi", "adx", "atr"]].round(2)
+    return [make_row(*key.split("|"), vector(snap.loc[key], meta[key]), source="backfill")
+            for key in windows]
+
+
+def training_set(trades: list, path: pathlib.Path = FEATURE_FILE) -> pd.DataFrame:
+    """
+    `trades` joined with their point-in-time features.  Missing rows are
+    backfilled once and appended to the store; trades that still have no
+    features are dropped.
+    """
+    have    = load(path)
+    missing = [t for t in trades if (t["symbol"], entry_date(t)) not in have.index]
+    if missing:
+        rows = backfill(missing)
+        record(rows, path)
+        print(f"🧮 Backfilled features for {len(rows)}/{len(missing)} trades")
+        have = load(path)
+
+    df = pd.DataFrame(trades)
+    df["entry_date"] = [entry_date(t) for t in trades]
+    feats = have[list(FEATURES)].reset_index()
+    return df.drop(columns=list(FEATURES), errors="ignore") \
+             .merge(feats, on=["symbol", "entry_date"], how="inner")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain the point-in-time feature store.")
+    ap.add_argument("command", choices=["backfill"])
+    args = ap.parse_args()
+
+    closed = trade_journal.closed_trades()
+    n = len(training_set(closed))
+    print(f"✅ {n}/{len(closed)} closed trades have features in {FEATURE_FILE.name}")
@@ -0,0 +1,149 @@
+"""
+filter_pipeline.py – declarative candidate-filter pipeline with per-stage profiling.
+
+The engine describes its gates as Stages instead of one hand-ordered loop:
+
+  Stage("ict", fn, needs=("data",), cost=1e-4)
+
+  • per-item stages get one candidate dict and return keep/reject (they may
+    add fields to the dict for later stages)
+  • batch stages get the whole surviving list at once and return a keep mask,
+    so universe-wide work (vectorized thresholds, one predict_proba) runs once
+
+Every run records, per stage, the items seen / rejected and the wall time.
+The next run orders stages by cost per rejection – seconds per item divided
+by rejection rate – so cheap, selective gates run first and expensive ones
+only see the survivors; `needs` is always honoured by pulling a stage's
+dependencies in just before it.  Stages without history use their `cost`
+hint and an assumed 50 % rejection rate.
+"""
+
+import json
+import os
+import pathlib
+import time
+from datetime import datetime
+
+ASSUMED_REJECT_RATE = 0.5
+
+
+class Stage:
+    def __init__(self, name: str, fn, batch: bool = False, needs=(), cost: float = 1e-4):
+        """
+        `cost` – rough seconds per item, used until the stage has history.
+        """
+        self.name  = name
+        self.fn    = fn
+        self.batch = batch
+        self.needs = tuple(needs)
+        self.cost  = cost
+
+
+class Pipeline:
+    def __init__(self, stages: list, history: dict = None):
+        """
+        `history` – {stage name: {"per_item_s", "reject_rate"}} from the last
+        run's profile (see load_history).
+        """
+        self.stages  = {s.name: s for s in stages}
+        self.history = history or {}
+        self.stats   = {}
+        self.seconds = 0.0
+
+    # -- ordering ---------------------------------------------------------------
+    def score(self, stage: Stage) -> float:
+        """Expected seconds spent per rejected item (lower runs earlier)."""
+        h        = self.history.get(stage.name, {})
+        per_item = h.get("per_item_s", stage.cost)
+        rate     = h.get("reject_rate", ASSUMED_REJECT_RATE)
+        return per_item / rate if rate > 0 else float("inf")
+
+    def order(self) -> list:
+        declared = list(self.stages)
+        ranked   = sorted(declared, key=lambda n: (self.score(self.stages[n]), declared.index(n)))
+        out, seen = [], set()
+
+        def visit(name, path=()):
+            if name in seen:
+                return
+            if name in path:
+                raise ValueError(f"Stage dependency cycle: {' → '.join(path + (name,))}")
+            for dep in self.stages[name].needs:
+                visit(dep, path + (name,))
+            seen.add(name)
+            out.append(self.stages[name])
+
+        for name in ranked:
+            visit(name)
+        return out
+
+    # -- execution ----------------------------------------------------------------
+    def run(self, items: list) -> list:
+        """Survivors of every stage, in input order."""
+        start = time.perf_counter()
+        for stage in self.order():
+            seen = len(items)
+            t0   = time.perf_counter()
+            if not items:
+                keep = []
+            elif stage.batch:
+                keep = list(stage.fn(items))
+            else:
+                keep = [bool(stage.fn(item)) for item in items]
+            secs  = time.perf_counter() - t0
+            items = [item for item, ok in zip(items, keep) if ok]
+            self.stats[stage.name] = {
+                "in":       seen,
+                "out":      len(items),
+                "seconds":  secs,
+            }
+        self.seconds = time.perf_counter() - start
+        return items
+
+    def profile(self) -> dict:
+        stages = []
+        for stage in self.order():
+            st = self.stats.get(stage.name)
+            if st is None:
+                continue
+            rejected = st["in"] - st["out"]
+            rate     = rejected / st["in"] if st["in"] else 0.0
+            per_item = st["seconds"] / st["in"] if st["in"] else stage.cost
+            stages.append({
+                "name":        stage.name,
+                "batch":       stage.batch,
+                "in":          st["in"],
+                "out":         st["out"],
+                "rejected":    rejected,
+                "reject_rate": round(rate, 4),
+                "seconds":     round(st["seconds"], 6),
+                "per_item_s":  per_item,
+                "cost_per_rejection_s": per_item / rate if rate else None,
+            })
+        return {
+            "run_at":        datetime.now().isoformat(timespec="seconds"),
+            "order":         [s["name"] for s in stages],
+            "total_seconds": round(self.seconds, 6),
+            "stages":        stages,
+        }
+
+
+# ── Profile persistence ─────────────────────────────────────────────────────
+def load_history(path: pathlib.Path) -> dict:
+    """Per-stage stats from a previous profile file ({} if absent/unreadable)."""
+    try:
+        profile = json.loads(pathlib.Path(path).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {
+        s["name"]: {"per_item_s": s["per_item_s"], "reject_rate": s["reject_rate"]}
+        for s in profile.get("stages", []) if s.get("in")
+    }
+
+
+def write_profile(profile: dict, path: pathlib.Path):
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(profile, indent=2))
+    os.replace(tmp, path)
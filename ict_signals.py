@@ -1,59 +1,176 @@
 # ict_signals.py
+"""
+ICT price-action detectors over whole bar arrays.
+
+Every detector takes (symbols × bars) high / low / close arrays – a panel from
+indicators.build_panel, right-aligned and NaN-padded – and evaluates one
+window of the most recent bars for all symbols at once with shifted
+comparisons and boolean masks.  Zone detectors return (mask, top, bottom)
+arrays over that window; `zones()` turns them into per-symbol lists.
+
+The symbol-level detect_* helpers keep their old signatures for callers like
+alert_trades.py, but take an already-fetched frame (`df=`) instead of calling
+fetch_ohlc again.  `python scripts/bench_ict.py` checks them against the old
+iloc loops and times both.
+"""
 
-import pandas as pd
 import numpy as np
-from datetime import timedelta
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import indicators
+
+# Bars back a sweep must reach (swing high/low) and how recent it must be
+GRAB_LOOKBACK = 20
+GRAB_RECENT   = 5
+
+
+# ── Array helpers ───────────────────────────────────────────────────────────
+def _window(a: np.ndarray, n: int) -> np.ndarray:
+    return a[:, -n:] if n < a.shape[1] else a
+
+
+def _age(a: np.ndarray) -> np.ndarray:
+    """Position of each bar counted from the symbol's first real bar in `a` (-1 on padding)."""
+    valid = ~np.isnan(a)
+    return np.where(valid, np.cumsum(valid, axis=1) - 1, -1)
+
+
+def _prev(a: np.ndarray, k: int = 1) -> np.ndarray:
+    out = np.full_like(a, np.nan)
+    out[:, k:] = a[:, :-k]
+    return out
+
+
+def _next(a: np.ndarray) -> np.ndarray:
+    out = np.full_like(a, np.nan)
+    out[:, :-1] = a[:, 1:]
+    return out
+
+
+def _rolling(a: np.ndarray, n: int, reduce) -> np.ndarray:
+    """reduce() over each trailing n-bar window (NaN until n bars exist)."""
+    out = np.full_like(a, np.nan)
+    if a.shape[1] >= n:
+        out[:, n - 1:] = reduce(sliding_window_view(a, n, axis=1), axis=-1)
+    return out
+
+
+# ── Zone detectors ──────────────────────────────────────────────────────────
+def fvg_zones(high: np.ndarray, low: np.ndarray, lookback: int = 5):
+    """
+    3-bar gaps in the last lookback+2 bars: bar i's low > bar i-1's high AND
+    bar i+1's high < bar i-1's low.  Zone = (high, low) of bar i-1.
+    """
+    h, l    = _window(high, lookback + 2), _window(low, lookback + 2)
+    ph, pl  = _prev(h), _prev(l)
+    with np.errstate(invalid="ignore"):
+        mask = (l > ph) & (_next(h) < pl)
+    mask &= (~np.isnan(h)).sum(axis=1, keepdims=True) >= 3
+    return mask, ph, pl
+
 
-def detect_fvg(symbol: str, lookback: int = 5) -> list[tuple]:
+def order_block_zones(high: np.ndarray, low: np.ndarray, lookback: int = 20):
+    """
+    Inside bars in the last `lookback` bars (high below and low above the
+    previous bar's), skipping each symbol's first two bars.  Zone = the
+    inside bar's (high, low).
+    """
+    h, l = _window(high, lookback), _window(low, lookback)
+    with np.errstate(invalid="ignore"):
+        mask = (h < _prev(h)) & (l > _prev(l))
+    mask &= _age(h) >= 2
+    mask &= (~np.isnan(h)).sum(axis=1, keepdims=True) >= 5
+    return mask, h, l
+
+
+def zones(symbols: list, mask: np.ndarray, top: np.ndarray, bottom: np.ndarray) -> dict:
+    """{symbol: [(top, bottom), ...]} in bar order."""
+    out = {sym: [] for sym in symbols}
+    for s, i in zip(*np.nonzero(mask)):
+        out[symbols[s]].append((float(top[s, i]), float(bottom[s, i])))
+    return out
+
+
+# ── Structure / liquidity ───────────────────────────────────────────────────
+def structure_shift(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """
+    Per bar: +1 when high and low both rise vs. the previous bar, -1 when both
+    fall, 0 otherwise.  The last column is the current structure.
+    """
+    ph, pl = _prev(high), _prev(low)
+    with np.errstate(invalid="ignore"):
+        up   = (high > ph) & (low > pl)
+        down = (high < ph) & (low < pl)
+    return up.astype(np.int8) - down.astype(np.int8)
+
+
+def liquidity_grab(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                   lookback: int = GRAB_LOOKBACK) -> np.ndarray:
+    """
+    Per bar: +1 for a bullish grab (low sweeps below the prior `lookback`-bar
+    swing low, close recovers above it), -1 for a bearish grab (high sweeps
+    above the prior swing high, close falls back below), 0 otherwise.
+    """
+    swing_low  = _prev(_rolling(low, lookback, np.min))
+    swing_high = _prev(_rolling(high, lookback, np.max))
+    with np.errstate(invalid="ignore"):
+        bull = (low < swing_low) & (close > swing_low)
+        bear = (high > swing_high) & (close < swing_high)
+    return bull.astype(np.int8) - bear.astype(np.int8)
+
+
+def bullish_liquidity(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      lookback: int = GRAB_LOOKBACK, recent: int = GRAB_RECENT) -> np.ndarray:
+    """
+    Per symbol: a bullish liquidity grab within the last `recent` bars, or a
+    bullish structure shift on the latest bar.
+    """
+    if high.shape[1] == 0:
+        return np.zeros(high.shape[0], dtype=bool)
+    grabbed = (_window(liquidity_grab(high, low, close, lookback), recent) > 0).any(axis=1)
+    return grabbed | (structure_shift(high, low)[:, -1] > 0)
+
+
+# ── Symbol-level helpers (pre-fetched frame) ────────────────────────────────
+def _frame(symbol: str, df: pd.DataFrame, days: int) -> pd.DataFrame:
+    if df is None:
+        from utils import fetch_ohlc
+        df = fetch_ohlc(symbol, days=days)
+    return df
+
+
+def detect_fvg(symbol: str, lookback: int = 5, df: pd.DataFrame = None) -> list[tuple]:
     """
     Returns list of (start_price, end_price) gaps where
     today's low > yesterday's high AND tomorrow's high < yesterday's low.
     Simplest 3-bar gap.
     """
-    from utils import fetch_ohlc
-    df = fetch_ohlc(symbol, days=lookback+2)
-    if df is None or len(df)<3: return []
+    df = _frame(symbol, df, lookback + 2)
+    if df is None or df.empty:
+        return []
+    p = indicators.build_panel({symbol: df})
+    return zones([symbol], *fvg_zones(p["high"], p["low"], lookback))[symbol]
 
-    gaps = []
-    for i in range(1, len(df)-1):
-        prev, curr, nxt = df.iloc[i-1], df.iloc[i], df.iloc[i+1]
-        if curr["low"] > prev["high"] and nxt["high"] < prev["low"]:
-            gaps.append((prev["high"], prev["low"]))
-    return gaps
 
-def detect_order_blocks(symbol: str, lookback: int = 20) -> list[tuple]:
+def detect_order_blocks(symbol: str, lookback: int = 20, df: pd.DataFrame = None) -> list[tuple]:
     """
-    Returns list of bullish/bearish order‑block zones. 
-    E.g., look for inside bars after trending move.
+    Returns list of bullish/bearish order‑block zones (inside bars).
     """
-    from utils import fetch_ohlc
-    df = fetch_ohlc(symbol, days=lookback)
-    if df is None or len(df)<5: return []
+    df = _frame(symbol, df, lookback)
+    if df is None or df.empty:
+        return []
+    p = indicators.build_panel({symbol: df})
+    return zones([symbol], *order_block_zones(p["high"], p["low"], lookback))[symbol]
 
-    blocks = []
-    # naive: any inside bar
-    for i in range(2, len(df)):
-        if (df["high"].iloc[i] < df["high"].iloc[i-1] and 
-            df["low"].iloc[i]  > df["low"].iloc[i-1]):
-            # inside bar found
-            blocks.append((df["high"].iloc[i], df["low"].iloc[i]))
-    return blocks
 
-def detect_structure_shift(symbol: str, lookback: int = 30) -> bool:
+def detect_structure_shift(symbol: str, lookback: int = 30, df: pd.DataFrame = None) -> bool:
     """
     Returns True if market structure flips (HH → LL or LL → HH)
-    in the last lookback days.
-    """
-    from utils import fetch_ohlc
-    df = fetch_ohlc(symbol, days=lookback)
-    if df is None or len(df)<3: return False
-
-    highs = df["high"]
-    lows  = df["low"]
-    # is last high < prior high AND last low < prior low → bearish shift
-    if highs.iloc[-1] < highs.iloc[-2] and lows.iloc[-1] < lows.iloc[-2]:
-        return True
-    # bullish shift
-    if highs.iloc[-1] > highs.iloc[-2] and lows.iloc[-1] > lows.iloc[-2]:
-        return True
-    return False
+    on the latest bar.
+    """
+    df = _frame(symbol, df, lookback)
+    if df is None or len(df) < 3:
+        return False
+    p = indicators.build_panel({symbol: df})
+    return bool(structure_shift(p["high"], p["low"])[0, -1])
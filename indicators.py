@@ -0,0 +1,165 @@
+"""
+indicators.py – vectorized indicator engine over a (symbols × bars) panel.
+
+A panel is a dict of 2-D float arrays (one row per symbol) for open / high /
+low / close / volume, right-aligned on the latest bar and NaN-padded on the
+left for symbols with shorter history.  `compute()` returns every indicator
+the engine and ml_optimize.py use in one pass, with True Range computed once
+and shared by ATR and ADX.  The formulas match the original per-symbol pandas
+code in utils (SMA-smoothed RSI/ATR, adjust=True EWM for DI/ADX); see
+tests/test_indicators.py.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# ── Panel construction ─────────────────────────────────────────────────────
+def build_panel(frames: dict) -> dict:
+    """
+    {symbol: OHLCV DataFrame} → panel dict with "symbols" plus one
+    (n_symbols × n_bars) array per OHLCV field.
+    """
+    symbols = list(frames)
+    n_bars  = max((len(df) for df in frames.values()), default=0)
+    panel   = {"symbols": symbols}
+    for field in FIELDS:
+        arr = np.full((len(symbols), n_bars), np.nan)
+        for i, df in enumerate(frames.values()):
+            if len(df):
+                arr[i, n_bars - len(df):] = df[field].to_numpy(dtype=float)
+        panel[field] = arr
+    return panel
+
+
+# ── Array helpers ───────────────────────────────────────────────────────────
+def _shift(a: np.ndarray, k: int = 1) -> np.ndarray:
+    out = np.full_like(a, np.nan)
+    if a.shape[1] > k:
+        out[:, k:] = a[:, :-k]
+    return out
+
+
+def _rolling_mean(a: np.ndarray, n: int) -> np.ndarray:
+    """rolling(window=n, min_periods=n).mean() along bars – any NaN in the window → NaN."""
+    out = np.full_like(a, np.nan)
+    if a.shape[1] >= n:
+        out[:, n - 1:] = sliding_window_view(a, n, axis=1).mean(axis=-1)
+    return out
+
+
+def _rolling_sum(a: np.ndarray, n: int) -> np.ndarray:
+    out = np.full_like(a, np.nan)
+    if a.shape[1] >= n:
+        out[:, n - 1:] = sliding_window_view(a, n, axis=1).sum(axis=-1)
+    return out
+
+
+def forward_windows(a: np.ndarray, hold: int) -> np.ndarray:
+    """
+    (symbols × bars × hold) view where [s, i, k] is bar i+1+k – the bars
+    *after* an entry at bar i.  Windows running past the last bar are NaN-padded.
+    """
+    padded = np.concatenate([a[:, 1:], np.full((a.shape[0], hold), np.nan)], axis=1)
+    return sliding_window_view(padded, hold, axis=1)[:, :a.shape[1]]
+
+
+def first_true(mask: np.ndarray) -> np.ndarray:
+    """Index of the first True along the last axis (mask.shape[-1] when none)."""
+    hit = mask.any(axis=-1)
+    return np.where(hit, mask.argmax(axis=-1), mask.shape[-1])
+
+
+def _ewm_mean(a: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    pandas .ewm(alpha=alpha).mean() (adjust=True, ignore_na=False) along bars,
+    as the ratio of two first-order IIR filters over values and weights.
+    """
+    from scipy.signal import lfilter   # heavy import – only when indicators are computed
+
+    valid = ~np.isnan(a)
+    den   = [1.0, -(1.0 - alpha)]
+    num   = lfilter([1.0], den, np.where(valid, a, 0.0), axis=1)
+    wts   = lfilter([1.0], den, valid.astype(float), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = num / wts
+    out[wts == 0] = np.nan
+    return out
+
+
+# ── Indicators ──────────────────────────────────────────────────────────────
+def true_range(panel: dict) -> np.ndarray:
+    h, l, c = panel["high"], panel["low"], panel["close"]
+    prev_c  = _shift(c)
+    # fmax skips NaN, so the first bar falls back to high-low like pandas' max(axis=1)
+    return np.fmax(np.fmax(h - l, np.abs(h - prev_c)), np.abs(l - prev_c))
+
+
+def compute(panel: dict, period: int = 14) -> dict:
+    """
+    All indicators for every symbol in one pass.  Returns a dict of
+    (n_symbols × n_bars) arrays: tr, atr, rsi, plus_di, minus_di, adx, obv, vwap.
+    """
+    h, l, c, v = panel["high"], panel["low"], panel["close"], panel["volume"]
+    pad    = np.isnan(c)
+    prev_c = _shift(c)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # True Range → ATR (shared with ADX below)
+        tr  = true_range(panel)
+        atr = _rolling_mean(tr, period)
+
+        # RSI (simple-average gains/losses)
+        delta    = c - prev_c
+        avg_gain = _rolling_mean(np.clip(delta, 0, None), period)
+        avg_loss = _rolling_mean(-np.clip(delta, None, 0), period)
+        rsi      = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        # ADX
+        up_move   = h - _shift(h)
+        down_move = _shift(l) - l
+        plus_dm   = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm  = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+        plus_dm[pad]  = np.nan
+        minus_dm[pad] = np.nan
+        alpha    = 1 / period
+        plus_di  = 100 * (_ewm_mean(plus_dm, alpha) / atr)
+        minus_di = 100 * (_ewm_mean(minus_dm, alpha) / atr)
+        dx       = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx      = _ewm_mean(dx, alpha)
+
+        # OBV (signed volume, cumulative from each symbol's first bar)
+        signed = np.where(np.isnan(delta), 0.0, np.sign(delta) * v)
+        obv    = np.cumsum(signed, axis=1)
+        obv[pad] = np.nan
+
+        # Rolling VWAP of the typical price over `period` bars
+        tp   = (h + l + c) / 3
+        vwap = _rolling_sum(tp * v, period) / _rolling_sum(v, period)
+
+    return {
+        "tr":       tr,
+        "atr":      atr,
+        "rsi":      rsi,
+        "plus_di":  plus_di,
+        "minus_di": minus_di,
+        "adx":      adx,
+        "obv":      obv,
+        "vwap":     vwap,
+    }
+
+
+def latest(panel: dict, ind: dict) -> pd.DataFrame:
+    """
+    Last-bar snapshot: DataFrame indexed by symbol with close, volume and
+    every indicator from `compute()`.
+    """
+    cols = {"close": panel["close"], "volume": panel["volume"], **ind}
+    if panel["close"].shape[1] == 0:
+        return pd.DataFrame({k: np.full(len(panel["symbols"]), np.nan) for k in cols},
+                            index=pd.Index(panel["symbols"], name="symbol"))
+    return pd.DataFrame({k: a[:, -1] for k, a in cols.items()},
+                        index=pd.Index(panel["symbols"], name="symbol"))
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+instrument_master.py – daily cached instrument dump with indexed lookups.
+
+kite.instruments(exchange) is downloaded at most once per day and stored as
+one compact columnar file per exchange (data/instruments/<EXCHANGE>.npz):
+token, tradingsymbol, name, expiry, strike, instrument type, lot / tick size.
+Rows are saved sorted by (name, type, expiry, strike), so on load the only
+index to build is the (name, type) → row-slice map; within a slice expiries
+and then strikes are sorted and every lookup is a searchsorted:
+
+  nearest_expiry(name, kind)             O(log n)
+  strikes(name, kind, expiry)            O(log n) – sorted strike / token views
+  atm_strike(name, spot, expiry)         O(log n)
+  strike_range(name, lo, hi, kind, …)    O(log n)
+  future(name, expiry) / option(…)       O(log n)
+  token(tradingsymbol)                   O(1)
+
+This replaces future_tokens.json / option_ce.json / option_pe.json, which
+pinned a single hand-picked expiry.  Without a client and without a file the
+lookups return None (a stale file is used with a warning).
+
+Environment:
+  SNIPER_INSTRUMENTS   master directory (default data/instruments)
+
+CLI:
+  python instrument_master.py refresh [--exchange NFO NSE]   download today's dump
+  python instrument_master.py show SYMBOL [--spot PRICE]     print the option chain summary
+"""
+
+import argparse
+import os
+import pathlib
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+BASE       = pathlib.Path(__file__).parent
+MASTER_DIR = pathlib.Path(os.getenv("SNIPER_INSTRUMENTS", BASE / "data" / "instruments"))
+
+COLUMNS = ("token", "tradingsymbol", "name", "expiry", "strike", "itype", "lot_size", "tick_size")
+
+# Global Kite Connect client placeholder (only needed to download)
+_kite = None
+
+
+def set_kite(kite_client):
+    global _kite
+    _kite = kite_client
+
+
+def _day(d) -> np.datetime64:
+    return np.datetime64(d if d is not None else date.today(), "D")
+
+
+def _iso(d: np.datetime64):
+    return None if np.isnat(d) else str(d)
+
+
+# ── Building ────────────────────────────────────────────────────────────────
+def build(rows: list) -> dict:
+    """Columns for a kite.instruments() dump, sorted by (name, type, expiry, strike)."""
+    cols = {
+        "token":         np.array([r["instrument_token"] for r in rows], dtype=np.int64),
+        "tradingsymbol": np.array([r["tradingsymbol"] for r in rows], dtype="S"),
+        "name":          np.array([r.get("name") or "" for r in rows], dtype="S"),
+        "expiry":        np.array([r.get("expiry") or "NaT" for r in rows], dtype="datetime64[D]"),
+        "strike":        np.array([r.get("strike") or 0 for r in rows], dtype=np.float64),
+        "itype":         np.array([r.get("instrument_type") or "" for r in rows], dtype="S"),
+        "lot_size":      np.array([r.get("lot_size") or 0 for r in rows], dtype=np.int32),
+        "tick_size":     np.array([r.get("tick_size") or 0 for r in rows], dtype=np.float32),
+    }
+    order = np.lexsort((cols["strike"], cols["expiry"], cols["itype"], cols["name"]))
+    return {k: v[order] for k, v in cols.items()}
+
+
+def _path(exchange: str, root: pathlib.Path) -> pathlib.Path:
+    return root / f"{exchange}.npz"
+
+
+def save(cols: dict, exchange: str, root: pathlib.Path = MASTER_DIR, as_of: date = None):
+    root.mkdir(parents=True, exist_ok=True)
+    path = _path(exchange, root)
+    tmp  = path.with_suffix(".tmp.npz")
+    np.savez_compressed(tmp, as_of=_day(as_of), **cols)
+    os.replace(tmp, path)
+
+
+def download(kite, exchange: str, root: pathlib.Path = MASTER_DIR) -> "InstrumentMaster":
+    rows = kite.instruments(exchange)
+    cols = build(rows)
+    save(cols, exchange, root)
+    print(f"🔄 Instrument master: {len(rows)} {exchange} instruments saved")
+    return InstrumentMaster(cols, _day(None))
+
+
+# ── Lookups ─────────────────────────────────────────────────────────────────
+class InstrumentMaster:
+    def __init__(self, cols: dict, as_of: np.datetime64):
+        self.cols  = cols
+        self.as_of = as_of
+        self._by_symbol = None
+        # (name, type) → [lo, hi) row slice
+        name, itype = cols["name"], cols["itype"]
+        start = np.flatnonzero(np.r_[True, (name[1:] != name[:-1]) | (itype[1:] != itype[:-1])])
+        stop  = np.r_[start[1:], len(name)]
+        self.groups = {(name[a].decode(), itype[a].decode()): (int(a), int(b))
+                       for a, b in zip(start, stop)}
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "InstrumentMaster":
+        with np.load(path) as z:
+            return cls({k: z[k] for k in COLUMNS}, z["as_of"][()])
+
+    def __len__(self):
+        return len(self.cols["token"])
+
+    # -- expiries -------------------------------------------------------------------
+    def expiries(self, name: str, kind: str = "FUT") -> list:
+        lo, hi = self.groups.get((name, kind), (0, 0))
+        return [_iso(d) for d in np.unique(self.cols["expiry"][lo:hi])]
+
+    def nearest_expiry(self, name: str, kind: str = "FUT", on=None):
+        """First expiry on or after `on` (default today) as "YYYY-MM-DD", or None."""
+        lo, hi = self.groups.get((name, kind), (0, 0))
+        i = lo + int(np.searchsorted(self.cols["expiry"][lo:hi], _day(on)))
+        return _iso(self.cols["expiry"][i]) if i < hi else None
+
+    def _expiry_slice(self, name: str, kind: str, expiry=None):
+        expiry = expiry or self.nearest_expiry(name, kind)
+        if expiry is None:
+            return 0, 0
+        lo, hi = self.groups.get((name, kind), (0, 0))
+        exp    = self.cols["expiry"][lo:hi]
+        d      = _day(expiry)
+        return lo + int(np.searchsorted(exp, d, "left")), lo + int(np.searchsorted(exp, d, "right"))
+
+    # -- strikes --------------------------------------------------------------------
+    def strikes(self, name: str, kind: str, expiry=None):
+        """
+        (strikes, tokens, tradingsymbols) for one option side, strikes
+        ascending – views into the master.  Nearest expiry unless given.
+        """
+        a, b = self._expiry_slice(name, kind, expiry)
+        c    = self.cols
+        return c["strike"][a:b], c["token"][a:b], c["tradingsymbol"][a:b]
+
+    def strike_range(self, name: str, low: float, high: float, kind: str, expiry=None):
+        """strikes() restricted to low ≤ strike ≤ high."""
+        strikes, tokens, symbols = self.strikes(name, kind, expiry)
+        i, j = np.searchsorted(strikes, low, "left"), np.searchsorted(strikes, high, "right")
+        return strikes[i:j], tokens[i:j], symbols[i:j]
+
+    def atm_strike(self, name: str, spot: float, expiry=None, kind: str = "CE"):
+        """Listed strike closest to `spot` (None without a chain)."""
+        strikes = self.strikes(name, kind, expiry)[0]
+        if not len(strikes):
+            return None
+        i = int(np.clip(np.searchsorted(strikes, spot), 1, len(strikes) - 1))
+        return float(strikes[i - 1] if spot - strikes[i - 1] <= strikes[i] - spot else strikes[i])
+
+    # -- single tokens ----------------------------------------------------------------
+    def future(self, name: str, expiry=None):
+        a, b = self._expiry_slice(name, "FUT", expiry)
+        return int(self.cols["token"][a]) if b > a else None
+
+    def option(self, name: str, strike: float, kind: str, expiry=None):
+        strikes, tokens, _ = self.strikes(name, kind, expiry)
+        i = int(np.searchsorted(strikes, float(strike)))
+        return int(tokens[i]) if i < len(strikes) and strikes[i] == float(strike) else None
+
+    def token(self, tradingsymbol: str):
+        if self._by_symbol is None:
+            self._by_symbol = dict(zip(self.cols["tradingsymbol"].tolist(), self.cols["token"].tolist()))
+        return self._by_symbol.get(tradingsymbol.encode())
+
+
+# ── Process-wide access ─────────────────────────────────────────────────────
+_masters = {}
+_lock    = threading.Lock()
+
+
+def get(exchange: str = "NFO", root: pathlib.Path = MASTER_DIR):
+    """
+    Today's master for `exchange`: loaded from disk if it is from today,
+    otherwise downloaded once (when a client is set), otherwise the stale
+    file.  None when neither exists.  Cached per process.
+    """
+    with _lock:
+        if exchange in _masters:
+            return _masters[exchange]
+        path, master = _path(exchange, root), None
+        if path.exists():
+            master = InstrumentMaster.load(path)
+        if (master is None or master.as_of < _day(None)) and _kite is not None:
+            try:
+                master = download(_kite, exchange, root)
+            except Exception as e:
+                print(f"❌ instruments({exchange}) download failed: {e}")
+        if master is not None and master.as_of < _day(None):
+            print(f"⚠️ Using {exchange} instrument master from {master.as_of}")
+        _masters[exchange] = master
+        return master
+
+
+def refresh(exchanges=("NFO", "NSE"), root: pathlib.Path = MASTER_DIR):
+    """Force today's download for every exchange (needs set_kite)."""
+    with _lock:
+        for ex in exchanges:
+            _masters[ex] = download(_kite, ex, root)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain / inspect the instrument master.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("refresh")
+    r.add_argument("--exchange", nargs="+", default=["NFO", "NSE"])
+    s = sub.add_parser("show")
+    s.add_argument("symbol")
+    s.add_argument("--spot", type=float)
+    args = ap.parse_args()
+
+    if args.command == "refresh":
+        from token_manager import refresh_if_needed
+        set_kite(refresh_if_needed())
+        refresh(args.exchange)
+    else:
+        t0 = time.perf_counter()
+        m  = get("NFO")
+        if m is None:
+            raise SystemExit("❌ No NFO instrument master – run `python instrument_master.py refresh`")
+        print(f"📂 {len(m)} NFO instruments as of {m.as_of}, loaded in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+        exp = m.nearest_expiry(args.symbol, "CE")
+        print(f"   future {m.future(args.symbol)} · option expiries {m.expiries(args.symbol, 'CE')}")
+        strikes = m.strikes(args.symbol, "CE", exp)[0]
+        if len(strikes):
+            print(f"   {exp}: {len(strikes)} CE strikes {strikes[0]:g} … {strikes[-1]:g}")
+        if args.spot:
+            print(f"   ATM for {args.spot:g}: {m.atm_strike(args.symbol, args.spot, exp)}")
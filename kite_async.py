@@ -0,0 +1,174 @@
+"""
+kite_async.py – asyncio Kite Connect client over one pooled keep-alive session.
+
+AsyncKite exposes the market-data calls the pipeline makes – historical_data,
+ltp, quote, instruments – as coroutines on a shared aiohttp session, so many
+requests can be in flight at once.  Each call waits on the same
+rate_limiter bucket as the kite_patch-wrapped KiteConnect (gate_async), and
+responses are parsed with KiteConnect's own formatters, so the shapes are
+identical to the synchronous client's.
+
+SyncKite is the adapter for existing code: it runs an AsyncKite on a
+background event loop and exposes blocking methods with KiteConnect's
+signatures.  Calls from many threads (utils.prefetch_bars' pool) overlap on
+that loop instead of queueing on one requests session; anything else
+(profile, orders, …) is delegated to the wrapped KiteConnect.
+
+    kite = SyncKite(refresh_if_needed())
+    utils.set_kite(kite)
+"""
+
+import asyncio
+import atexit
+import threading
+from datetime import datetime
+from urllib.parse import urljoin
+
+import aiohttp
+from kiteconnect import KiteConnect, exceptions
+
+from rate_limiter import gate_async
+
+# Keep-alive connections shared by every request
+POOL_SIZE = 16
+TIMEOUT   = 7          # seconds, KiteConnect's default
+
+_DATE_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def _date(d) -> str:
+    return d.strftime(_DATE_FMT) if isinstance(d, datetime) else str(d)
+
+
+def _instruments(args) -> list:
+    # like KiteConnect: ltp("NSE:A", "NSE:B") or ltp(["NSE:A", "NSE:B"])
+    return list(args[0]) if args and isinstance(args[0], (list, tuple)) else list(args)
+
+
+class AsyncKite:
+    def __init__(self, api_key: str, access_token: str, root: str = None,
+                 pool_size: int = POOL_SIZE, timeout: float = TIMEOUT):
+        self.api_key      = api_key
+        self.access_token = access_token
+        self.root         = root or KiteConnect._default_root_uri
+        self.pool_size    = pool_size
+        self.timeout      = timeout
+        self._session     = None
+        # parsing only – never sends a request
+        self._fmt         = KiteConnect(api_key)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _headers(self) -> dict:
+        return {
+            "X-Kite-Version": KiteConnect.kite_header_version,
+            "User-Agent":     self._fmt._user_agent(),
+            "Authorization":  f"token {self.api_key}:{self.access_token}",
+        }
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self._headers(),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _get(self, route: str, endpoint: str = None, url_args: dict = None, params=None):
+        """GET a Kite route; `endpoint` is the rate_limiter bucket to wait on."""
+        if endpoint:
+            await gate_async(endpoint)
+        uri = KiteConnect._routes[route].format(**(url_args or {}))
+        session = await self.session()
+        async with session.get(urljoin(self.root, uri), params=params) as r:
+            ctype = r.headers.get("content-type", "")
+            if "json" in ctype:
+                data = await r.json(content_type=None)
+                if data.get("status") == "error" or data.get("error_type"):
+                    exc = getattr(exceptions, data.get("error_type") or "", exceptions.GeneralException)
+                    raise exc(data.get("message"), code=r.status)
+                return data["data"]
+            if "csv" in ctype:
+                return await r.read()
+            raise exceptions.DataException(f"Unknown Content-Type ({ctype}) with response: ({await r.text()})")
+
+    # -- market data ----------------------------------------------------------------
+    async def historical_data(self, instrument_token, from_date, to_date, interval,
+                              continuous: bool = False, oi: bool = False) -> list:
+        data = await self._get(
+            "market.historical", "historical",
+            url_args={"instrument_token": instrument_token, "interval": interval},
+            params={"from": _date(from_date), "to": _date(to_date), "interval": interval,
+                    "continuous": int(bool(continuous)), "oi": int(bool(oi))},
+        )
+        return self._fmt._format_historical(data)
+
+    async def ltp(self, *instruments) -> dict:
+        return await self._get("market.quote.ltp", "quote",
+                               params=[("i", i) for i in _instruments(instruments)])
+
+    async def quote(self, *instruments) -> dict:
+        data = await self._get("market.quote", "quote",
+                               params=[("i", i) for i in _instruments(instruments)])
+        return {key: self._fmt._format_response(data[key]) for key in data}
+
+    async def instruments(self, exchange: str = None) -> list:
+        if exchange:
+            data = await self._get("market.instruments", url_args={"exchange": exchange})
+        else:
+            data = await self._get("market.instruments.all")
+        return self._fmt._parse_instruments(data)
+
+
+# ── Sync adapter ────────────────────────────────────────────────────────────
+class SyncKite:
+    """
+    Blocking KiteConnect look-alike backed by an AsyncKite on its own event
+    loop thread.  Safe to call from many threads at once.
+    """
+
+    def __init__(self, kite: KiteConnect, pool_size: int = POOL_SIZE):
+        self.kite  = kite
+        self.aio   = AsyncKite(kite.api_key, kite.access_token, kite.root, pool_size)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="kite-async", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def run(self, coro):
+        """Run a coroutine on the client's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def historical_data(self, *args, **kwargs) -> list:
+        return self.run(self.aio.historical_data(*args, **kwargs))
+
+    def ltp(self, *instruments) -> dict:
+        return self.run(self.aio.ltp(*instruments))
+
+    def quote(self, *instruments) -> dict:
+        return self.run(self.aio.quote(*instruments))
+
+    def instruments(self, exchange: str = None) -> list:
+        return self.run(self.aio.instruments(exchange))
+
+    def close(self):
+        """Close the HTTP session and stop the loop thread (idempotent)."""
+        if self._loop.is_closed():
+            return
+        self.run(self.aio.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __getattr__(self, name):
+        # profile(), orders, api_key, access_token … come from the wrapped client
+        return getattr(self.kite, name)
@@ -5,16 +5,20 @@ Import *once* before you create the KiteConnect object.
 
 from functools import wraps
 from kiteconnect import KiteConnect
-from rate_limiter import gate   # already exists
+from rate_limiter import gate   # token buckets per endpoint class
 
-def _rl(fn):
+def _rl(fn, endpoint):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        gate()                  # wait if we’re at the limit
+        gate(endpoint)          # wait if this endpoint class is at its limit
         return fn(*args, **kwargs)
     return wrapper
 
-# Patch the heavy-traffic endpoints
-KiteConnect.historical_data = _rl(KiteConnect.historical_data)
-KiteConnect.quote          = _rl(KiteConnect.quote)
-KiteConnect.ltp            = _rl(KiteConnect.ltp)
+# Patch the heavy-traffic endpoints, each against its own budget
+KiteConnect.historical_data = _rl(KiteConnect.historical_data, "historical")
+KiteConnect.quote          = _rl(KiteConnect.quote,           "quote")
+KiteConnect.ltp            = _rl(KiteConnect.ltp,             "quote")
+KiteConnect.ohlc           = _rl(KiteConnect.ohlc,            "quote")
+KiteConnect.place_order    = _rl(KiteConnect.place_order,     "orders")
+KiteConnect.modify_order   = _rl(KiteConnect.modify_order,    "orders")
+KiteConnect.cancel_order   = _rl(KiteConnect.cancel_order,    "orders")
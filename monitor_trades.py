@@ -4,11 +4,11 @@ from datetime import date
 
 import kite_patch
 from token_manager import refresh_if_needed
-import utils
+import price_snapshot
+import trade_journal
 
-# 1) Auth & inject
+# 1) Auth
 kite = refresh_if_needed()
-utils.set_kite(kite)
 
 # 2) Load open trades from docs
 docs_file = pathlib.Path("docs/trades.json")
@@ -17,14 +17,14 @@ open_trades = json.loads(docs_file.read_text()) if docs_file.exists() else []
 today = date.today().isoformat()
 still_open, just_closed = [], []
 
-# 3) Check each
+# 3) One batched LTP snapshot for every open trade, then check each
+prices = price_snapshot.snapshot(kite, open_trades)
 for t in open_trades:
-    # fetch latest close
-    df = utils.fetch_ohlc(t["symbol"], days=1)
-    if df is None or df.empty:
+    price = price_snapshot.price_for(prices, t)
+    if price is None:
         still_open.append(t)
         continue
-    price = float(df["close"].iloc[-1])
+    price = float(price)
 
     if t.get("target") is not None and price >= t["target"]:
         t["status"]    = "Target Hit"
@@ -41,15 +41,13 @@ for t in open_trades:
 # 4) Write back open
 docs_file.write_text(json.dumps(still_open, indent=2))
 
-# 5) Append closed to history
-hist_file = pathlib.Path("trade_history.json")
-history = json.loads(hist_file.read_text()) if hist_file.exists() else []
-history.extend(just_closed)
-hist_file.write_text(json.dumps(history, indent=2))
+# 5) Journal closes (append-only) and re-export history
+trade_journal.record("close", just_closed, run_date=today)
+trade_journal.export_legacy()
 
 # 6) Commit & push
 os.system('git config user.name "monitor-bot"')
 os.system('git config user.email "bot@users.noreply.github.com"')
-os.system('git add docs/trades.json trade_history.json')
+os.system('git add docs/trades.json trade_history.json trade_journal.jsonl')
 os.system('git commit -m "Update trade statuses '+today+'" || echo "No changes"')
 os.system('git push origin main')
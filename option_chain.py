@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""
+option_chain.py – option-chain engine behind utils.find_short_strangle.
+
+Per underlying / expiry the CE and PE strikes come as sorted NumPy arrays
+from the instrument master (instrument_master.py).  For every
+STRANGLE_SD_BANDS band the short call is the first strike at or above
+spot + band·σ and the short put the last strike at or below spot − band·σ,
+where σ is the move implied by historical volatility over the days left to
+expiry – one searchsorted per side for all bands.
+
+Every leg of every symbol is then quoted together, MAX_QUOTE instruments per
+kite.quote call (rate-limited through kite_patch), and Black-Scholes implied
+volatility is solved for all legs at once by bisection.
+
+CLI:
+  python option_chain.py SYMBOL [SYMBOL …]   print the strangle setups
+"""
+
+import argparse
+from datetime import date
+
+import numpy as np
+
+import instrument_master
+from config import STRANGLE_SD_BANDS
+
+# Kite caps quote() at 500 instruments per request
+MAX_QUOTE    = 500
+RISK_FREE    = 0.065      # annual, continuous – used for IV only
+HV_WINDOW    = 20         # daily returns behind historical volatility
+TRADING_DAYS = 252
+
+
+# ── Strike index ────────────────────────────────────────────────────────────
+def nearest_expiry(symbol: str, today: date = None):
+    """Earliest option expiry on or after today with both CE and PE strikes, or None."""
+    master = instrument_master.get("NFO")
+    if master is None:
+        return None
+    expiry = master.nearest_expiry(symbol, "CE", today)
+    if expiry is None or not len(master.strikes(symbol, "PE", expiry)[0]):
+        return None
+    return expiry
+
+
+def hist_vol(close: np.ndarray, window: int = HV_WINDOW) -> np.ndarray:
+    """
+    Annualised close-to-close volatility per row of a (symbols × bars) close
+    panel over the last `window` returns (NaN padding ignored).
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.diff(np.log(close[:, -(window + 1):]), axis=1)
+    ok = (~np.isnan(r)).sum(axis=1) >= 2
+    hv = np.full(close.shape[0], np.nan)
+    hv[ok] = np.nanstd(r[ok], axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    return hv
+
+
+def select(symbol: str, spot: float, hv: float, bands=STRANGLE_SD_BANDS, today: date = None):
+    """
+    Strikes at each SD band for the nearest expiry:
+    {"expiry", "dte", "move", "call_strike", "call_key", "put_strike", "put_key"}
+    (the strike / key entries are arrays, one per band), or None.
+    """
+    expiry = nearest_expiry(symbol, today)
+    if expiry is None or not (spot > 0) or not (hv > 0):
+        return None
+    dte  = max((date.fromisoformat(expiry) - (today or date.today())).days, 1)
+    move = spot * hv * np.sqrt(dte / 365)
+    b    = np.asarray(bands, dtype=float)
+
+    master = instrument_master.get("NFO")
+    ce_strikes, _, ce_symbols = master.strikes(symbol, "CE", expiry)
+    pe_strikes, _, pe_symbols = master.strikes(symbol, "PE", expiry)
+    # beyond the listed range the outermost strike is the best available
+    ci = np.minimum(np.searchsorted(ce_strikes, spot + b * move, side="left"), len(ce_strikes) - 1)
+    pi = np.maximum(np.searchsorted(pe_strikes, spot - b * move, side="right") - 1, 0)
+    return {
+        "expiry":      expiry,
+        "dte":         dte,
+        "move":        move,
+        "call_strike": ce_strikes[ci], "call_key": [f"NFO:{s.decode()}" for s in ce_symbols[ci]],
+        "put_strike":  pe_strikes[pi], "put_key":  [f"NFO:{s.decode()}" for s in pe_symbols[pi]],
+    }
+
+
+# ── Quotes & pricing ────────────────────────────────────────────────────────
+def _premium(row: dict):
+    """Mid of the best bid/ask when both sides are quoted, else last price."""
+    depth = row.get("depth") or {}
+    buy   = (depth.get("buy")  or [{}])[0].get("price") or 0
+    sell  = (depth.get("sell") or [{}])[0].get("price") or 0
+    if buy > 0 and sell > 0:
+        return (buy + sell) / 2
+    return row.get("last_price") or None
+
+
+def quote_premiums(kite, keys: list) -> dict:
+    """{key: premium} for option legs, in maximal quote() batches."""
+    premiums = {}
+    if kite is None:
+        return premiums
+    for i in range(0, len(keys), MAX_QUOTE):
+        batch = keys[i:i + MAX_QUOTE]
+        try:
+            data = kite.quote(batch)
+        except Exception as e:
+            print(f"❌ Error quoting option batch of {len(batch)} legs: {e}")
+            continue
+        for key, row in data.items():
+            premiums[str(key)] = _premium(row)
+    return premiums
+
+
+def bs_price(spot, strike, t, sigma, is_call, r: float = RISK_FREE) -> np.ndarray:
+    """Black-Scholes premium, element-wise over NumPy arrays."""
+    from scipy.special import ndtr   # heavy import – only when pricing
+    sqrt_t = np.sqrt(t)
+    d1     = (np.log(spot / strike) + (r + sigma ** 2 / 2) * t) / (sigma * sqrt_t)
+    d2     = d1 - sigma * sqrt_t
+    disc   = strike * np.exp(-r * t)
+    call   = spot * ndtr(d1) - disc * ndtr(d2)
+    put    = disc * ndtr(-d2) - spot * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def implied_vol(price, spot, strike, t, is_call, lo: float = 1e-4, hi: float = 5.0,
+                iterations: int = 60) -> np.ndarray:
+    """
+    Black-Scholes IV for every leg at once by bisection (premium is monotonic
+    in σ).  NaN where the premium is missing or outside the [lo, hi] σ range.
+    """
+    price = np.asarray(price, dtype=float)
+    args  = (np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+             np.asarray(t, dtype=float), np.asarray(is_call, dtype=bool))
+    a, b  = np.full(price.shape, lo), np.full(price.shape, hi)
+    with np.errstate(invalid="ignore"):
+        valid = (price >= bs_price(*args[:3], a, args[3])) & (price <= bs_price(*args[:3], b, args[3]))
+        for _ in range(iterations):
+            mid  = (a + b) / 2
+            high = bs_price(*args[:3], mid, args[3]) > price
+            b    = np.where(high, mid, b)
+            a    = np.where(high, a, mid)
+    return np.where(valid, (a + b) / 2, np.nan)
+
+
+def _round(x, nd: int = 2):
+    return None if x is None or np.isnan(x) else round(float(x), nd)
+
+
+# ── Strangles ───────────────────────────────────────────────────────────────
+def strangles(kite, spots: dict, hvs: dict, bands=STRANGLE_SD_BANDS, today: date = None) -> dict:
+    """
+    Short-strangle setups for many underlyings with one round of quote()
+    calls.  `spots` / `hvs` map symbol → spot price / annualised historical
+    volatility.  Returns {symbol: setup} for every symbol with a live chain:
+
+      {"expiry", "dte", "spot", "hv", "sd", "call_strike", "put_strike",
+       "call_premium", "put_premium", "credit",
+       "bands": [{"sd", "call_strike", "put_strike", "call_premium",
+                  "put_premium", "call_iv", "put_iv", "credit"}, …]}
+
+    The top-level strikes are the first band whose legs were both priced
+    (else the first band).  Premiums / IV / credit are None when unquoted.
+    """
+    plans = {}
+    for sym, spot in spots.items():
+        plan = select(sym, spot, hvs.get(sym), bands, today)
+        if plan is not None:
+            plans[sym] = plan
+    if not plans:
+        return {}
+
+    keys     = sorted({str(k) for p in plans.values() for side in ("call_key", "put_key") for k in p[side]})
+    premiums = quote_premiums(kite, keys)
+
+    # every leg of every symbol in one flat IV solve: calls then puts per symbol
+    syms = list(plans)
+    nb   = len(bands)
+    legs = {
+        "key":     [str(k) for s in syms for side in ("call_key", "put_key") for k in plans[s][side]],
+        "strike":  np.concatenate([np.r_[plans[s]["call_strike"], plans[s]["put_strike"]] for s in syms]),
+        "spot":    np.repeat([spots[s] for s in syms], 2 * nb).astype(float),
+        "t":       np.repeat([plans[s]["dte"] / 365 for s in syms], 2 * nb),
+        "is_call": np.tile(np.r_[np.ones(nb, bool), np.zeros(nb, bool)], len(syms)),
+    }
+    price = np.array([premiums.get(k) or np.nan for k in legs["key"]], dtype=float)
+    iv    = implied_vol(price, legs["spot"], legs["strike"], legs["t"], legs["is_call"])
+    price = price.reshape(len(syms), 2, nb)
+    iv    = iv.reshape(len(syms), 2, nb)
+
+    out = {}
+    for n, sym in enumerate(syms):
+        p, rows = plans[sym], []
+        for j, sd in enumerate(bands):
+            call, put = price[n, 0, j], price[n, 1, j]
+            rows.append({
+                "sd":           sd,
+                "call_strike":  float(p["call_strike"][j]),
+                "put_strike":   float(p["put_strike"][j]),
+                "call_premium": _round(call),
+                "put_premium":  _round(put),
+                "call_iv":      _round(iv[n, 0, j] * 100),
+                "put_iv":       _round(iv[n, 1, j] * 100),
+                "credit":       _round(call + put),
+            })
+        best = next((r for r in rows if r["credit"] is not None), rows[0])
+        out[sym] = {
+            "expiry":       p["expiry"],
+            "dte":          p["dte"],
+            "spot":         _round(spots[sym]),
+            "hv":           _round(hvs[sym] * 100),
+            **{k: best[k] for k in ("sd", "call_strike", "put_strike",
+                                    "call_premium", "put_premium", "credit")},
+            "bands":        rows,
+        }
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Print short-strangle setups from the option chain.")
+    ap.add_argument("symbols", nargs="+")
+    args = ap.parse_args()
+
+    import utils
+    from token_manager import refresh_if_needed
+    import kite_patch  # noqa: F401  (rate-limit quote())
+    utils.set_kite(refresh_if_needed())
+
+    setups = utils.find_short_strangles(utils.prefetch_bars(args.symbols, days=60), STRANGLE_SD_BANDS)
+    for sym in args.symbols:
+        s = setups.get(sym)
+        if not s:
+            print(f"⚠️ {sym}: no live option chain")
+            continue
+        print(f"📈 {sym} {s['expiry']} spot {s['spot']} HV {s['hv']}%")
+        for r in s["bands"]:
+            print(f"   {r['sd']}σ  {r['put_strike']:g}PE {r['put_premium']} ({r['put_iv']}%)  "
+                  f"{r['call_strike']:g}CE {r['call_premium']} ({r['call_iv']}%)  credit {r['credit']}")
@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+"""
+pipeline.py – the daily run as one dependency graph of cached stages.
+
+  tokens ──┬── bars ──┬── indicators ──┐
+           │          ├── momentum     ├── signals ── pop ── strangles ── publish
+  sectors ─┼──────────┼────────────────┘              │
+           │          └── alerts                      │
+           └── pop_index ─────────────────────────────┘
+
+Kite is authenticated once per process (one profile() call) and shared by
+every stage through utils.set_kite.  Stages run on a thread pool as soon as
+their inputs are ready, so independent ones (bars ∥ pop_index, indicators ∥
+momentum …) overlap.
+
+Every cached stage writes its output to data/pipeline/<stage>/<key>.pkl,
+where the key hashes the digests of its inputs' outputs and of the files it
+depends on (config, params, model).  A rerun whose inputs are unchanged
+loads the artifact instead of running the stage.  Source stages (tokens,
+sectors, bars, pop_index), live-quote ones (strangles) and side-effecting
+ones (publish, alerts, momentum) always run; their output digests decide
+what downstream reruns.
+
+Environment:
+  SNIPER_PIPELINE            artifact directory (default data/pipeline)
+  SNIPER_BAR_STORE_OFFLINE   1 = no Kite login, bars from the bar store only
+
+CLI:
+  python pipeline.py [TARGET …]       run TARGETs and their inputs (default publish)
+  python pipeline.py --force bars     rerun stages even if cached (--fresh: all)
+  python pipeline.py --list           print the graph
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import pickle
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+BASE         = pathlib.Path(__file__).parent
+PIPELINE_DIR = pathlib.Path(os.getenv("SNIPER_PIPELINE", BASE / "data" / "pipeline"))
+RUN_FILE     = "last_run.json"     # per-stage report of the latest run
+
+KEEP_ARTIFACTS = 5        # newest artifacts kept per stage
+WORKERS        = 4
+BAR_DAYS       = 60       # daily bars behind the engine (sniper_engine / utils)
+PERIOD         = 14
+
+
+class Stage:
+    def __init__(self, name: str, fn, deps=(), files=(), cache: bool = True):
+        """
+        `fn(inputs)` gets {dep name: output} and returns the stage output.
+        `files` – repo files whose contents are part of the cache key.
+        `cache=False` – always run (sources and side effects).
+        """
+        self.name  = name
+        self.fn    = fn
+        self.deps  = tuple(deps)
+        self.files = tuple(files)
+        self.cache = cache
+
+
+# ── Shared Kite session ─────────────────────────────────────────────────────
+_kite      = None
+_kite_lock = threading.Lock()
+
+
+def connect():
+    """
+    Authenticate once and inject the client into utils (bars, tokens,
+    quotes).  None when SNIPER_BAR_STORE_OFFLINE=1.
+    """
+    global _kite
+    with _kite_lock:
+        if _kite is None and os.getenv("SNIPER_BAR_STORE_OFFLINE") != "1":
+            import kite_patch  # noqa: F401  (rate-limit KiteConnect)
+            import utils
+            from kite_async import SyncKite
+            from token_manager import refresh_if_needed
+            _kite = SyncKite(refresh_if_needed())
+            utils.set_kite(_kite)
+        return _kite
+
+
+# ── Stages ──────────────────────────────────────────────────────────────────
+def _tokens(inp):
+    import instrument_master
+    connect()
+    master = instrument_master.get("NFO")
+    return {"as_of": str(master.as_of), "rows": len(master)} if master is not None else None
+
+
+def _sectors(inp):
+    import utils
+    return utils.fetch_sector_rotation()
+
+
+def _bars(inp):
+    import utils
+    from config import FNO_SYMBOLS
+    connect()
+    frames = utils.prefetch_bars(FNO_SYMBOLS, days=BAR_DAYS)
+    stats  = utils.cache_stats()
+    print(f"📦 Bar cache: {stats['hits']} hits / {stats['misses']} misses "
+          f"(saved {stats['saved_calls']} historical_data calls)")
+    return frames
+
+
+def _pop_index(inp):
+    import pop_index
+    connect()
+    pop_index.refresh()
+    # the index lives on disk; its contents are what PoP depends on
+    h = hashlib.sha256()
+    for path in sorted(pop_index.INDEX_DIR.glob("*.npz")):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _indicators(inp):
+    import utils
+    from config import FNO_SYMBOLS
+    return utils.indicator_snapshot(FNO_SYMBOLS, PERIOD)
+
+
+def _signals(inp):
+    import sniper_engine
+    items = sniper_engine.candidates(inp["bars"], inp["indicators"])
+    return sniper_engine.run_phase("signals", items, inp["sectors"])
+
+
+def _pop(inp):
+    import sniper_engine
+    return sniper_engine.run_phase("pop", inp["signals"])
+
+
+def _strangles(inp):
+    import sniper_engine
+    return sniper_engine.run_phase("strangles", inp["pop"])
+
+
+def _publish(inp):
+    import sniper_engine
+    import sniper_run_all
+    trades = sniper_engine.to_trades(inp["strangles"])
+    sniper_run_all.publish(trades)
+    return len(trades)
+
+
+def _momentum(inp):
+    from sector_momentum import compute_sector_momentum
+    df = compute_sector_momentum()
+    print(df.to_markdown(index=False))
+    return df
+
+
+def _alerts(inp):
+    import alert_trades
+    return alert_trades.send_alerts(inp["bars"])
+
+
+ENGINE_FILES = ("config.py", "sniper_params.json", "sniper_engine.py", "utils.py",
+                "filter_pipeline.py")
+
+STAGES = {s.name: s for s in [
+    Stage("tokens",     _tokens,     cache=False),
+    Stage("sectors",    _sectors,    cache=False),
+    Stage("bars",       _bars,       deps=("tokens",), cache=False),
+    Stage("pop_index",  _pop_index,  deps=("tokens",), cache=False),
+    Stage("indicators", _indicators, deps=("bars",), files=("indicators.py",)),
+    Stage("signals",    _signals,    deps=("bars", "indicators", "sectors"),
+          files=ENGINE_FILES + ("ict_signals.py",)),
+    Stage("pop",        _pop,        deps=("signals", "pop_index"),
+          files=ENGINE_FILES + ("model.pkl", "feature_store.py")),
+    Stage("strangles",  _strangles,  deps=("pop", "tokens"), cache=False),     # live option quotes
+    Stage("publish",    _publish,    deps=("strangles",), cache=False),
+    Stage("momentum",   _momentum,   deps=("bars",), cache=False),
+    Stage("alerts",     _alerts,     deps=("bars",), cache=False),
+]}
+
+
+# ── Artifacts ───────────────────────────────────────────────────────────────
+def digest(value) -> str:
+    """Content hash of a stage output."""
+    return hashlib.sha256(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _file_digest(name: str) -> str:
+    path = BASE / name
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else "-"
+
+
+def stage_key(stage: Stage, digests: dict) -> str:
+    """Cache key: the stage, its inputs' output digests and its files."""
+    blob = json.dumps({
+        "stage": stage.name,
+        "deps":  {d: digests[d] for d in stage.deps},
+        "files": {f: _file_digest(f) for f in stage.files},
+    }, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def _artifact(stage: Stage, key: str, root: pathlib.Path) -> pathlib.Path:
+    return root / stage.name / f"{key}.pkl"
+
+
+def load_artifact(path: pathlib.Path):
+    """(output, digest) from an artifact file."""
+    with open(path, "rb") as f:
+        art = pickle.load(f)
+    return art["value"], art["digest"]
+
+
+def save_artifact(path: pathlib.Path, value, value_digest: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump({"digest": value_digest, "value": value}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    # keep only the newest few per stage
+    old = sorted(path.parent.glob("*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in old[KEEP_ARTIFACTS:]:
+        p.unlink(missing_ok=True)
+
+
+# ── Runner ──────────────────────────────────────────────────────────────────
+def closure(targets) -> list:
+    """Stage names needed for `targets`, dependencies first."""
+    out, seen = [], set()
+
+    def visit(name, path=()):
+        if name in seen:
+            return
+        if name in path:
+            raise ValueError(f"Stage dependency cycle: {' → '.join(path + (name,))}")
+        if name not in STAGES:
+            raise KeyError(f"Unknown stage {name!r} (known: {', '.join(STAGES)})")
+        for dep in STAGES[name].deps:
+            visit(dep, path + (name,))
+        seen.add(name)
+        out.append(name)
+
+    for t in targets:
+        visit(t)
+    return out
+
+
+def _execute(stage: Stage, inputs: dict, digests: dict, force: bool, root: pathlib.Path) -> dict:
+    """Run or load one stage → {"value", "digest", "status", "key"}."""
+    key  = stage_key(stage, digests) if stage.cache else None
+    path = _artifact(stage, key, root) if stage.cache else None
+    if stage.cache and not force and path.exists():
+        try:
+            value, value_digest = load_artifact(path)
+            return {"value": value, "digest": value_digest, "status": "cached", "key": key}
+        except Exception as e:
+            print(f"⚠️ {stage.name}: unreadable artifact ({e}) – rerunning")
+    value        = stage.fn(inputs)
+    value_digest = digest(value)
+    if stage.cache:
+        save_artifact(path, value, value_digest)
+    return {"value": value, "digest": value_digest, "status": "ran", "key": key}
+
+
+def run(targets=("publish",), force=(), fresh: bool = False, workers: int = WORKERS,
+        root: pathlib.Path = PIPELINE_DIR) -> dict:
+    """
+    Run `targets` and everything they need; returns {stage: output}.
+    Stages whose inputs failed are skipped; RuntimeError at the end if any
+    stage failed.
+    """
+    names   = closure(targets)
+    results, digests, report = {}, {}, {}
+    pending = list(names)
+    running = {}
+    failed  = set()
+    start   = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                stage = STAGES[name]
+                if any(d in failed for d in stage.deps):
+                    pending.remove(name)
+                    failed.add(name)
+                    report[name] = {"status": "skipped", "start": None, "seconds": 0.0}
+                elif all(d in digests for d in stage.deps):
+                    pending.remove(name)
+                    inputs = {d: results[d] for d in stage.deps}
+                    t0     = time.perf_counter()
+                    fut    = pool.submit(_execute, stage, inputs, digests, fresh or name in force, root)
+                    running[fut] = (name, t0)
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, t0 = running.pop(fut)
+                secs = time.perf_counter() - t0
+                try:
+                    out = fut.result()
+                except Exception as e:
+                    print(f"❌ Stage {name} failed: {e!r}")
+                    failed.add(name)
+                    report[name] = {"status": "failed", "start": round(t0 - start, 4), "seconds": round(secs, 4)}
+                    continue
+                results[name], digests[name] = out["value"], out["digest"]
+                report[name] = {"status": out["status"], "start": round(t0 - start, 4), "seconds": round(secs, 4),
+                                "key": out["key"], "digest": out["digest"][:16]}
+
+    total = time.perf_counter() - start
+    summary(names, report, total)
+    _write_run(names, report, total, root)
+    if failed:
+        broken = [n for n in names if report[n]["status"] == "failed"]
+        raise RuntimeError(f"Pipeline stages failed: {', '.join(broken)} "
+                           f"({len(failed) - len(broken)} dependent stages skipped)")
+    return results
+
+
+def summary(names: list, report: dict, total: float):
+    ran    = sum(1 for n in names if report[n]["status"] == "ran")
+    cached = sum(1 for n in names if report[n]["status"] == "cached")
+    busy   = sum(report[n]["seconds"] for n in names)
+    print(f"⏱️  Pipeline: {len(names)} stages ({ran} ran, {cached} cached) in {total:.2f}s "
+          f"· {busy:.2f}s of stage time")
+    for n in names:
+        r     = report[n]
+        start = "" if r["start"] is None else f"@{r['start']:6.2f}s"
+        print(f"   {n:<11} {r['status']:<8} {start:>9} {r['seconds'] * 1000:10.1f} ms")
+
+
+def _write_run(names: list, report: dict, total: float, root: pathlib.Path):
+    root.mkdir(parents=True, exist_ok=True)
+    run_file = root / RUN_FILE
+    tmp      = run_file.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({
+        "run_at":        datetime.now().isoformat(timespec="seconds"),
+        "total_seconds": round(total, 3),
+        "stages":        [{"name": n, **report[n]} for n in names],
+    }, indent=2))
+    os.replace(tmp, run_file)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run the daily pipeline (cached stages, parallel where possible).")
+    ap.add_argument("targets", nargs="*", default=["publish"])
+    ap.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="rerun these even if cached")
+    ap.add_argument("--fresh", action="store_true", help="ignore every cached artifact")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--list", action="store_true", help="print the stage graph and exit")
+    args = ap.parse_args()
+
+    if args.list:
+        for st in STAGES.values():
+            deps = ", ".join(st.deps) or "–"
+            print(f"{st.name:<11} ← {deps:<30} {'cached' if st.cache else 'always runs'}")
+    else:
+        try:
+            run(args.targets, force=set(args.force), fresh=args.fresh, workers=args.workers)
+        except (RuntimeError, KeyError, ValueError) as e:
+            raise SystemExit(f"❌ {e}")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+pop_index.py – precomputed outcome index behind utils.hist_pop.
+
+Historical PoP = the fraction of past entries (one per daily close) where
++tgt% was reached before −sl% within HOLD_BARS bars.  For every entry and
+every stop level in SL_LEVELS the index stores the maximum favourable
+excursion (%) reached *before* that stop was touched; a bar touching both
+levels counts as the stop first, like backtest.py.  Each column is sorted
+once on load, so a query is one searchsorted per (symbol, stop level):
+
+    PoP = #(excursion ≥ tgt%) / #entries
+
+One <SYMBOL>.npz per symbol under data/bars/pop/ (kept next to the bar store
+it is built from).  `refresh()` only appends entries whose HOLD_BARS window
+completed since the last run.
+
+Environment:
+  SNIPER_POP_INDEX   index directory (default <bar store>/pop)
+
+CLI:
+  python pop_index.py refresh [--days N]   build / extend the index for FNO_SYMBOLS
+  python pop_index.py query SYMBOL TGT SL  print one PoP lookup
+"""
+
+import argparse
+import os
+import pathlib
+import threading
+
+import numpy as np
+
+import bar_store
+import utils
+from indicators import first_true, forward_windows
+from config import DEFAULT_POP, FNO_SYMBOLS, HOLD_BARS
+
+INDEX_DIR = pathlib.Path(os.getenv("SNIPER_POP_INDEX", bar_store.STORE_DIR / "pop"))
+
+# Stop-loss grid (%) – queries round the stop down to the nearest level
+SL_LEVELS     = np.round(np.arange(0.5, 10.01, 0.25), 2)
+LOOKBACK_DAYS = 800
+MIN_ENTRIES   = 30
+
+
+def default_pop() -> float:
+    return float(str(DEFAULT_POP).rstrip("%"))
+
+
+def level_for(sl_pct: float) -> int:
+    """Column of the largest SL_LEVELS stop ≤ sl_pct (the tightest level is the floor)."""
+    return max(int(np.searchsorted(SL_LEVELS, sl_pct, side="right")) - 1, 0)
+
+
+# ── Building ────────────────────────────────────────────────────────────────
+def excursions(high, low, close, hold: int = HOLD_BARS, levels=SL_LEVELS) -> np.ndarray:
+    """
+    (entries × levels) max % rise above the entry close before a −level% stop
+    is touched, for every bar whose full `hold`-bar window exists.
+    -inf when the stop is hit on the very next bar.
+    """
+    h, l, c = (np.asarray(a, dtype=float)[None, :] for a in (high, low, close))
+    n       = c.shape[1] - hold
+    if n <= 0:
+        return np.empty((0, len(levels)), dtype=np.float32)
+    f_high = forward_windows(h, hold)[0, :n]                      # (n, hold)
+    f_low  = forward_windows(l, hold)[0, :n]
+    entry  = c[0, :n, None]
+    up     = (f_high / entry - 1) * 100
+    stop   = entry * (1 - levels / 100)                           # (n, L)
+    with np.errstate(invalid="ignore"):
+        stop_at = first_true(f_low[:, None, :] <= stop[..., None])   # (n, L)
+    before = np.arange(hold)[None, None, :] < stop_at[..., None]       # (n, L, hold)
+    mfe    = np.where(before, up[:, None, :], -np.inf).max(axis=-1)
+    mfe[np.isnan(c[0, :n])] = np.nan
+    return mfe.astype(np.float32)
+
+
+def _path(symbol: str, root: pathlib.Path) -> pathlib.Path:
+    return root / f"{symbol}.npz"
+
+
+def refresh_symbol(symbol: str, days: int = LOOKBACK_DAYS, root: pathlib.Path = INDEX_DIR,
+                   hold: int = HOLD_BARS) -> int:
+    """Append newly completed entries for `symbol`. Returns the number added."""
+    df = utils.fetch_ohlc(symbol, days)
+    if df.empty:
+        return 0
+    dates = df.index.to_numpy(dtype="datetime64[D]")
+
+    path, old_dates, old_mfe = _path(symbol, root), None, None
+    if path.exists():
+        with np.load(path) as z:
+            if int(z["hold"]) == hold and np.array_equal(z["levels"], SL_LEVELS):
+                old_dates, old_mfe = z["dates"], z["mfe"]
+
+    # only entries after the last indexed one (plus their forward window)
+    start = 0
+    if old_dates is not None and len(old_dates):
+        start = int(np.searchsorted(dates, old_dates[-1], side="right"))
+    tail  = df.iloc[start:]
+    mfe   = excursions(tail["high"], tail["low"], tail["close"], hold)
+    if not len(mfe):
+        return 0
+    new_dates = dates[start:start + len(mfe)]
+    if old_dates is not None:
+        new_dates = np.concatenate([old_dates, new_dates])
+        mfe       = np.concatenate([old_mfe, mfe])
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, dates=new_dates, mfe=mfe, hold=hold, levels=SL_LEVELS)
+    os.replace(tmp, path)
+    _loaded.pop(symbol, None)
+    return len(new_dates) - (len(old_dates) if old_dates is not None else 0)
+
+
+def refresh(symbols: list = FNO_SYMBOLS, days: int = LOOKBACK_DAYS, root: pathlib.Path = INDEX_DIR) -> int:
+    utils.prefetch_bars(symbols, days=days)
+    added = sum(refresh_symbol(sym, days, root) for sym in symbols)
+    print(f"🎯 PoP index: +{added} entries across {len(symbols)} symbols")
+    return added
+
+
+# ── Querying ────────────────────────────────────────────────────────────────
+_loaded = {}
+_lock   = threading.Lock()
+
+
+def _sorted_index(symbol: str, root: pathlib.Path = INDEX_DIR):
+    """Column-sorted excursions for `symbol` (NaN entries dropped), or None."""
+    with _lock:
+        if symbol not in _loaded:
+            path = _path(symbol, root)
+            if not path.exists():
+                _loaded[symbol] = None
+            else:
+                with np.load(path) as z:
+                    mfe = z["mfe"][~np.isnan(z["mfe"]).any(axis=1)]
+                _loaded[symbol] = np.sort(mfe, axis=0)
+        return _loaded[symbol]
+
+
+def query(symbol: str, tgt_pct: float, sl_pct: float, root: pathlib.Path = INDEX_DIR) -> float:
+    """
+    Historical PoP (%) of reaching +tgt_pct before −sl_pct within HOLD_BARS
+    bars.  DEFAULT_POP when the symbol has fewer than MIN_ENTRIES entries.
+    """
+    idx = _sorted_index(symbol, root)
+    if idx is None or len(idx) < MIN_ENTRIES:
+        return default_pop()
+    col   = idx[:, level_for(sl_pct)]
+    hits  = len(col) - int(np.searchsorted(col, tgt_pct, side="left"))
+    return hits / len(col) * 100
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain the historical PoP index.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("refresh")
+    r.add_argument("--days", type=int, default=LOOKBACK_DAYS)
+    q = sub.add_parser("query")
+    q.add_argument("symbol")
+    q.add_argument("tgt", type=float)
+    q.add_argument("sl", type=float)
+    args = ap.parse_args()
+
+    if args.command == "refresh":
+        if not bar_store.OFFLINE:
+            from token_manager import refresh_if_needed
+            utils.set_kite(refresh_if_needed())
+        refresh(days=args.days)
+    else:
+        print(f"{args.symbol}: PoP {query(args.symbol, args.tgt, args.sl):.2f}% "
+              f"(+{args.tgt}% before −{args.sl}% within {HOLD_BARS} bars)")
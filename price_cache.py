@@ -0,0 +1,113 @@
+"""
+price_cache.py – shared TTL price cache for the Flask dashboard.
+
+Page views and /api/trades GETs read prices from here instead of quoting Kite
+themselves.  A stale or incomplete cache is refreshed by exactly one caller
+(single-flight); concurrent requests wait for that refresh and reuse its
+result.  An optional background thread keeps open-trade prices warm during
+market hours so requests normally never wait on Kite at all.
+
+Environment:
+  PRICE_CACHE_TTL   seconds a snapshot stays fresh (default 15)
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+
+import price_snapshot
+
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "15"))
+
+IST          = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN  = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def market_open(now: datetime = None) -> bool:
+    """NSE cash session, Mon–Fri 09:15–15:30 IST (holidays not modelled)."""
+    now = now or datetime.now(IST)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+class PriceCache:
+    def __init__(self, kite, ttl: float = PRICE_CACHE_TTL, clock=time.monotonic):
+        # a client, or a zero-argument factory called on the first refresh
+        self._kite     = kite
+        self.ttl       = ttl
+        self.clock     = clock
+        self.refreshes = 0
+        self._prices   = {}
+        self._keys     = set()          # keys requested in the last refresh
+        self._stamp    = float("-inf")
+        self._inflight = False
+        self._cond     = threading.Condition()
+        self._thread   = None
+
+    @property
+    def kite(self):
+        if callable(self._kite):
+            self._kite = self._kite()
+        return self._kite
+
+    def _fresh(self, keys: set) -> bool:
+        return self.clock() - self._stamp < self.ttl and keys <= self._keys
+
+    def get(self, trades: list) -> dict:
+        """Price map covering `trades`, refreshed at most once per TTL."""
+        return self.get_keys(set(price_snapshot.instrument_keys(trades)))
+
+    def get_keys(self, keys: set, force: bool = False) -> dict:
+        with self._cond:
+            while True:
+                if not force and self._fresh(keys):
+                    return dict(self._prices)
+                if not self._inflight:
+                    self._inflight = True
+                    break
+                # someone else is refreshing – wait for it, then re-check
+                self._cond.wait()
+                force = False
+            stale = self.clock() - self._stamp >= self.ttl
+            want  = keys | (set() if stale else self._keys)
+
+        prices = None
+        try:
+            prices = price_snapshot.quote_keys(self.kite, sorted(want))
+        finally:
+            with self._cond:
+                if prices is not None:
+                    self._prices    = prices
+                    self._keys      = want
+                    self._stamp     = self.clock()
+                    self.refreshes += 1
+                self._inflight = False
+                self._cond.notify_all()
+        return dict(prices)
+
+    # -- background refresher ---------------------------------------------------
+    def start_refresher(self, trades_source, interval: float = None):
+        """
+        Daemon thread re-quoting `trades_source()`'s open trades every
+        `interval` seconds (default: TTL) while the market is open.
+        """
+        if self._thread is not None:
+            return self._thread
+        interval = interval or self.ttl
+
+        def loop():
+            while True:
+                if market_open():
+                    try:
+                        open_trades = [t for t in trades_source()
+                                       if t.get("status", "Open").lower() == "open"]
+                        self.get_keys(set(price_snapshot.instrument_keys(open_trades)), force=True)
+                    except Exception as e:
+                        print(f"❌ Price refresher error: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=loop, name="price-refresher", daemon=True)
+        self._thread.start()
+        print(f"🔁 Price refresher running every {interval:.0f}s during market hours")
+        return self._thread
@@ -0,0 +1,52 @@
+"""
+price_snapshot.py – one batched LTP snapshot for a whole set of trades.
+
+trade_updater, the /api/trades handler and monitor_trades used to call
+kite.ltp() once per trade.  ltp() accepts up to 1000 instruments per call
+across exchanges, so a snapshot of every open trade costs
+ceil(n / MAX_BATCH) calls – one in practice.
+"""
+
+import token_resolver
+
+# Kite caps ltp() at 1000 instruments per request
+MAX_BATCH = 1000
+
+
+def instrument_keys(trades: list) -> list[str]:
+    """Unique exchange-qualified keys for the trades, NSE before NFO."""
+    keys = {
+        token_resolver.instrument_key(t["symbol"], t.get("type", "Cash"))
+        for t in trades if t.get("symbol")
+    }
+    return sorted(keys, key=lambda k: (k.split(":", 1)[0] != "NSE", k))
+
+
+def snapshot(kite, trades: list, open_only: bool = False) -> dict:
+    """
+    {instrument_key: last_price} for every trade (only status "Open" when
+    `open_only`).  Keys missing from the result could not be priced.
+    """
+    if open_only:
+        trades = [t for t in trades if t.get("status", "Open").lower() == "open"]
+    return quote_keys(kite, instrument_keys(trades))
+
+
+def quote_keys(kite, keys: list) -> dict:
+    """{instrument_key: last_price} for explicit keys, in maximal ltp() batches."""
+    prices = {}
+    for i in range(0, len(keys), MAX_BATCH):
+        batch = keys[i:i + MAX_BATCH]
+        try:
+            data = kite.ltp(batch)
+        except Exception as e:
+            print(f"❌ Error fetching LTP batch of {len(batch)} instruments: {e}")
+            continue
+        for key, row in data.items():
+            prices[key] = row["last_price"]
+    return prices
+
+
+def price_for(prices: dict, trade: dict):
+    """Look up a trade's price in a snapshot (None if it wasn't priced)."""
+    return prices.get(token_resolver.instrument_key(trade["symbol"], trade.get("type", "Cash")))
@@ -1,36 +1,115 @@
+"""
+rate_limiter.py – thread-safe, asyncio-aware token buckets per Kite endpoint class.
+
+Kite's documented budgets are per endpoint class, so each class gets its own
+bucket: historical candles 3/s, quote/ltp/ohlc 1/s, orders 10/s.  Buckets hold
+a single token (no bursts), which keeps any 1-second window at or below the
+rate.  Historical candles also keep the original gate's 70-calls-per-minute
+cap, so a long bar-store backfill runs in 3/s bursts but never makes more
+than 70 calls in any 60 s.
+Waiting threads block on a condition variable for exactly the time the next
+token needs instead of polling.  Tests: tests/test_rate_limiter.py.
+"""
+
+import asyncio
+import threading
 import time
 from collections import deque
 
-MAX_CALLS_PER_SEC = 1.2      # safe budget
-MAX_CALLS_PER_MIN = 70
+# calls per second per endpoint class
+RATES = {
+    "historical": 3.0,
+    "quote":      1.0,
+    "orders":     10.0,
+}
+
+# hard cap on calls in any sliding 60 s window
+MAX_CALLS_PER_MIN = {
+    "historical": 70,
+}
+
+_EPS = 1e-9
+
+
+# ── Clocks ─────────────────────────────────────────────────────────────────
+class MonotonicClock:
+    """Real time: condition waits and asyncio sleeps."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def wait(self, cond: threading.Condition, timeout: float):
+        cond.wait(timeout)
+
+    async def sleep(self, delay: float):
+        await asyncio.sleep(delay)
+
+
+# ── Token bucket ───────────────────────────────────────────────────────────
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0, per_min: int = None, clock=None):
+        self.rate     = rate
+        self.capacity = capacity
+        self.per_min  = per_min
+        self.clock    = clock or MonotonicClock()
+        self._tokens  = capacity
+        self._stamp   = self.clock.now()
+        self._recent  = deque()             # grant times inside the last 60 s (per_min only)
+        self._cond    = threading.Condition()
+
+    def _take(self) -> float:
+        """Take a token if available (→ 0.0), else return seconds until one is. Lock held."""
+        now          = self.clock.now()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp  = now
+        if self.per_min:
+            while self._recent and now - self._recent[0] >= 60.0 - _EPS:
+                self._recent.popleft()
+            if len(self._recent) >= self.per_min:
+                return self._recent[0] + 60.0 - now
+        if self._tokens >= 1 - _EPS:
+            self._tokens -= 1
+            if self.per_min:
+                self._recent.append(now)
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a token is available."""
+        with self._cond:
+            while True:
+                delay = self._take()
+                if delay == 0.0:
+                    return
+                self.clock.wait(self._cond, delay)
+
+    async def acquire_async(self):
+        """Await a token without blocking the event loop."""
+        while True:
+            with self._cond:
+                delay = self._take()
+            if delay == 0.0:
+                return
+            await self.clock.sleep(delay)
+
 
-_sec, _min = deque(), deque()
+BUCKETS = {name: TokenBucket(rate, per_min=MAX_CALLS_PER_MIN.get(name)) for name, rate in RATES.items()}
 
-def _prune(now, dq, span):
-    while dq and now - dq[0] > span:
-        dq.popleft()
 
-def gate():
-    now = time.time()
-    _prune(now, _sec, 1.0)
-    _prune(now, _min, 60.0)
+def gate(endpoint: str = "historical"):
+    """Wait until `endpoint` has budget for one more call."""
+    BUCKETS[endpoint].acquire()
 
-    while (len(_sec) >= MAX_CALLS_PER_SEC or
-           len(_min) >= MAX_CALLS_PER_MIN):
-        time.sleep(0.25)
-        now = time.time()
-        _prune(now, _sec, 1.0)
-        _prune(now, _min, 60.0)
 
-    _sec.append(now)
-    _min.append(now)
+async def gate_async(endpoint: str = "historical"):
+    await BUCKETS[endpoint].acquire_async()
 
 
 # Optional helper that retries historical_data 5× with back-off
-from kiteconnect import exceptions
 def safe_hist(kite, token, start, end, interval):
+    from kiteconnect import exceptions
     for attempt in range(5):
-        gate()
+        gate("historical")
         try:
             return kite.historical_data(token, start, end, interval)
         except exceptions.InputException as e:
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Regression benchmark for the exit path: tick → SL / target / time-exit decision.
+
+Replays a tick file through exit_monitor (ReplayTicker → ExitMonitor, the
+same code sniper_auto_exit uses) against a synthetic book of open trades
+spread over FNO_SYMBOLS, and reports throughput (ticks/sec) plus p50 / p99
+tick-to-decision latency – measured from the moment a tick frame is handed
+to the monitor until that tick's decision is made.  Exits are checked
+against a plain per-trade scan of the same ticks (like the old
+monitor_trades loop) so a faster exit path can't silently change results.
+No Kite, journal or docs/ writes are involved.
+
+  python scripts/bench_exit.py [--ticks 1000000] [--trades 2000] [--speed 0]
+  python scripts/bench_exit.py --make ticks.npz        only write a synthetic tick file
+  python scripts/bench_exit.py --file ticks.npz|.jsonl replay a recorded file
+"""
+
+import argparse
+import sys
+import pathlib
+import time
+from datetime import date
+
+# ── Make sure we can import root‑level modules ─────────────────────────────
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+import exit_monitor
+import token_resolver
+from config import FNO_SYMBOLS
+
+
+def universe() -> dict:
+    """{symbol: token} for every FNO symbol with a static spot token."""
+    tokens = {sym: token_resolver.resolve(sym) for sym in FNO_SYMBOLS}
+    return {sym: tok for sym, tok in tokens.items() if tok}
+
+
+def synthetic_ticks(tokens: list, n: int, seed: int = 7, rate: float = 5000.0) -> dict:
+    """
+    n ticks interleaved across `tokens`: a random walk per token starting at
+    100 (0.02 % steps), timestamps `rate` ticks/sec apart from 09:15 IST.
+    """
+    rng   = np.random.default_rng(seed)
+    which = rng.integers(0, len(tokens), n)
+    steps = rng.normal(0, 2e-4, n)
+    price = np.empty(n)
+    for k in range(len(tokens)):
+        idx        = np.flatnonzero(which == k)
+        price[idx] = 100 * np.exp(np.cumsum(steps[idx]))
+    start = np.datetime64("2025-07-01T03:45:00").astype("datetime64[s]").astype(float)
+    return {"token": np.asarray(tokens, dtype=np.int64)[which],
+            "price": np.round(price, 2),
+            "ts":    start + np.arange(n) / rate}
+
+
+def synthetic_trades(symbols: list, n: int, seed: int = 3) -> list:
+    """Long trades around 100 with stops / targets 0.5–3 % away."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for k in range(n):
+        entry = round(100 * (1 + rng.normal(0, 0.002)), 2)
+        out.append({
+            "symbol":     symbols[k % len(symbols)],
+            "type":       "Sniper-Multi",
+            "entry":      entry,
+            "sl":         round(entry * (1 - rng.uniform(0.005, 0.03)), 2),
+            "target":     round(entry * (1 + rng.uniform(0.005, 0.03)), 2),
+            "entry_date": "2025-07-01",
+            "status":     "Open",
+        })
+    return out
+
+
+# ── Reference: per-trade scan of every tick ───────────────────────────────
+def scan_exits(trades: list, tokens: list, ticks: dict) -> dict:
+    """{trade index: (status, price)} from a linear scan per tick."""
+    by_token = {}
+    for i, (t, tok) in enumerate(zip(trades, tokens)):
+        by_token.setdefault(tok, []).append(i)
+    out = {}
+    for tok, price in zip(ticks["token"].tolist(), ticks["price"].tolist()):
+        live = by_token.get(tok)
+        if not live:
+            continue
+        for i in list(live):
+            t = trades[i]
+            if price <= t["sl"]:
+                out[i] = ("SL Hit", price)
+            elif price >= t["target"]:
+                out[i] = ("Target Hit", price)
+            else:
+                continue
+            live.remove(i)
+    return out
+
+
+# ── Timed replay ──────────────────────────────────────────────────────────
+class Timed:
+    """
+    on_ticks wrapper recording, per tick, the latency from its frame's arrival
+    to its decision (includes waiting behind earlier ticks of the frame) and
+    the monitor's own service time for it.
+    """
+
+    def __init__(self, monitor: exit_monitor.ExitMonitor, n: int):
+        self.monitor = monitor
+        self.lat     = np.empty(n)
+        self.service = np.empty(n)
+        self.n       = 0
+
+    def on_ticks(self, ws, ticks: list):
+        arrived = time.perf_counter()
+        for tick in ticks:
+            t0 = time.perf_counter()
+            self.monitor.on_ticks(ws, [tick])
+            done = time.perf_counter()
+            self.lat[self.n], self.service[self.n] = done - arrived, done - t0
+            self.n += 1
+
+
+def replay(trades: list, ticks: dict, speed: float, batch: int):
+    """(monitor, {trade index: (status, trigger price)}, Timed, wall seconds)."""
+    exits   = []
+    copies  = [dict(t) for t in trades]
+    monitor = exit_monitor.ExitMonitor(copies, on_exit=exits.extend, today=date(2025, 7, 1))
+    timed   = Timed(monitor, len(ticks["token"]))
+    ticker  = exit_monitor.ReplayTicker(ticks, speed=speed, batch=batch)
+    ticker.on_ticks = timed.on_ticks
+    ticker.subscribe(monitor.subscribed())
+    t0 = time.perf_counter()
+    ticker.connect()
+    wall = time.perf_counter() - t0
+    index = {id(t): i for i, t in enumerate(copies)}
+    got   = {index[id(t)]: (t["status"], t["trigger_price"]) for t in exits}
+    return monitor, got, timed, wall
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--ticks",  type=int,   default=1_000_000)
+    ap.add_argument("--trades", type=int,   default=2000)
+    ap.add_argument("--speed",  type=float, default=0.0, help="replay speed vs. tick timestamps (0 = flat out)")
+    ap.add_argument("--batch",  type=int,   default=100, help="ticks per delivered frame")
+    ap.add_argument("--file",   help="recorded tick file (.npz / .jsonl) to replay")
+    ap.add_argument("--make",   help="write the synthetic tick file here and exit")
+    args = ap.parse_args()
+
+    syms   = universe()
+    tokens = list(syms.values())
+    if args.file:
+        ticks = exit_monitor.load_ticks(args.file)
+    else:
+        t0    = time.perf_counter()
+        ticks = synthetic_ticks(tokens, args.ticks)
+        print(f"🎲 {len(ticks['token']):,} synthetic ticks over {len(tokens)} symbols "
+              f"in {time.perf_counter() - t0:.1f}s")
+    if args.make:
+        np.savez(args.make, **ticks)
+        print(f"💾 Wrote {args.make}")
+        sys.exit()
+
+    trades = synthetic_trades(list(syms), args.trades)
+    monitor, got, timed, wall = replay(trades, ticks, args.speed, args.batch)
+
+    ref = scan_exits(trades, [syms[t["symbol"]] for t in trades], ticks)
+    if got != ref:
+        bad = sorted(set(got.items()) ^ set(ref.items()))[:5]
+        raise SystemExit(f"❌ Exit mismatch vs. per-trade scan: {bad}")
+
+    n = timed.n
+    print(f"✅ {len(got)} exits identical to the per-trade scan "
+          f"({len(monitor.trades)} of {len(trades)} trades still open)")
+    print(f"⚡ {n:,} ticks in {wall:.2f}s → {n / wall:,.0f} ticks/s (frames of {args.batch})")
+    for name, a in (("tick→decision", timed.lat[:n]), ("per-tick check", timed.service[:n])):
+        p50, p99 = np.percentile(a, [50, 99]) * 1e6
+        print(f"   {name:<14} p50 {p50:7.1f} µs  p99 {p99:7.1f} µs  max {a.max() * 1e6:8.0f} µs")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Import-time budget check for every CLI / workflow entry point.
+
+Each entry point is imported in a fresh interpreter under `python -X importtime`
+and the cumulative time of its top-level imports is compared to its budget.
+Modules with a `__main__` guard are imported as-is (so work done at module
+level counts).  Scripts without one (monitor_trades, scripts/get_eq_tokens,
+scripts/get_nfo_tokens, scripts/sector_momentum_run, scripts/ml_optimize)
+only have their import statements executed, so nothing talks to Kite – and
+their module-level work (refresh_if_needed(), instrument dumps, training) is
+not timed: for those the budget covers imports only.
+
+Heavy dependencies (scipy, kiteconnect / twisted, joblib + the model, sklearn)
+are imported on first use, so an entry point that doesn't need them doesn't
+pay for them.  Exit status 1 when any entry point is over budget; the same
+check runs per entry point in tests/test_import_time.py.
+
+  python scripts/check_import_time.py [--repeat 3] [--only sniper_engine.py …] [-v]
+"""
+
+import argparse
+import ast
+import os
+import pathlib
+import re
+import subprocess
+import sys
+
+# ── Repo root ───────────────────────────────────────────────────────────────
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+# entry point → import budget in seconds (cumulative, best of --repeat runs)
+DEFAULT_BUDGET = 0.5
+ENTRY_POINTS = {
+    "app.py":                         DEFAULT_BUDGET,
+    "pipeline.py":                    DEFAULT_BUDGET,
+    "sniper_run_all.py":              DEFAULT_BUDGET,
+    "sniper_engine.py":               DEFAULT_BUDGET,
+    "sniper_auto_exit.py":            DEFAULT_BUDGET,
+    "exit_monitor.py":                DEFAULT_BUDGET,
+    "monitor_trades.py":              DEFAULT_BUDGET,
+    "alert_trades.py":                DEFAULT_BUDGET,
+    "trade_updater.py":               DEFAULT_BUDGET,
+    "trade_journal.py":               DEFAULT_BUDGET,
+    "backtest.py":                    DEFAULT_BUDGET,
+    "walk_forward.py":                DEFAULT_BUDGET,
+    "bar_store.py":                   DEFAULT_BUDGET,
+    "pop_index.py":                   DEFAULT_BUDGET,
+    "feature_store.py":               DEFAULT_BUDGET,
+    "option_chain.py":                DEFAULT_BUDGET,
+    "instrument_master.py":           DEFAULT_BUDGET,
+    "scripts/get_eq_tokens.py":       DEFAULT_BUDGET,
+    "scripts/get_nfo_tokens.py":      DEFAULT_BUDGET,
+    "scripts/sector_momentum_run.py": DEFAULT_BUDGET,
+    "scripts/bench_exit.py":          DEFAULT_BUDGET,
+    "scripts/bench_ict.py":           DEFAULT_BUDGET,
+    # trains a RandomForest – sklearn is the job, not start-up overhead
+    "scripts/ml_optimize.py":         1.5,
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_source(path: pathlib.Path) -> str:
+    """Python source that performs the entry point's imports and nothing else."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    guarded = any(
+        isinstance(node, ast.If) and "__main__" in ast.unparse(node.test)
+        for node in tree.body
+    )
+    if guarded:
+        return f"import {path.stem}"
+    stmts = [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(stmts) or "pass"
+
+
+def measure(path: pathlib.Path) -> tuple:
+    """(seconds, [(package, seconds)] heaviest third-party packages first)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(path.parent), str(ROOT)]),
+               SNIPER_BAR_STORE_OFFLINE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", import_source(path)],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        err = proc.stderr.strip().splitlines()
+        raise RuntimeError(err[-1] if err else f"exit status {proc.returncode}")
+    ours  = {p.stem for p in ROOT.glob("*.py")} | {p.stem for p in ROOT.glob("scripts/*.py")}
+    total, pkgs = 0.0, []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        secs, name = int(m.group(2)) / 1e6, m.group(4)
+        if not m.group(3):
+            total += secs
+        if "." not in name and name not in ours:
+            pkgs.append((name, secs))
+    return total, sorted(pkgs, key=lambda x: -x[1])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=3, help="runs per entry point (best is kept)")
+    ap.add_argument("--only", nargs="+", help="entry points to check (paths relative to the repo)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="show the heaviest imports")
+    args = ap.parse_args()
+
+    over = []
+    for name in args.only or ENTRY_POINTS:
+        budget = ENTRY_POINTS.get(name, DEFAULT_BUDGET)
+        try:
+            secs, top = min((measure(ROOT / name) for _ in range(args.repeat)), key=lambda r: r[0])
+        except RuntimeError as e:
+            print(f"❌ {name:<32} import failed: {e}")
+            over.append(name)
+            continue
+        ok = secs <= budget
+        print(f"{'✅' if ok else '❌'} {name:<32} {secs * 1e3:7.1f} ms  (budget {budget * 1e3:.0f} ms)")
+        if args.verbose or not ok:
+            print("     " + ", ".join(f"{pkg} {t * 1e3:.0f} ms" for pkg, t in top[:4]))
+        if not ok:
+            over.append(name)
+
+    if over:
+        sys.exit(f"❌ {len(over)} entry point(s) over their import budget: {', '.join(over)}")
+    print("✅ Every entry point within its import budget")
@@ -8,22 +8,19 @@ repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, repo_root)
 
 from token_manager import refresh_if_needed
+import instrument_master
 from config import NSE100
 
 # 1️⃣ Authenticate
-kite = refresh_if_needed()
+instrument_master.set_kite(refresh_if_needed())
 
-# 2️⃣ Pull all NSE instruments
-all_nse = kite.instruments("NSE")
+# 2️⃣ Today's NSE instrument master (downloaded at most once per day)
+master = instrument_master.get("NSE")
 
 # 3️⃣ Build a map for your NSE100 list
-spot_tokens = {}
-for inst in all_nse:
-    ts = inst["tradingsymbol"]   # e.g. "RELIANCE"
-    if ts in NSE100:
-        spot_tokens[ts] = inst["instrument_token"]
+spot_tokens = {ts: master.token(ts) for ts in NSE100 if master.token(ts)}
 
-# 4️⃣ Write out spot_tokens.json
+# 4️⃣ Write out spot_tokens.json (static spot map used offline by the bar store)
 with open("spot_tokens.json","w") as f:
     json.dump(spot_tokens, f, indent=2)
 
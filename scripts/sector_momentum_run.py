@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """
-Run sector momentum after authenticating Kite and injecting into utils.
+Run sector momentum as the `momentum` stage of pipeline.py (one Kite login,
+bars shared with the other stages) and print a markdown table.
 """
 
 import sys
@@ -10,16 +11,7 @@ import pathlib
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-# ── 1) Import & auth ───────────────────────────────────────────────────────
-import kite_patch              # your rate‑limit patches; must come before KiteConnect
-from token_manager import refresh_if_needed
-import utils                   # now resolvable thanks to sys.path above
-from sector_momentum import compute_sector_momentum
+# ── 1) Authenticate, fetch bars & compute (prints the table) ───────────────
+import pipeline
 
-# 2) Authenticate & inject into utils
-kite = refresh_if_needed()
-utils.set_kite(kite)
-
-# 3) Compute sector momentum & print a markdown table
-df = compute_sector_momentum()
-print(df.to_markdown(index=False))
+pipeline.run(["momentum"])
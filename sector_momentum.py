@@ -22,8 +22,9 @@ def compute_sector_momentum(days: int = 30) -> pd.DataFrame:
       sector, avg_return (%), avg_rsi, momentum_rank
     """
     rows = []
+    frames = utils.prefetch_bars(FNO_SYMBOLS, days=days+1)
     for sym in FNO_SYMBOLS:
-        df = utils.fetch_ohlc(sym, days=days+1)
+        df = frames[sym]
         if df is None or len(df)<2: continue
         ret = (df["close"].iloc[-1] / df["close"].iloc[0] - 1)*100
         rsi = utils.fetch_rsi(sym, period=14)
@@ -1,26 +1,25 @@
-from trades_auto import load_trades, update_trade_status
-from kite_utils import get_live_price
-from datetime import datetime
+#!/usr/bin/env python
+"""
+One-shot exit pass over docs/trades.json: a single batched LTP snapshot fed
+through the exit monitor's threshold book (SL / target / holding period).
+For intraday exits run exit_monitor.py, which streams ticks instead.
+"""
 
-def check_exit():
-    trades = load_trades()
-    for trade in trades:
-        if trade["status"] != "Open":
-            continue
-        cmp = get_live_price(trade["symbol"])
-        sl = trade["sl"]
-        tgt = trade["target"]
-        entry = trade["entry_price"]
+import exit_monitor
 
-        if cmp <= sl:
-            pnl = cmp - entry
-            update_trade_status(trade["id"], cmp, datetime.today().strftime("%Y-%m-%d"), pnl, "SL Hit")
-        elif cmp >= tgt:
-            pnl = cmp - entry
-            update_trade_status(trade["id"], cmp, datetime.today().strftime("%Y-%m-%d"), pnl, "Target Hit")
-        else:
-            entry_date = datetime.strptime(trade["entry_date"], "%Y-%m-%d")
-            hold_days = trade.get("holding_days", 2)
-            if (datetime.today() - entry_date).days >= hold_days:
-                pnl = cmp - entry
-                update_trade_status(trade["id"], cmp, datetime.today().strftime("%Y-%m-%d"), pnl, "Time Exit")
\ No newline at end of file
+
+def check_exit(kite=None) -> list:
+    """Close every open trade whose SL, target or holding period is hit. Returns the closes."""
+    if kite is None:
+        import kite_patch  # noqa: F401
+        from token_manager import refresh_if_needed
+        kite = refresh_if_needed()
+    exit_monitor.token_resolver.set_kite(kite)
+    monitor = exit_monitor.ExitMonitor(exit_monitor.load_open())
+    exit_monitor.seed(monitor, kite)
+    return monitor.closed
+
+
+if __name__ == "__main__":
+    closed = check_exit()
+    print(f"✅ {len(closed)} trades closed")
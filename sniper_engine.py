@@ -1,11 +1,15 @@
 import json
 import math
+import pathlib
 from datetime import date
 
-import joblib
 import numpy as np
 
+import feature_store
+import ict_signals
+import indicators
 import utils
+from filter_pipeline import Pipeline, Stage, load_history, write_profile
 from config import (
     FNO_SYMBOLS,
     RSI_MIN,
@@ -15,39 +19,227 @@ from config import (
     SECTOR_POP_EXCEPT
 )
 
-# Attempt to load ML model (optional)
-try:
-    artifact = joblib.load("model.pkl")
-    MODEL = artifact["model"]
-    THRESH = artifact.get("threshold", 0.5) * 100
-    print("✅ Loaded ML model")
-except Exception:
-    MODEL = None
-    THRESH = None
-    print("⚠️ ML model not found — using rule‑based only")
+MODEL_FILE   = pathlib.Path(__file__).parent / "model.pkl"
+PROFILE_FILE = pathlib.Path(__file__).parent / "docs" / "engine_profile.json"
 
+# ML model, loaded on first use (importing the engine stays cheap)
+_model = None
 
-def _compute_pop(sym, entry, tgt, sl):
+
+def load_model():
+    """
+    (model, threshold %) from model.pkl, memory-mapped and cached after the
+    first call; (None, None) when there is no usable model.
+    """
+    global _model
+    if _model is None:
+        import joblib
+        try:
+            artifact = joblib.load(MODEL_FILE, mmap_mode="r")
+            _model   = (artifact["model"], artifact.get("threshold", 0.5) * 100)
+            print("✅ Loaded ML model")
+        except Exception:
+            _model = (None, None)
+            print("⚠️ ML model not found — using rule‑based only")
+    return _model
+
+
+def _features(sym, entry, tgt, sl, ind):
     """
-    Compute Probability of Profit, using ML if available, otherwise historical.
+    Model input for one candidate (feature_store.FEATURES order).
+    `ind` is the symbol's row of utils.indicator_snapshot().
     """
     tgt_pct = (tgt - entry) / entry * 100
     sl_pct  = (entry - sl)    / entry * 100
+    return feature_store.vector(ind, utils.hist_pop(sym, tgt_pct, sl_pct))
+
 
-    if MODEL:
+def _compute_pop(features: np.ndarray) -> np.ndarray:
+    """
+    Probability of Profit for every candidate row at once: one predict_proba
+    call if a model is available, otherwise the historical PoP column.
+    """
+    model, _ = load_model()
+    if model is not None:
         # ML-based PoP
-        features = [
-            utils.fetch_rsi(sym, 14),
-            utils.fetch_adx(sym, 14),
-            utils.fetch_atr(sym, 14),
-            int(utils.fetch_ohlc(sym, 30)["volume"].iloc[-1] or 0),
-            utils.hist_pop(sym, tgt_pct, sl_pct)
-        ]
-        score = MODEL.predict_proba([features])[0,1] * 100
-        return round(score, 2)
-    else:
-        # Historical PoP only
-        return round(utils.hist_pop(sym, tgt_pct, sl_pct), 2)
+        return np.round(model.predict_proba(features)[:, 1] * 100, 2)
+    # Historical PoP only
+    return np.round(features[:, -1], 2)
+
+
+# ── Candidate stages ───────────────────────────────────────────────────────
+# A candidate is {"symbol", "df", "ind"} (bars + indicator-snapshot row);
+# stages add the fields later stages and the final trade need.
+def _has_data(batch):
+    return [not c["df"].empty and not np.isnan(c["ind"][["rsi", "adx", "atr"]].to_numpy(float)).any()
+            for c in batch]
+
+
+def _rsi_adx(batch):
+    rsi = np.array([c["ind"]["rsi"] for c in batch])
+    adx = np.array([c["ind"]["adx"] for c in batch])
+    return (rsi >= RSI_MIN) & (adx >= ADX_MIN)
+
+
+def _fno(c):
+    c["fno_ok"] = utils.check_fno_exists(c["symbol"])
+    return c["fno_ok"]
+
+
+def _levels(batch):
+    """Entry, SL, Target from the last close ± ATR·VOL_MULTIPLIER (needs a positive ATR)."""
+    keep = []
+    for c in batch:
+        last, atr  = c["df"]["close"].iloc[-1], c["ind"]["atr"]
+        c["entry"]  = round(last, 2)
+        c["sl"]     = round(last - atr * VOL_MULTIPLIER, 2)
+        c["target"] = round(last + atr * VOL_MULTIPLIER, 2)
+        keep.append(atr > 0)
+    return keep
+
+
+def _ict(batch):
+    """ICT liquidity check for every candidate in one array pass."""
+    panel = indicators.build_panel({c["symbol"]: c["df"] for c in batch})
+    ok    = ict_signals.bullish_liquidity(panel["high"], panel["low"], panel["close"])
+    for c, v in zip(batch, ok.tolist()):
+        c["ict_ok"] = v
+    return ok
+
+
+def _vwap_obv(c):
+    c["vwap_ok"] = utils.check_vwap_confluence(c["symbol"])
+    c["obv_ok"]  = utils.check_obv_confirmation(c["symbol"], c["df"])
+    return c["vwap_ok"] and c["obv_ok"]
+
+
+def _sector(sector_info):
+    def annotate(batch):
+        for c in batch:
+            c["sector"]   = utils.get_symbol_sector(c["symbol"])
+            c["strength"] = sector_info.get(c["sector"], {}).get("strength", "Neutral")
+            # if sector is weak, require higher PoP to allow
+            c["sector_ok"] = c["strength"] != "Weak"
+        return [True] * len(batch)
+    return annotate
+
+
+def _pop(batch):
+    """Score every candidate in one batch, then apply the THRESH / sector PoP gates."""
+    features = np.array([_features(c["symbol"], c["entry"], c["target"], c["sl"], c["ind"])
+                         for c in batch], dtype=float)
+    pops = _compute_pop(features)
+    model, thresh = load_model()
+    keep = []
+    for c, row, pop in zip(batch, features.tolist(), pops.tolist()):
+        c["features"] = row
+        c["pop"]      = pop
+        keep.append(not (model is not None and pop < thresh)
+                    and (c["sector_ok"] or pop >= SECTOR_POP_EXCEPT))
+    return keep
+
+
+def _strangle(batch):
+    """Strangle setups for every candidate with one round of batched option quotes."""
+    setups = utils.find_short_strangles({c["symbol"]: c["df"] for c in batch}, bands=STRANGLE_SD_BANDS)
+    for c in batch:
+        c["strangle"]    = setups.get(c["symbol"], {})
+        c["strangle_ok"] = bool(c["strangle"])
+    return [c["strangle_ok"] for c in batch]
+
+
+def build_pipeline(sector_info: dict, history: dict = None, only=None) -> Pipeline:
+    """
+    The engine's gates; run order comes from the last run's profile.
+    `only` restricts the pipeline to those gates (dependencies outside the
+    subset are assumed to have run already).
+    """
+    stages = [
+        Stage("data",     _has_data,            batch=True, cost=1e-6),
+        Stage("rsi_adx",  _rsi_adx,             batch=True, needs=("data",), cost=1e-6),
+        Stage("fno",      _fno,                 cost=1e-5),
+        Stage("atr",      _levels,              batch=True, needs=("data",), cost=1e-6),
+        Stage("ict",      _ict,                 batch=True, needs=("data",), cost=1e-5),
+        Stage("vwap_obv", _vwap_obv,            needs=("data",), cost=1e-4),
+        Stage("sector",   _sector(sector_info), batch=True, cost=1e-6),
+        Stage("pop",      _pop,                 batch=True, needs=("atr", "sector"), cost=1e-3),
+        Stage("strangle", _strangle,            batch=True, needs=("data",), cost=1e-3),
+    ]
+    if only is not None:
+        stages = [Stage(st.name, st.fn, st.batch, [n for n in st.needs if n in only], st.cost)
+                  for st in stages if st.name in only]
+    return Pipeline(stages, history)
+
+
+# ── Phases ──────────────────────────────────────────────────────────────────
+# The gates run in three phases so pipeline.py can cache each one:
+# signals (cheap, bar-based) → PoP (model) → strangles (live option quotes).
+PHASES = {
+    "signals":   ("data", "rsi_adx", "fno", "atr", "ict", "vwap_obv", "sector"),
+    "pop":       ("pop",),
+    "strangles": ("strangle",),
+}
+
+
+def candidates(frames: dict, snap) -> list:
+    """One candidate per FNO symbol: its bars + indicator-snapshot row."""
+    return [{"symbol": sym, "df": frames[sym], "ind": snap.loc[sym]} for sym in FNO_SYMBOLS]
+
+
+def run_phase(phase: str, items: list, sector_info: dict = None) -> list:
+    """
+    Survivors of one phase's gates.  The signals phase starts a fresh
+    docs/engine_profile.json; later phases add their stages to it.
+    """
+    pipeline  = build_pipeline(sector_info or {}, load_history(PROFILE_FILE), only=PHASES[phase])
+    survivors = pipeline.run(items)
+
+    run     = pipeline.profile()
+    profile = {"run_date": date.today().isoformat(), "universe": len(items), "stages": []}
+    if phase != "signals":
+        try:
+            profile.update(json.loads(PROFILE_FILE.read_text()))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+    stages = [st for st in profile["stages"] if st["name"] not in PHASES[phase]] + run["stages"]
+    profile.update(run_at=run["run_at"], selected=len(survivors),
+                   order=[st["name"] for st in stages],
+                   total_seconds=round(sum(st["seconds"] for st in stages), 6),
+                   stages=stages)
+    write_profile(profile, PROFILE_FILE)
+    for st in run["stages"]:
+        print(f"⏱️  {st['name']:<9} {st['in']:>3} → {st['out']:<3} {st['seconds'] * 1000:8.1f} ms")
+    return survivors
+
+
+def to_trades(survivors: list, today: str = None) -> list:
+    """Trade dicts for the candidates that passed every phase."""
+    today  = today or date.today().isoformat()
+    trades = []
+    for c in survivors:
+        trades.append({
+            "entry_date":       today,
+            "symbol":           c["symbol"],
+            "type":             "Sniper-Multi",
+            "entry":            c["entry"],
+            "cmp":              c["entry"],
+            "target":           c["target"],
+            "sl":               c["sl"],
+            "pop":              c["pop"],
+            "status":           "Open",
+            "sector":           c["sector"],
+            # diagnostic flags
+            "fno_ok":           c["fno_ok"],
+            "ict_ok":           c["ict_ok"],
+            "vwap_ok":          c["vwap_ok"],
+            "obv_ok":           c["obv_ok"],
+            "sector_strength":  c["strength"],
+            "strangle_ok":      c["strangle_ok"],
+            "strangle":         c["strangle"],
+            # exact model input, recorded in the feature store
+            "features":         dict(zip(feature_store.FEATURES, c["features"]))
+        })
+    return trades
 
 
 def generate_sniper_trades():
@@ -60,94 +252,24 @@ def generate_sniper_trades():
       - Sector rotation gating
       - Short‑strangle setups
       - Probability of Profit checks
-    """
-    today  = date.today().isoformat()
-    trades = []
 
+    The gates run as filter_pipelines ordered by last run's cost per
+    rejection; this run's profile is written to docs/engine_profile.json.
+    pipeline.py runs the same phases as separately cached stages.
+    """
     # Pre‑compute sector rotation data
     sector_info = utils.fetch_sector_rotation()
     # e.g. {'Banking': {'1d':0.5,'1w':2.1,'strength':'Leader'}, ...}
 
-    for sym in FNO_SYMBOLS:
-        # --- data availability ---
-        df = utils.fetch_ohlc(sym, days=60)
-        if df.empty:
-            continue
-
-        # --- RSI & ADX filters ---
-        rsi = utils.fetch_rsi(sym, 14)
-        adx = utils.fetch_adx(sym, 14)
-        if rsi < RSI_MIN or adx < ADX_MIN:
-            continue
-
-        # --- F&O existence check ---
-        fno_ok = utils.check_fno_exists(sym)
-        if not fno_ok:
-            continue
-
-        # --- Entry, SL, Target calculation ---
-        last  = df["close"].iloc[-1]
-        atr   = utils.fetch_atr(sym, 14)
-        entry = round(last, 2)
-        sl    = round(last - atr * VOL_MULTIPLIER, 2)
-        tgt   = round(last + atr * VOL_MULTIPLIER, 2)
-
-        # --- ICT liquidity‑grab ---
-        ict_ok = utils.check_ict_liquidity(sym, df)
-        if not ict_ok:
-            continue
-
-        # --- VWAP & OBV confluence ---
-        vwap_ok = utils.check_vwap_confluence(sym)
-        obv_ok  = utils.check_obv_confirmation(sym, df)
-        if not (vwap_ok and obv_ok):
-            continue
-
-        # --- Sector rotation gating ---
-        sect      = utils.get_symbol_sector(sym)
-        sec_data  = sector_info.get(sect, {})
-        strength  = sec_data.get("strength", "Neutral")
-        sector_ok = True
-        # if sector is weak, require higher PoP to allow
-        if strength == "Weak":
-            sector_ok = False
-
-        # --- Compute PoP ---
-        pop = _compute_pop(sym, entry, tgt, sl)
-        if MODEL and pop < THRESH:
-            continue
-        if not sector_ok and pop < SECTOR_POP_EXCEPT:
-            continue
-
-        # --- Short‑strangle setup ---
-        strangle = utils.find_short_strangle(sym, bands=STRANGLE_SD_BANDS)
-        strangle_ok = bool(strangle)
-        if not strangle_ok:
-            continue
-
-        # --- Append final trade ---
-        trades.append({
-            "entry_date":       today,
-            "symbol":           sym,
-            "type":             "Sniper-Multi",
-            "entry":            entry,
-            "cmp":              entry,
-            "target":           tgt,
-            "sl":               sl,
-            "pop":              pop,
-            "status":           "Open",
-            "sector":           sect,
-            # diagnostic flags
-            "fno_ok":           fno_ok,
-            "ict_ok":           ict_ok,
-            "vwap_ok":          vwap_ok,
-            "obv_ok":           obv_ok,
-            "sector_strength":  strength,
-            "strangle_ok":      strangle_ok,
-            "strangle":         strangle
-        })
+    # Pull bars for the whole universe concurrently (rate-limited), then
+    # RSI/ADX/ATR/volume in one vectorized pass
+    frames = utils.prefetch_bars(FNO_SYMBOLS, days=60)
+    snap   = utils.indicator_snapshot(FNO_SYMBOLS, 14)
 
-    return trades
+    survivors = run_phase("signals", candidates(frames, snap), sector_info)
+    survivors = run_phase("pop", survivors)
+    survivors = run_phase("strangles", survivors)
+    return to_trades(survivors)
 
 
 def save_trades_to_json(trades, path="docs/trades.json"):
@@ -159,6 +281,9 @@ def save_trades_to_json(trades, path="docs/trades.json"):
 
 
 if __name__ == "__main__":
-    trades = generate_sniper_trades()
+    # authenticated, cached run of the DAG up to the strangles stage
+    import pipeline
+    results = pipeline.run(["strangles"])
+    trades  = to_trades(results["strangles"])
     save_trades_to_json(trades)
     print(f"✅ Saved {len(trades)} trades to docs/trades.json")
@@ -3,24 +3,26 @@ sniper_learn.py – ultra-simple rule-based tuner
 Run DAILY after market close (e.g. 16:20 IST).
 
 Logic:
-• Look at past trades in performance.json
+• Look at closed trades in the trade journal
 • If SL-rate > 60 % when ADX<25 → raise ADX_MIN by +2
 Writes new values to sniper_params.json so next engine run auto-uses them.
 """
 
 import json, pathlib, datetime
 
-PERF   = pathlib.Path("performance.json")
+import trade_journal
+
 PARAMS = pathlib.Path("sniper_params.json")
 
-records = json.loads(PERF.read_text()) if PERF.exists() else []
+records = trade_journal.closed_trades()
 if not records:
     print("No performance data yet – nothing to tune.")
     raise SystemExit(0)
 
 # Filter trades where ADX < 25
 adx_trades   = [r for r in records if r.get("adx", 0) < 25]
-adx_sl_hits  = [r for r in adx_trades if r["result"] == "SL"]
+adx_sl_hits  = [r for r in adx_trades
+                if r.get("result", str(r.get("status", "")).split()[0]) == "SL"]
 
 if adx_trades and len(adx_sl_hits) / len(adx_trades) > 0.60:
     new_params = {"RSI_MIN": 55, "ADX_MIN": 22, "VOL_MULTIPLIER": 1.5}
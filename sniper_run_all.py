@@ -1,13 +1,15 @@
 #!/usr/bin/env python
 """
-sniper_run_all.py
-
-1) Authenticate & inject
-2) Generate trades
-3) Preserve entry_date from docs/trades.json
-4) Write trades.json (root + docs)
-5) Archive to trade_history.json (no duplicates, skip empty)
-6) Push & commit
+sniper_run_all.py – the daily run: pipeline.py up to `publish`, then push.
+
+1) Authenticate once, refresh tokens / bars / PoP index, run the engine's
+   signal → PoP → strangle phases (cached stages – see pipeline.py)
+2) publish():
+   a) Preserve entry_date from docs/trades.json
+   b) Write trades.json (root + docs)
+   c) Journal the run + export trade_history.json (skip empty),
+      record new signals' features in the feature store
+3) Push & commit
 """
 
 import os
@@ -17,72 +19,60 @@ import requests
 import pathlib
 from datetime import date
 
-import kite_patch
-from token_manager import refresh_if_needed
-import utils
-from config import PARAMS_FILE
+import trade_journal
+import feature_store
 
 # JSON dump helper (casts numpy types to native ints)
 JSON_KW = dict(indent=2, default=int)
 
-# 1) Authenticate & inject
-kite = refresh_if_needed()
-utils.set_kite(kite)
-
-# 2) Generate fresh trades (they don’t include any dates yet)
-from sniper_engine import generate_sniper_trades
-new_trades = generate_sniper_trades()
-
-# 3) Preserve entry_date from docs/trades.json
-today_iso = date.today().isoformat()
-docs_dir  = pathlib.Path("docs")
-docs_dir.mkdir(exist_ok=True)
-docs_file = docs_dir / "trades.json"
-
-if docs_file.exists():
-    old_trades = json.loads(docs_file.read_text())
-else:
-    old_trades = []
-
-# map (symbol,type) → entry_date
-entry_map = {
-    (t["symbol"], t["type"]): t.get("entry_date")
-    for t in old_trades
-}
-
-for t in new_trades:
-    key = (t["symbol"], t["type"])
-    t["entry_date"] = entry_map.get(key, today_iso)
-
-# 4a) Write root trades.json
-root_file = pathlib.Path("trades.json")
-root_file.write_text(json.dumps(new_trades, **JSON_KW))
-print(f"💾 trades.json written with {len(new_trades)} trades.")
-
-# 4b) Write docs/trades.json
-docs_file.write_text(json.dumps(new_trades, **JSON_KW))
-print(f"💾 docs/trades.json written with {len(new_trades)} trades.")
-
-# 5) Archive to trade_history.json
-hist_file = pathlib.Path("trade_history.json")
-try:
-    history = json.loads(hist_file.read_text()) if hist_file.exists() else []
-except json.JSONDecodeError:
-    history = []
-
-if new_trades:
-    if history and history[-1].get("run_date") == today_iso:
-        history[-1]["open_trades"] = new_trades
-        print(f"🔄 Updated existing history entry for {today_iso} with {len(new_trades)} trades.")
+
+def publish(new_trades: list):
+    """Steps 2a–2c for the engine's fresh trades (they don’t include any dates yet)."""
+    # a) Preserve entry_date from docs/trades.json
+    today_iso = date.today().isoformat()
+    docs_dir  = pathlib.Path("docs")
+    docs_dir.mkdir(exist_ok=True)
+    docs_file = docs_dir / "trades.json"
+
+    if docs_file.exists():
+        old_trades = json.loads(docs_file.read_text())
     else:
-        history.append({"run_date": today_iso, "open_trades": new_trades})
-        print(f"🗄️  Appended {len(new_trades)} trades to trade_history.json (runs={len(history)})")
-else:
-    print("ℹ️  No trades — not adding empty entry to trade_history.json.")
+        old_trades = []
+
+    # map (symbol,type) → entry_date
+    entry_map = {
+        (t["symbol"], t["type"]): t.get("entry_date")
+        for t in old_trades
+    }
+
+    for t in new_trades:
+        key = (t["symbol"], t["type"])
+        t["entry_date"] = entry_map.get(key, today_iso)
+
+    # b1) Write root trades.json
+    root_file = pathlib.Path("trades.json")
+    root_file.write_text(json.dumps(new_trades, **JSON_KW))
+    print(f"💾 trades.json written with {len(new_trades)} trades.")
+
+    # b2) Write docs/trades.json
+    docs_file.write_text(json.dumps(new_trades, **JSON_KW))
+    print(f"💾 docs/trades.json written with {len(new_trades)} trades.")
+
+    # c) Journal the run (append-only) and re-export trade_history.json
+    hist_file = pathlib.Path("trade_history.json")
+    if new_trades:
+        trade_journal.record_run(today_iso, new_trades)
+        print(f"🗄️  Journaled {len(new_trades)} trades for {today_iso}.")
+        # features as scored at signal time – only for trades first seen today
+        feature_store.record_trades([t for t in new_trades if t["entry_date"] == today_iso])
+    else:
+        print("ℹ️  No trades — nothing to journal.")
+
+    history = trade_journal.export_legacy(hist_file)
+    print(f"💾 trade_history.json exported ({len(history)} runs).")
 
-hist_file.write_text(json.dumps(history, **JSON_KW))
 
-# 6) Push & commit
+# 3) Push & commit
 def push_and_commit():
     token = os.getenv("GITHUB_TOKEN")
     if not token:
@@ -92,7 +82,7 @@ def push_and_commit():
     repo     = "balakumar75/sniper-p2-dashboard"
     api_base = f"https://api.github.com/repos/{repo}/contents"
 
-    # 6a) GitHub API push for root trades.json
+    # 3a) GitHub API push for root trades.json
     for fn in ("trades.json",):
         path = f"{api_base}/{fn}"
         hdrs = {
@@ -111,18 +101,21 @@ def push_and_commit():
         put = requests.put(path, headers=hdrs, data=json.dumps(payload))
         print("✅ Pushed", fn) if put.status_code in (200,201) else print("🛑 Push failed", fn)
 
-    # 6b) CLI commit for docs/trades.json & trade_history.json
+    # 3b) CLI commit for docs/trades.json & trade_history.json
     os.system('git config user.name  "sniper-bot"')
     os.system('git config user.email "bot@users.noreply.github.com"')
-    os.system('git add docs/trades.json trade_history.json')
+    os.system('git add docs/trades.json docs/engine_profile.json trade_history.json trade_journal.jsonl feature_store.jsonl')
     os.system(
         f'if ! git diff --cached --quiet; then '
-        f'git commit -m "Daily trades {today_iso}" && '
+        f'git commit -m "Daily trades {date.today().isoformat()}" && '
         f'git pull --rebase origin main && '
         f'git push origin main; '
         f'else echo "No changes to commit"; fi'
     )
 
-push_and_commit()
 
-print("✅ Sniper run complete.")
+if __name__ == "__main__":
+    import pipeline
+    pipeline.run(["publish"])
+    push_and_commit()
+    print("✅ Sniper run complete.")
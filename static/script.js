@@ -1,40 +1,76 @@
 // static/script.js
+//
+// Trade history, loaded page by page from /api/history (server-side
+// filtering + cursor pagination) instead of fetching and flattening the
+// whole trade_history.json in the browser.
 
-fetch('/trade_history.json')
-  .then(r => r.json())
-  .then(runs => {
-    // Flatten the array of runs into one list of trades
-    const allTrades = runs.flatMap(run =>
-      run.trades.map(t => ({ ...t, run_date: run.run_date }))
-    );
-
-    const tbody = document.querySelector('#trades-table tbody');
-    tbody.innerHTML = allTrades.map(t => `
-      <tr data-status="${t.status}" data-type="${t.type}">
-        <td>${t.run_date}</td>
-        <td>${t.symbol}</td>
-        <td>${t.type}</td>
-        <td>${t.entry ?? ''}</td>
-        <td>${
-          t.type === 'Options-Strangle'
-            ? `P:${t.put_strike}@${t.put_price} / C:${t.call_strike}@${t.call_price}`
-            : ''
-        }</td>
-        <td>${t.status}</td>
-        <td>${t.action}</td>
-      </tr>
-    `).join('');
-
-    function applyFilters() {
-      const status = document.getElementById('filter-status').value;
-      const type   = document.getElementById('filter-type').value;
-      tbody.querySelectorAll('tr').forEach(row => {
-        const okStatus = !status || row.dataset.status === status;
-        const okType   = !type   || row.dataset.type === type;
-        row.style.display = (okStatus && okType) ? '' : 'none';
-      });
-    }
-
-    document.getElementById('filter-status').addEventListener('change', applyFilters);
-    document.getElementById('filter-type').addEventListener('change', applyFilters);
-  });
+const PAGE_SIZE = 50;
+
+const tbody   = document.querySelector('#trades-table tbody');
+const moreBtn = document.getElementById('load-more');
+
+let cursor     = null;
+let loading    = false;
+let generation = 0;     // bumped on every filter change; stale pages are dropped
+
+const rowHtml = t => `
+  <tr data-status="${t.status}" data-type="${t.type}">
+    <td>${t.run_date}</td>
+    <td>${t.symbol}</td>
+    <td>${t.type}</td>
+    <td>${t.entry ?? ''}</td>
+    <td>${
+      t.type === 'Options-Strangle'
+        ? `P:${t.put_strike}@${t.put_price} / C:${t.call_strike}@${t.call_price}`
+        : ''
+    }</td>
+    <td>${t.status}</td>
+    <td>${t.action ?? ''}</td>
+  </tr>
+`;
+
+function filterParams() {
+  const params = new URLSearchParams({ limit: PAGE_SIZE });
+  const fields = { status: 'filter-status', type: 'filter-type', from: 'filter-from', to: 'filter-to' };
+  for (const [param, id] of Object.entries(fields)) {
+    const value = document.getElementById(id).value;
+    if (value) params.set(param, value);
+  }
+  if (cursor) params.set('cursor', cursor);
+  return params;
+}
+
+async function loadPage() {
+  if (loading) return;
+  loading = true;
+  const gen = generation;
+  try {
+    const page = await fetch('/api/history?' + filterParams()).then(r => r.json());
+    if (gen !== generation) return;           // filters changed while we were waiting
+    tbody.insertAdjacentHTML('beforeend', page.items.map(rowHtml).join(''));
+    cursor = page.next_cursor;
+    moreBtn.hidden = !cursor;
+  } finally {
+    if (gen === generation) loading = false;
+  }
+}
+
+function applyFilters() {
+  generation++;
+  loading = false;
+  cursor  = null;
+  tbody.innerHTML = '';
+  loadPage();
+}
+
+['filter-status', 'filter-type', 'filter-from', 'filter-to'].forEach(id =>
+  document.getElementById(id).addEventListener('change', applyFilters)
+);
+moreBtn.addEventListener('click', loadPage);
+
+// Fetch the next page as the "Load more" button scrolls into view
+new IntersectionObserver(entries => {
+  if (entries.some(e => e.isIntersecting) && cursor) loadPage();
+}).observe(moreBtn);
+
+loadPage();
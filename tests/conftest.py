@@ -0,0 +1,36 @@
+"""Shared fixtures. The repo's modules are flat top-level files, so the root goes on sys.path."""
+
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def make_frames(n_symbols: int = 93, max_bars: int = 560, seed: int = 7) -> dict:
+    """Ragged synthetic OHLCV universe: {SYMi: DataFrame} with 20…max_bars business days each."""
+    rng    = np.random.default_rng(seed)
+    frames = {}
+    for i in range(n_symbols):
+        n     = int(rng.integers(20, max_bars))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+        if i % 10 == 0:
+            close[5:25] = close[5]            # flat stretch → 0/0 RSI & DX paths
+        open_ = close * np.exp(rng.normal(0, 0.005, n))
+        high  = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+        low   = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+        vol   = rng.integers(1e4, 1e6, n).astype(float)
+        frames[f"SYM{i}"] = pd.DataFrame(
+            {"open": open_, "high": high, "low": low, "close": close, "volume": vol},
+            index=pd.date_range("2023-01-02", periods=n, freq="B"),
+        )
+    return frames
+
+
+@pytest.fixture(scope="session")
+def frames() -> dict:
+    return make_frames()
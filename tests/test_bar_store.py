@@ -0,0 +1,49 @@
+"""BarStore read-through loading and index consistency under concurrent callers."""
+
+import json
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+
+FROM, TO = datetime(2024, 1, 1), datetime(2024, 3, 29, 23, 59, 59)
+
+
+def fake_fetch(calls: list):
+    def fetch(token, interval, from_date, to_date):
+        calls.append((token, from_date, to_date))
+        idx = pd.bdate_range(from_date.date(), to_date.date())
+        px  = np.linspace(100, 110, len(idx))
+        return pd.DataFrame({"open": px, "high": px + 1, "low": px - 1, "close": px,
+                             "volume": np.full(len(idx), 1000)}, index=idx)
+    return fetch
+
+
+def test_second_load_is_served_from_disk(tmp_path):
+    calls = []
+    first = BarStore(tmp_path).load(1, "day", FROM, TO, fake_fetch(calls))
+    again = BarStore(tmp_path).load(1, "day", FROM, TO, fake_fetch(calls))
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, again)
+    assert BarStore(tmp_path).verify() == []
+
+
+def test_concurrent_first_loads_share_one_index(tmp_path):
+    (tmp_path / "index.json").write_text("{}")
+    store, calls = BarStore(tmp_path), []
+    barrier = threading.Barrier(16)
+
+    def worker(token):
+        barrier.wait()
+        store.load(token, "day", FROM, TO, fake_fetch(calls))
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(16)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    on_disk = json.loads((tmp_path / "index.json").read_text())
+    assert sorted(on_disk) == sorted(f"{t}_day" for t in range(16))
+    assert all(store.coverage(t, "day") is not None for t in range(16))
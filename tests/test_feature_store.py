@@ -0,0 +1,25 @@
+"""Backfilled features are point-in-time: nothing from the entry session leaks in."""
+
+import feature_store
+from bar_store import BarStore, to_records
+
+
+def backfill_for(root, df, trade, monkeypatch):
+    store = BarStore(root)
+    store.write(1, "day", to_records(df))
+    monkeypatch.setattr(feature_store.token_resolver, "resolve", lambda sym: 1)
+    return feature_store.backfill([trade], store)
+
+
+def test_backfill_ignores_the_entry_day_bar(tmp_path, monkeypatch, frames):
+    df    = next(d for d in frames.values() if len(d) > 200)
+    trade = {"symbol": "SYM", "entry_date": df.index[-5].date().isoformat(),
+             "entry": 100.0, "target": 104.0, "sl": 98.0}
+    before = backfill_for(tmp_path / "a", df, trade, monkeypatch)
+
+    shocked = df.copy()
+    shocked.iloc[-5:, :] *= 3                     # entry session onwards moves wildly
+    after = backfill_for(tmp_path / "b", shocked, trade, monkeypatch)
+
+    assert len(before) == 1
+    assert [before[0][f] for f in feature_store.FEATURES] == [after[0][f] for f in feature_store.FEATURES]
@@ -0,0 +1,22 @@
+"""Every CLI / workflow entry point imports within its budget (see scripts/check_import_time.py)."""
+
+import importlib.util
+import pathlib
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+_spec = importlib.util.spec_from_file_location("check_import_time", ROOT / "scripts" / "check_import_time.py")
+check = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check)
+
+REPEAT = 3
+
+
+@pytest.mark.parametrize("name", list(check.ENTRY_POINTS))
+def test_import_within_budget(name):
+    budget = check.ENTRY_POINTS[name]
+    secs, top = min((check.measure(ROOT / name) for _ in range(REPEAT)), key=lambda r: r[0])
+    heaviest = ", ".join(f"{pkg} {t * 1e3:.0f} ms" for pkg, t in top[:4])
+    assert secs <= budget, f"{name}: {secs * 1e3:.0f} ms > budget {budget * 1e3:.0f} ms ({heaviest})"
@@ -0,0 +1,66 @@
+"""Numerical equivalence of the vectorized panel indicators with the original pandas formulas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+
+PERIOD = 14
+
+
+def reference(df: pd.DataFrame, period: int) -> dict:
+    """Per-symbol RSI / ATR / ADX exactly as the old utils code computed them."""
+    delta = df["close"].diff()
+    avg_gain = delta.clip(lower=0).rolling(window=period, min_periods=period).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(window=period, min_periods=period).mean()
+    rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    tr1 = df["high"] - df["low"]
+    tr2 = (df["high"] - df["close"].shift(1)).abs()
+    tr3 = (df["low"] - df["close"].shift(1)).abs()
+    tr  = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    atr = tr.rolling(window=period, min_periods=period).mean()
+
+    up_move   = df["high"] - df["high"].shift(1)
+    down_move = df["low"].shift(1) - df["low"]
+    plus_dm  = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=df.index)
+    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=df.index)
+    plus_di  = 100 * (plus_dm.ewm(alpha=1/period).mean() / atr)
+    minus_di = 100 * (minus_dm.ewm(alpha=1/period).mean() / atr)
+    dx  = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    adx = dx.ewm(alpha=1/period).mean()
+    return {"rsi": rsi.to_numpy(), "atr": atr.to_numpy(), "adx": adx.to_numpy()}
+
+
+@pytest.fixture(scope="module")
+def computed(frames):
+    return indicators.compute(indicators.build_panel(frames), PERIOD)
+
+
+@pytest.mark.parametrize("name", ["rsi", "atr", "adx"])
+def test_matches_pandas_reference(frames, computed, name):
+    for i, (sym, df) in enumerate(frames.items()):
+        ref = reference(df, PERIOD)[name]
+        got = computed[name][i, -len(df):]
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(ref), err_msg=f"{sym} {name}: NaN pattern")
+        ok = ~np.isnan(ref)
+        rel = np.abs(got[ok] - ref[ok]) / np.maximum(1.0, np.abs(ref[ok]))
+        assert rel.max(initial=0.0) <= 1e-9, f"{sym} {name}: max relative error {rel.max():.2e}"
+
+
+def test_panel_is_right_aligned_and_nan_padded(frames):
+    panel = indicators.build_panel(frames)
+    n_bars = max(len(df) for df in frames.values())
+    for i, df in enumerate(frames.values()):
+        row = panel["close"][i]
+        assert row.shape == (n_bars,)
+        assert np.isnan(row[: n_bars - len(df)]).all()
+        np.testing.assert_array_equal(row[n_bars - len(df):], df["close"].to_numpy())
+
+
+def test_latest_on_empty_panel():
+    panel = indicators.build_panel({"A": pd.DataFrame(columns=list(indicators.FIELDS))})
+    snap  = indicators.latest(panel, indicators.compute(panel, PERIOD))
+    assert list(snap.index) == ["A"]
+    assert snap.isna().all().all()
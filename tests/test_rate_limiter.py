@@ -0,0 +1,113 @@
+"""Token buckets never exceed their per-second or per-minute budgets, sync, async or threaded."""
+
+import asyncio
+import math
+import threading
+import time
+
+import pytest
+
+from rate_limiter import MAX_CALLS_PER_MIN, RATES, TokenBucket
+
+_EPS = 1e-9
+
+
+class FakeClock:
+    """Deterministic clock: waits and sleeps advance time instantly."""
+
+    def __init__(self, start: float = 0.0):
+        self.t = start
+
+    def now(self) -> float:
+        return self.t
+
+    def wait(self, cond: threading.Condition, timeout: float):
+        self.t += timeout
+
+    async def sleep(self, delay: float):
+        self.t += delay
+        await asyncio.sleep(0)        # yield so the other workers interleave
+
+
+def max_calls_per_window(stamps: list, window: float = 1.0) -> int:
+    """Largest number of timestamps inside any half-open [t, t+window) span."""
+    stamps, best, lo = sorted(stamps), 0, 0
+    for hi, t in enumerate(stamps):
+        while stamps[lo] <= t - window + _EPS:
+            lo += 1
+        best = max(best, hi - lo + 1)
+    return best
+
+
+def run_sync(bucket: TokenBucket, clock: FakeClock, calls: int) -> list:
+    stamps = []
+    for _ in range(calls):
+        bucket.acquire()
+        stamps.append(clock.now())
+    return stamps
+
+
+def run_async(bucket: TokenBucket, clock: FakeClock, calls: int, workers: int = 8) -> tuple:
+    """Grant times plus the worker id of each grant, in grant order."""
+    stamps, order = [], []
+
+    async def worker(w):
+        for _ in range(calls // workers):
+            await bucket.acquire_async()
+            stamps.append(clock.now())
+            order.append(w)
+
+    async def main():
+        await asyncio.gather(*(worker(w) for w in range(workers)))
+
+    asyncio.run(main())
+    return stamps, order
+
+
+def make_bucket(name: str) -> tuple:
+    clock = FakeClock()
+    return TokenBucket(RATES[name], per_min=MAX_CALLS_PER_MIN.get(name), clock=clock), clock
+
+
+@pytest.mark.parametrize("name", sorted(RATES))
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_per_second_budget(name, mode):
+    bucket, clock = make_bucket(name)
+    stamps = run_sync(bucket, clock, 400) if mode == "sync" else run_async(bucket, clock, 400)[0]
+    assert len(stamps) == 400
+    assert max_calls_per_window(stamps) <= math.ceil(RATES[name])
+
+
+@pytest.mark.parametrize("name", sorted(MAX_CALLS_PER_MIN))
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_per_minute_budget(name, mode):
+    bucket, clock = make_bucket(name)
+    stamps = run_sync(bucket, clock, 400) if mode == "sync" else run_async(bucket, clock, 400)[0]
+    cap    = MAX_CALLS_PER_MIN[name]
+    assert max_calls_per_window(stamps, window=60.0) == cap
+    # the cap binds: 400 calls at 70/min take over five minutes, not 400 / 3 s
+    assert stamps[-1] - stamps[0] >= 60.0 * (400 // cap)
+
+
+def test_async_workers_interleave():
+    bucket, clock = make_bucket("orders")
+    _, order = run_async(bucket, clock, 80, workers=8)
+    # every worker gets a grant within the first round instead of one worker draining its share
+    assert set(order[:8]) == set(range(8))
+
+
+def test_threads_real_clock():
+    bucket, stamps, lock = TokenBucket(50.0), [], threading.Lock()
+
+    def hammer():
+        for _ in range(10):
+            bucket.acquire()
+            with lock:
+                stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(stamps) == 80
+    # 50/s × 0.2 s, +1 for scheduler jitter at the window edge
+    assert max_calls_per_window(stamps, window=0.2) <= 10 + 1
@@ -1,5 +1,5 @@
 import os, json
-from kiteconnect import KiteConnect, exceptions
+import threading
 
 TOKENS_FILE = "tokens.json"
 API_KEY     = os.getenv("KITE_API_KEY")
@@ -19,13 +19,30 @@ def _save_tokens(data):
 
 
 # ───────────────────────────────────────────────────────────────────────────
-def refresh_if_needed() -> KiteConnect:
+_valid_kite = None
+_valid_lock = threading.Lock()
+
+
+def refresh_if_needed() -> "KiteConnect":
     """Return KiteConnect with a *valid* access_token.
 
     Priority:
       0. KITE_ACCESS_TOKEN (daily secret)  ← you paste this each day
       1. Cached access_token in tokens.json
+
+    The token is checked with one profile() call per process; later calls
+    return the same client.
     """
+    global _valid_kite
+    with _valid_lock:
+        if _valid_kite is None:
+            _valid_kite = _authenticate()
+        return _valid_kite
+
+
+def _authenticate():
+    from kiteconnect import KiteConnect, exceptions
+
     kite = KiteConnect(api_key=API_KEY)
 
     # 0️⃣  daily secret
@@ -53,3 +70,22 @@ def refresh_if_needed() -> KiteConnect:
     raise RuntimeError(
         "No valid access token. Paste KITE_ACCESS_TOKEN in GitHub Secrets."
     )
+
+
+# ── Lazily created env client ──────────────────────────────────────────────
+_env_kite = None
+_env_lock = threading.Lock()
+
+
+def env_client():
+    """
+    KiteConnect straight from KITE_API_KEY / KITE_ACCESS_TOKEN (no profile()
+    check), created on first use and shared within the process.
+    """
+    global _env_kite
+    with _env_lock:
+        if _env_kite is None:
+            from kiteconnect import KiteConnect
+            _env_kite = KiteConnect(api_key=os.getenv("KITE_API_KEY"))
+            _env_kite.set_access_token(os.getenv("KITE_ACCESS_TOKEN"))
+        return _env_kite
@@ -0,0 +1,59 @@
+"""
+token_resolver.py – instrument token lookups without a kite.ltp() per fetch.
+
+Resolution order:
+  1. NSE spot symbols from the static spot_tokens.json (instruments.py) –
+     available offline, e.g. for the bar store
+  2. everything else (and 0 placeholders such as BAJAJCON) from the daily
+     instrument master: one cached kite.instruments(exchange) dump per
+     exchange per day, indexed by underlying / expiry / type / strike
+"""
+
+import instrument_master
+import instruments
+
+
+def set_kite(kite_client):
+    """
+    Client used for the once-a-day instrument master download.
+    """
+    instrument_master.set_kite(kite_client)
+
+
+def resolve(symbol: str, exchange: str = "NSE"):
+    """
+    instrument_token for an exchange tradingsymbol, or None if unknown.
+    NSE symbols come from spot_tokens.json; anything else from the master.
+    """
+    if exchange == "NSE":
+        token = instruments.SPOT_MAP.get(symbol, 0)
+        if token:
+            return token
+    master = instrument_master.get(exchange)
+    return master.token(symbol) if master else None
+
+
+def resolve_future(symbol: str, expiry: str = None):
+    """
+    Futures token for an underlying (nearest expiry unless `expiry` is given).
+    """
+    master = instrument_master.get("NFO")
+    return master.future(symbol, expiry) if master else None
+
+
+def resolve_option(symbol: str, strike, kind: str, expiry: str = None):
+    """
+    Option token for underlying / strike / kind ("CE" or "PE"),
+    nearest expiry unless `expiry` is given.
+    """
+    master = instrument_master.get("NFO")
+    return master.option(symbol, strike, kind, expiry) if master else None
+
+
+def instrument_key(symbol: str, ttype: str = "Cash") -> str:
+    """
+    Exchange-qualified key ("NSE:SBIN" / "NFO:SBIN25JULFUT") used by ltp()/quote().
+    """
+    if ttype.lower() in ("futures", "options"):
+        return f"NFO:{symbol}"
+    return f"NSE:{symbol.split()[0]}"
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+"""
+trade_journal.py – append-only JSONL journal of trade events.
+
+Every writer (sniper_run_all, monitor_trades, performance_logger) appends
+events instead of read-modify-writing the whole history file:
+
+  {"ts": "...", "event": "open" | "update" | "close", "key": "SYM|TYPE|DATE",
+   "run_date": "YYYY-MM-DD", "trade": {...fields...}}
+
+Appends take an exclusive lock on trade_journal.jsonl.lock and go out as a
+single O_APPEND write + fsync, so concurrent workflows can't interleave or
+lose events and a crash can at worst leave one torn last line (ignored on
+replay, newline-terminated before the next append).  `compact()` rewrites the
+journal as one "snapshot" event per trade.
+
+`current_state()` is the materialized view (cached until the file changes);
+`export_legacy()` still emits trade_history.json for GitHub Pages.
+
+CLI:
+  python trade_journal.py migrate   one-shot import of trade_history.json (+ performance.json)
+  python trade_journal.py compact   collapse the journal to one event per trade
+  python trade_journal.py export    rewrite trade_history.json (+ docs/) from the journal
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import pathlib
+from contextlib import contextmanager
+from datetime import date, datetime
+
+BASE         = pathlib.Path(__file__).parent
+JOURNAL_FILE = BASE / "trade_journal.jsonl"
+HISTORY_FILE = BASE / "trade_history.json"
+PERF_FILE    = BASE / "performance.json"
+
+CLOSED_STATUSES = ("target hit", "sl hit", "time exit", "target", "sl")
+
+# capitalised column names used by some early trade_history.json runs
+LEGACY_KEYS = {
+    "Symbol": "symbol", "Type": "type", "Date": "entry_date", "Entry": "entry",
+    "CMP": "cmp", "Target": "target", "SL": "sl", "PoP": "pop",
+    "Status": "status", "P&L (₹)": "pnl", "Action": "action",
+}
+
+
+def is_closed(trade: dict) -> bool:
+    return str(trade.get("status", "Open")).lower() in CLOSED_STATUSES
+
+
+def trade_key(trade: dict) -> str:
+    """Identity of a trade across runs: symbol | type | entry date."""
+    entry = trade.get("entry_date") or trade.get("date") or ""
+    return f"{trade.get('symbol', '')}|{trade.get('type', '')}|{entry}"
+
+
+def make_event(kind: str, trade: dict, run_date: str = None, ts: str = None) -> dict:
+    return {
+        "ts":       ts or datetime.now().isoformat(timespec="seconds"),
+        "event":    kind,
+        "key":      trade_key(trade),
+        "run_date": run_date or date.today().isoformat(),
+        "trade":    trade,
+    }
+
+
+# ── Appending ──────────────────────────────────────────────────────────────
+@contextmanager
+def _locked(path: pathlib.Path):
+    with open(str(path) + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def append(events: list, path: pathlib.Path = JOURNAL_FILE):
+    """Atomically append events (one write + fsync under the journal lock)."""
+    if not events:
+        return
+    data = "".join(json.dumps(e, default=int) + "\n" for e in events).encode("utf-8")
+    with _locked(path):
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # terminate a torn last line from a crashed writer before appending
+            if os.fstat(fd).st_size:
+                with open(path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        data = b"\n" + data
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def record(kind: str, trades: list, run_date: str = None, path: pathlib.Path = JOURNAL_FILE):
+    append([make_event(kind, t, run_date) for t in trades], path)
+
+
+def record_run(run_date: str, trades: list, path: pathlib.Path = JOURNAL_FILE):
+    """Journal one engine run: "open" for new trades, "update" for ones already known."""
+    state = current_state(path)
+    append([make_event("update" if trade_key(t) in state else "open", t, run_date) for t in trades], path)
+
+
+# ── Replay / materialized view ─────────────────────────────────────────────
+def replay(path: pathlib.Path = JOURNAL_FILE):
+    """Yield events in order, skipping a torn (unparsable) line."""
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def materialize(events) -> dict:
+    """{key: {"trade": merged latest fields, "runs": [run dates seen]}} in first-seen order."""
+    state = {}
+    for ev in events:
+        entry = state.setdefault(ev["key"], {"trade": {}, "runs": []})
+        if ev["event"] == "snapshot":
+            entry["trade"] = dict(ev["trade"])
+            entry["runs"]  = list(ev.get("runs", []))
+            continue
+        entry["trade"].update(ev["trade"])
+        rd = ev.get("run_date")
+        # closes don't make a trade part of that day's run unless it was never seen in one
+        if rd and rd not in entry["runs"] and (ev["event"] != "close" or not entry["runs"]):
+            entry["runs"].append(rd)
+    return state
+
+
+_state_cache = {}
+
+
+def current_state(path: pathlib.Path = JOURNAL_FILE) -> dict:
+    """Materialized view, re-read only when the journal's size/mtime change."""
+    try:
+        st  = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return {}
+    cached = _state_cache.get(str(path))
+    if cached and cached[0] == sig:
+        return cached[1]
+    state = materialize(replay(path))
+    _state_cache[str(path)] = (sig, state)
+    return state
+
+
+def open_trades(path: pathlib.Path = JOURNAL_FILE) -> list:
+    return [dict(e["trade"]) for e in current_state(path).values() if not is_closed(e["trade"])]
+
+
+def closed_trades(path: pathlib.Path = JOURNAL_FILE) -> list:
+    return [dict(e["trade"]) for e in current_state(path).values() if is_closed(e["trade"])]
+
+
+# ── Compaction & legacy export ─────────────────────────────────────────────
+def compact(path: pathlib.Path = JOURNAL_FILE) -> tuple:
+    """Rewrite the journal as one snapshot event per trade. Returns (events_before, events_after)."""
+    with _locked(path):
+        events = list(replay(path))
+        state  = materialize(events)
+        ts     = datetime.now().isoformat(timespec="seconds")
+        tmp    = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for key, entry in state.items():
+                f.write(json.dumps({
+                    "ts": ts, "event": "snapshot", "key": key,
+                    "run_date": entry["runs"][-1] if entry["runs"] else None,
+                    "runs": entry["runs"], "trade": entry["trade"],
+                }, default=int) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    return len(events), len(state)
+
+
+def legacy_history(state: dict) -> list:
+    """[{run_date, open_trades: [...]}] – each run lists its trades in their latest state."""
+    runs = {}
+    for entry in state.values():
+        for rd in entry["runs"]:
+            runs.setdefault(rd, []).append(entry["trade"])
+    return [{"run_date": rd, "open_trades": runs[rd]} for rd in sorted(runs)]
+
+
+def export_legacy(out: pathlib.Path = HISTORY_FILE, path: pathlib.Path = JOURNAL_FILE):
+    history = legacy_history(current_state(path))
+    tmp = out.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(history, indent=2, default=int))
+    os.replace(tmp, out)
+    return history
+
+
+# ── One-shot migration ─────────────────────────────────────────────────────
+def normalize_legacy(trade: dict) -> dict:
+    """Lower-case the early capitalised columns (Symbol, SL, P&L (₹), …)."""
+    # an existing lower-case field wins over its capitalised twin
+    return {LEGACY_KEYS.get(k, k): v for k, v in trade.items()
+            if LEGACY_KEYS.get(k, k) == k or LEGACY_KEYS[k] not in trade}
+
+
+def legacy_entries(runs: list):
+    """
+    (run_date, trade) pairs from any trade_history.json schema:
+    {run_date, trades}, {run_date|entry_date, open_trades|trades} or flat records.
+    Trades come back with lower-case keys.
+    """
+    for run in runs:
+        if "symbol" in run or "Symbol" in run:
+            run = normalize_legacy(run)
+            yield run.get("exit_date") or run.get("entry_date") or run.get("date") or "", run
+            continue
+        rd = run.get("run_date") or run.get("entry_date") or ""
+        for t in run.get("trades", []) + run.get("open_trades", []):
+            yield rd, normalize_legacy(t)
+
+
+def migrate(history_file: pathlib.Path = HISTORY_FILE, perf_file: pathlib.Path = PERF_FILE,
+            path: pathlib.Path = JOURNAL_FILE) -> int:
+    if path.exists() and path.stat().st_size:
+        raise SystemExit(f"❌ {path.name} already has events – migration is one-shot.")
+    events = []
+    seen   = set()
+    for src in (history_file, perf_file):
+        if not src.exists():
+            continue
+        try:
+            runs = json.loads(src.read_text())
+        except json.JSONDecodeError:
+            print(f"⚠️ {src.name} is not valid JSON – skipped")
+            continue
+        for rd, t in legacy_entries(runs):
+            key  = trade_key(t)
+            kind = "close" if is_closed(t) else ("update" if key in seen else "open")
+            seen.add(key)
+            ts   = t.get("timestamp") or f"{rd or t.get('entry_date') or '1970-01-01'}T00:00:00"
+            events.append(make_event(kind, t, rd or None, ts))
+    append(events, path)
+    return len(events)
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Maintain the append-only trade journal.")
+    ap.add_argument("command", choices=["migrate", "compact", "export"])
+    args = ap.parse_args()
+
+    if args.command == "migrate":
+        n = migrate()
+        print(f"🗄️  Migrated {n} events into {JOURNAL_FILE.name}")
+    elif args.command == "compact":
+        before, after = compact()
+        print(f"🧹 Compacted {JOURNAL_FILE.name}: {before} → {after} events")
+
+    if args.command in ("migrate", "export"):
+        history = export_legacy()
+        docs = BASE / "docs" / "trade_history.json"
+        if docs.parent.exists():
+            export_legacy(docs)
+        print(f"💾 Exported {len(history)} runs to {HISTORY_FILE.name}")
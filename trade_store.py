@@ -0,0 +1,121 @@
+"""
+trade_store.py – in-memory, mtime-watched view of a trades JSON file.
+
+The dashboard used to re-open and json.load the trades file on every request
+and re-parse every entry_date inside the sort key.  A TradeStore loads the
+file once, reloads it only when its (mtime, size) signature changes, keeps the
+records pre-sorted by parsed date, and caches serialized response bytes with
+an ETag so unchanged responses cost a stat() and a 304.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from datetime import datetime
+
+from flask import Response, request
+
+
+def parse_date(value) -> datetime:
+    """'YYYY-MM-DD' → datetime; anything unparsable sorts last (datetime.min)."""
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return datetime.min
+
+
+class TradeStore:
+    def __init__(self, path, date_field: str = "entry_date"):
+        """
+        `date_field` – records are kept sorted newest-first by this field;
+        pass None to keep file order (e.g. the run-list history file).
+        """
+        self.path       = pathlib.Path(path)
+        self.date_field = date_field
+        self.version    = 0
+        self._sig       = None
+        self._records   = []
+        self._dates     = []
+        self._views     = {}
+        self._payload   = (None, None, None)     # (key, body, etag)
+        self._lock      = threading.Lock()
+
+    # -- loading ----------------------------------------------------------------
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self):
+        sig = self._signature()
+        if sig == self._sig:
+            return
+        with self._lock:
+            if sig == self._sig:
+                return
+            records = []
+            if sig is not None:
+                try:
+                    records = json.loads(self.path.read_text(encoding="utf-8"))
+                except json.JSONDecodeError:
+                    # half-written file – keep serving the old copy, retry next request
+                    return
+            if self.date_field:
+                dates   = [parse_date(r.get(self.date_field)) for r in records]
+                order   = sorted(range(len(records)), key=dates.__getitem__, reverse=True)
+                records = [records[i] for i in order]
+                self._dates = [dates[i] for i in order]
+            self._records = records
+            self._views   = {}
+            self._sig     = sig
+            self.version += 1
+            print(f"📂 Loaded {len(records)} records from {self.path.name} (v{self.version})")
+
+    def exists(self) -> bool:
+        return self._signature() is not None
+
+    def records(self) -> list:
+        """Current records (shared – treat as read-only)."""
+        self._refresh()
+        return self._records
+
+    def dates(self) -> list:
+        """Parsed `date_field` values, aligned with records()."""
+        self._refresh()
+        return self._dates
+
+    def view(self, name: str, build):
+        """`build(records)` memoized until the file changes."""
+        self._refresh()
+        key = (name, self.version)
+        if key not in self._views:
+            self._views[key] = build(self._records)
+        return self._views[key]
+
+    # -- serialized responses -------------------------------------------------
+    def payload(self, extra_key=None, transform=None):
+        """
+        (body_bytes, etag) of `transform(records)` (or the records as-is),
+        rebuilt only when the file or `extra_key` changes.
+        """
+        self._refresh()
+        key = (self.version, extra_key)
+        cached_key, body, etag = self._payload
+        if cached_key != key:
+            data = transform(self._records) if transform else self._records
+            body = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+            etag = hashlib.sha1(body).hexdigest()[:20]
+            self._payload = (key, body, etag)
+        return body, etag
+
+
+def json_response(body: bytes, etag: str) -> Response:
+    """Pre-serialized JSON with an ETag; answers If-None-Match with 304."""
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
@@ -1,39 +1,29 @@
 import json
-import os
 from datetime import datetime
-from kiteconnect import KiteConnect
 
-# ✅ Load API credentials
-api_key = os.getenv("KITE_API_KEY")
-access_token = os.getenv("KITE_ACCESS_TOKEN")
-
-kite = KiteConnect(api_key=api_key)
-kite.set_access_token(access_token)
-
-# ✅ Get live CMP using Kite
-def fetch_live_cmp(symbol):
-    try:
-        instrument = f"NSE:{symbol}"
-        quote = kite.ltp(instrument)
-        return quote[instrument]['last_price']
-    except Exception as e:
-        print(f"❌ Error fetching CMP for {symbol}: {e}")
-        return None
+import price_snapshot
+from token_manager import env_client
 
 # ✅ Update each trade with CMP, P&L, Status
-def update_trade_status(trades):
+def update_trade_status(trades, prices=None):
+    """
+    `prices` is a price_snapshot map; when omitted, all trades are quoted
+    in one batched ltp() call (the Kite client is created on first use).
+    """
+    if prices is None:
+        prices = price_snapshot.snapshot(env_client(), trades)
+
     updated_trades = []
 
     for trade in trades:
         symbol = trade["symbol"]
-        base_symbol = symbol.split()[0]
         entry = trade.get("entry")
         target = trade.get("target")
         sl = trade.get("sl")
         trade_date = trade.get("date", datetime.today().strftime("%Y-%m-%d"))
 
-        # 🟢 Fetch latest CMP
-        cmp = fetch_live_cmp(base_symbol)
+        # 🟢 Latest CMP from the snapshot
+        cmp = price_snapshot.price_for(prices, trade)
 
         if cmp is None:
             trade["status"] = "Open"
@@ -1,78 +1,157 @@
+import base64
+import bisect
 import json
 import os
-from datetime import datetime
-from flask import Blueprint, jsonify
-from kiteconnect import KiteConnect
+from flask import Blueprint, Response, jsonify, request
 from dotenv import load_dotenv
 
+import price_snapshot
+from trade_journal import legacy_entries
+from price_cache import PriceCache
+from trade_store import TradeStore, json_response
+from token_manager import env_client
+
 # Load environment variables for Kite Connect
 load_dotenv()
-API_KEY      = os.getenv("KITE_API_KEY")
-ACCESS_TOKEN = os.getenv("KITE_ACCESS_TOKEN")
 
-kite = KiteConnect(api_key=API_KEY)
-kite.set_access_token(ACCESS_TOKEN)
+# Shared, TTL-bounded price cache – every request reads from it.
+# The Kite client is only built on the first refresh.
+PRICE_CACHE = PriceCache(env_client)
 
 trades_api = Blueprint('trades_api', __name__)
 
-# Point to trades.json in the docs folder
-TRADES_FILE = os.path.join(
-    os.path.dirname(__file__),  # e.g. /path/to/your/app
-    "..",                       # up one level
-    "docs",                     # into docs/
-    "trades.json"
-)
+# Point to trades.json / trade_history.json next to this file
+BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
+TRADES_FILE  = os.path.join(BASE_DIR, "docs", "trades.json")
+HISTORY_FILE = os.path.join(BASE_DIR, "trade_history.json")
+
+# Loaded once, reloaded only when the file's mtime changes
+TRADES_STORE  = TradeStore(TRADES_FILE)                    # pre-sorted by entry_date
+HISTORY_STORE = TradeStore(HISTORY_FILE, date_field=None)  # run list, file order
+
+
+def _is_open(t):
+    return t.get('status', 'Open').lower() == 'open'
+
+
+def _with_live_cmp(trades, prices):
+    """Copy of the (pre-sorted) trades with CMP refreshed for open trades."""
+    out = []
+    for t in trades:
+        if _is_open(t):
+            new_cmp = price_snapshot.price_for(prices, t)
+            if new_cmp is not None and new_cmp != t.get('cmp'):
+                t = {**t, 'cmp': new_cmp}
+        out.append(t)
+    return out
 
-def fetch_live_price(trade):
-    """
-    Fetch the latest price for a given trade using Kite Connect.
-    Falls back to the original CMP if there's an error.
-    """
-    symbol = trade.get('symbol')
-    ttype  = trade.get('type', 'Cash').lower()
-    # Determine the correct exchange prefix
-    if ttype in ('futures', 'options'):
-        instrument = f"NFO:{symbol}"
-    else:
-        instrument = f"NSE:{symbol}"
-    try:
-        data = kite.ltp(instrument)
-        return data[instrument]['last_price']
-    except Exception as e:
-        print(f"❌ Error fetching price for {instrument}: {e}")
-        return trade.get('cmp')
 
 @trades_api.route("/api/trades", methods=["GET"])
 def get_trades():
     try:
-        if os.path.exists(TRADES_FILE):
-            with open(TRADES_FILE, "r", encoding="utf-8") as f:
-                trades = json.load(f)
-
-            # 1) Refresh CMP for all open trades
-            for t in trades:
-                if t.get('status', 'Open').lower() == 'open':
-                    old_cmp = t.get('cmp')
-                    new_cmp = fetch_live_price(t)
-                    if new_cmp != old_cmp:
-                        print(f"🔄 Updated CMP for {t['symbol']}: {old_cmp} → {new_cmp}")
-                        t['cmp'] = new_cmp
-
-            # 2) Sort by entry_date descending (newest first)
-            trades.sort(
-                key=lambda x: datetime.strptime(x.get('entry_date', ''), '%Y-%m-%d'),
-                reverse=True
-            )
-
-            # 3) Log loaded trades and types
-            types = {t.get('type', 'Unknown') for t in trades}
-            print(f"✅ Loaded {len(trades)} trades — types: {types}")
-
-            return jsonify(trades), 200
-        else:
+        if not TRADES_STORE.exists():
             print(f"❌ trades.json not found at {TRADES_FILE}")
             return jsonify([]), 200
 
+        # 1) Refresh CMP for all open trades from the shared price cache
+        open_trades = TRADES_STORE.view('open', lambda ts: [t for t in ts if _is_open(t)])
+        prices      = PRICE_CACHE.get(open_trades)
+
+        # 2) Serve cached bytes – rebuilt only when the file or the prices change
+        body, etag = TRADES_STORE.payload(
+            extra_key=frozenset(prices.items()),
+            transform=lambda ts: _with_live_cmp(ts, prices),
+        )
+        return json_response(body, etag)
+
     except Exception as e:
         print(f"❌ Error loading trades.json: {e}")
         return jsonify([]), 500
+
+
+@trades_api.route("/trade_history.json", methods=["GET"])
+def get_trade_history():
+    body, etag = HISTORY_STORE.payload()
+    return json_response(body, etag)
+
+
+# ── /api/history – flattened, filterable, cursor-paginated ──────────────────
+HISTORY_PAGE_DEFAULT = 50
+HISTORY_PAGE_MAX     = 500
+
+
+def flatten_history(runs):
+    """
+    Every trade in trade_history.json as one flat record with a run_date,
+    newest first.  Handles all schemas the file has accumulated:
+    {run_date, trades}, {run_date|entry_date, open_trades|trades} and flat
+    trade records.  Empty runs simply contribute nothing.
+    Returns (records, keys) where keys[i] = (run_date, seq) sorts descending.
+    """
+    flat  = [{**t, "run_date": rd} for rd, t in legacy_entries(runs)]
+    keys  = [(str(t["run_date"]), seq) for seq, t in enumerate(flat)]
+    order = sorted(range(len(flat)), key=keys.__getitem__, reverse=True)
+    return [flat[i] for i in order], [keys[i] for i in order]
+
+
+def _encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    run_date, seq = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return str(run_date), int(seq)
+
+
+def _history_filter(args):
+    status = (args.get("status") or "").lower()
+    ttype  = args.get("type") or ""
+    start  = args.get("from") or ""
+    end    = args.get("to") or ""
+
+    def keep(t):
+        if status and not str(t.get("status", "")).lower().startswith(status):
+            return False
+        if ttype and t.get("type") != ttype:
+            return False
+        if start and t["run_date"] < start:
+            return False
+        if end and t["run_date"] > end:
+            return False
+        return True
+    return keep
+
+
+@trades_api.route("/api/history", methods=["GET"])
+def get_history():
+    """
+    GET /api/history?limit=50&cursor=…&status=Open&type=Futures&from=YYYY-MM-DD&to=YYYY-MM-DD
+    Streams {"items": [...], "next_cursor": "…" | null}; pass next_cursor back for the next page.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", HISTORY_PAGE_DEFAULT)), 1), HISTORY_PAGE_MAX)
+        after = _decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except (ValueError, TypeError):
+        return jsonify({"error": "bad limit or cursor"}), 400
+
+    records, keys = HISTORY_STORE.view("flat", flatten_history)
+    keep = _history_filter(request.args)
+
+    # keys are descending → resume just past the cursor with a bisect on the ascending view
+    ascending = HISTORY_STORE.view("flat_keys_asc", lambda _: keys[::-1])
+    pos = 0 if after is None else len(keys) - bisect.bisect_left(ascending, after)
+
+    def stream():
+        yield '{"items":['
+        sent, i, last = 0, pos, None
+        while i < len(records) and sent < limit:
+            if keep(records[i]):
+                yield ("," if sent else "") + json.dumps(records[i], default=str)
+                sent += 1
+                last  = keys[i]
+            i += 1
+        # a full page with records left → there may be more (last page can come back empty)
+        more = sent == limit and i < len(records)
+        yield '],"next_cursor":' + json.dumps(_encode_cursor(last) if more else None) + '}'
+
+    return Response(stream(), mimetype="application/json")
@@ -2,114 +2,145 @@
 
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from bar_cache import BarCache
+from bar_store import BarStore
+import token_resolver
+import indicators
+import ict_signals
+import option_chain
+import pop_index
+from rate_limiter import RATES
+
 # Global Kite Connect client placeholder
 _kite = None
 
+# Per-run bar cache (memory) → persistent bar store (disk) → Kite
+_bar_cache = BarCache()
+_bar_store = BarStore()
+
+OHLC_COLUMNS = ['open','high','low','close','volume']
+
 def set_kite(kite_client):
     """
     Initialize the global Kite Connect client for all data fetch functions.
+    Starts a fresh bar cache for the new client.
     """
     global _kite
     _kite = kite_client
+    _bar_cache.clear()
+    token_resolver.set_kite(kite_client)
 
 
-def fetch_ohlc(symbol: str, days: int) -> pd.DataFrame:
+def cache_stats() -> dict:
     """
-    Fetch historical OHLC data for the given symbol over the past `days` days using Kite Connect.
-    Returns a DataFrame indexed by date with columns ['open','high','low','close','volume'].
+    Hit/miss counters of the per-run bar cache (hits = historical_data calls saved).
     """
-    if _kite is None:
-        raise RuntimeError("Kite client not set. Call set_kite() first.")
-    instrument = f"NSE:{symbol}"
-    data = _kite.ltp([instrument])
-    token = data[instrument]['instrument_token']
+    return _bar_cache.stats()
 
-    to_date   = datetime.now()
-    from_date = to_date - timedelta(days=days)
 
+def _fetch_kite(token, interval, from_date, to_date) -> pd.DataFrame:
     raw = _kite.historical_data(
         instrument_token=token,
         from_date=from_date,
         to_date=to_date,
-        interval="day"
+        interval=interval
     )
+    if not raw:
+        return pd.DataFrame(columns=OHLC_COLUMNS)
     df = pd.DataFrame(raw)
     df['date'] = pd.to_datetime(df['date'])
     df.set_index('date', inplace=True)
-    return df[['open','high','low','close','volume']]
+    return df[OHLC_COLUMNS]
 
 
-def fetch_rsi(symbol: str, period: int) -> float:
+def _fetch_bars(token, interval, from_date, to_date) -> pd.DataFrame:
+    # Daily bars are persisted; only the days missing from the store hit Kite
+    if interval == "day":
+        return _bar_store.load(token, interval, from_date, to_date, _fetch_kite)
+    return _fetch_kite(token, interval, from_date, to_date)
+
+
+def fetch_ohlc(symbol: str, days: int) -> pd.DataFrame:
     """
-    Calculate the period-day RSI for the symbol using fetched OHLC.
+    Fetch historical OHLC data for the given symbol over the past `days` days using Kite Connect.
+    Returns a DataFrame indexed by date with columns ['open','high','low','close','volume'].
+    Served from the per-run bar cache, backed by the on-disk bar store; only days
+    the store doesn't have yet are requested from Kite.
     """
+    if _kite is None and not _bar_store.offline:
+        raise RuntimeError("Kite client not set. Call set_kite() first.")
+    token = token_resolver.resolve(symbol)
+    if not token:
+        print(f"⚠️ No instrument token for {symbol} — skipping")
+        return pd.DataFrame(columns=OHLC_COLUMNS)
+
+    to_date   = datetime.now()
+    from_date = to_date - timedelta(days=days)
+
+    return _bar_cache.get(token, "day", from_date, to_date, _fetch_bars)
+
+
+def _indicators(symbol: str, period: int) -> dict:
     df = fetch_ohlc(symbol, days=period * 3)
-    delta = df['close'].diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
+    return indicators.compute(indicators.build_panel({symbol: df}), period)
 
-    avg_gain = gain.rolling(window=period, min_periods=period).mean()
-    avg_loss = loss.rolling(window=period, min_periods=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return round(rsi.iloc[-1], 2)
+
+def prefetch_bars(symbols: list, days: int, workers: int = None) -> dict:
+    """
+    Warm the bar cache for many symbols concurrently.  Worker threads block on
+    the historical-data token bucket (when kite_patch is loaded), so the pool
+    runs at the highest rate Kite allows.  Returns {symbol: DataFrame}.
+    """
+    workers = workers or max(2, int(RATES["historical"] * 2))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = pool.map(lambda sym: fetch_ohlc(sym, days=days), symbols)
+        return dict(zip(symbols, frames))
+
+
+def fetch_rsi(symbol: str, period: int) -> float:
+    """
+    Calculate the period-day RSI for the symbol using fetched OHLC.
+    """
+    return round(_indicators(symbol, period)["rsi"][0, -1], 2)
 
 
 def fetch_adx(symbol: str, period: int) -> float:
     """
     Calculate the period-day ADX for the symbol.
     """
-    df = fetch_ohlc(symbol, days=period * 3)
-    df['high_prev'] = df['high'].shift(1)
-    df['low_prev']  = df['low'].shift(1)
-    tr1 = df['high'] - df['low']
-    tr2 = (df['high'] - df['close'].shift(1)).abs()
-    tr3 = (df['low']  - df['close'].shift(1)).abs()
-    tr  = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-    up_move   = df['high'] - df['high_prev']
-    down_move = df['low_prev'] - df['low']
-    # Convert to pandas Series for ewm operations
-    plus_dm_series = pd.Series(
-        np.where((up_move > down_move) & (up_move > 0), up_move, 0),
-        index=df.index
-    )
-    minus_dm_series = pd.Series(
-        np.where((down_move > up_move) & (down_move > 0), down_move, 0),
-        index=df.index
-    )
-
-    atr = tr.rolling(window=period, min_periods=period).mean()
-    plus_di  = 100 * (plus_dm_series.ewm(alpha=1/period).mean() / atr)
-    minus_di = 100 * (minus_dm_series.ewm(alpha=1/period).mean() / atr)
-    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
-    adx = dx.ewm(alpha=1/period).mean()
-    return round(adx.iloc[-1], 2)
+    return round(_indicators(symbol, period)["adx"][0, -1], 2)
 
 
 def fetch_atr(symbol: str, period: int) -> float:
     """
     Calculate the period-day ATR for the symbol.
     """
-    df = fetch_ohlc(symbol, days=period * 3)
-    df['high_prev'] = df['high'].shift(1)
-    df['low_prev']  = df['low'].shift(1)
-    tr1 = df['high'] - df['low']
-    tr2 = (df['high'] - df['close'].shift(1)).abs()
-    tr3 = (df['low']  - df['close'].shift(1)).abs()
-    tr  = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period, min_periods=period).mean()
-    return round(atr.iloc[-1], 2)
+    return round(_indicators(symbol, period)["atr"][0, -1], 2)
+
+
+def indicator_snapshot(symbols: list, period: int = 14) -> pd.DataFrame:
+    """
+    Latest RSI/ADX/ATR/OBV/VWAP (+ close, volume) for many symbols in one
+    vectorized pass, over the same period*3-day window as fetch_rsi & co.
+    RSI/ADX/ATR are rounded like the per-symbol helpers.
+    """
+    frames = {sym: fetch_ohlc(sym, days=period * 3) for sym in symbols}
+    panel  = indicators.build_panel(frames)
+    snap   = indicators.latest(panel, indicators.compute(panel, period))
+    snap[["rsi", "adx", "atr"]] = snap[["rsi", "adx", "atr"]].round(2)
+    return snap
 
 
 def hist_pop(symbol: str, tgt_pct: float, sl_pct: float) -> float:
     """
-    Historical Probability of Profit calculation.
-    Stub: returns a placeholder percentage; integrate real backtest logic here.
+    Historical Probability of Profit: % of past entries that reached +tgt_pct
+    before -sl_pct within HOLD_BARS bars, from the precomputed pop_index
+    (DEFAULT_POP until the symbol has enough history indexed).
     """
-    return 85.0
+    return pop_index.query(symbol, tgt_pct, sl_pct)
 
 
 def check_fno_exists(symbol: str) -> bool:
@@ -122,10 +153,14 @@ def check_fno_exists(symbol: str) -> bool:
 
 def check_ict_liquidity(symbol: str, df: pd.DataFrame) -> bool:
     """
-    Check ICT liquidity-grab conditions.
-    Implement logic using df price data as needed.
+    Check ICT liquidity-grab conditions on pre-fetched bars: a bullish sweep
+    of the prior swing low within the last few bars, or a bullish structure
+    shift on the latest bar (see ict_signals.bullish_liquidity).
     """
-    return True
+    if df is None or df.empty:
+        return False
+    panel = indicators.build_panel({symbol: df})
+    return bool(ict_signals.bullish_liquidity(panel["high"], panel["low"], panel["close"])[0])
 
 
 def check_vwap_confluence(symbol: str) -> bool:
@@ -152,13 +187,25 @@ def get_symbol_sector(symbol: str) -> str:
     return "Neutral"
 
 
+def find_short_strangles(frames: dict, bands: list) -> dict:
+    """
+    Short-strangle setups for many symbols from their pre-fetched daily bars:
+    spot = last close, σ = historical volatility, strikes from the SD-band
+    strike index and every leg quoted in a few batched calls
+    (see option_chain.strangles).  Symbols without a live chain are absent.
+    """
+    panel = indicators.build_panel(frames)
+    close = panel["close"]
+    spots = dict(zip(frames, close[:, -1].tolist() if close.shape[1] else [np.nan] * len(frames)))
+    hvs   = dict(zip(frames, option_chain.hist_vol(close).tolist()))
+    return option_chain.strangles(_kite, spots, hvs, bands)
+
+
 def find_short_strangle(symbol: str, bands: list) -> dict:
     """
-    Find a short strangle setup based on SD bands.
-    Stub: returns a dummy dict; integrate real option-chain logic.
+    Short-strangle setup for one symbol ({} when it has no live option chain).
     """
-    expiry = datetime.now().strftime("%Y-%m-%d")
-    return {"call_strike": f"{symbol}_C", "put_strike": f"{symbol}_P", "expiry": expiry}
+    return find_short_strangles({symbol: fetch_ohlc(symbol, days=60)}, bands).get(symbol, {})
 
 
 def fetch_sector_rotation() -> dict:
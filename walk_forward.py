@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+walk_forward.py – rolling train/test optimizer for RSI_MIN, ADX_MIN and VOL_MULTIPLIER.
+
+1) Load the stored bar history once and compute indicators once
+   (backtest.load_universe – values at bar i only use bars ≤ i)
+2) Simulate every parameter combo ONCE over the whole history; an exit table
+   is shared by all combos with the same VOL_MULTIPLIER
+3) Slide train/test windows across the bars: each window just selects the
+   trades that enter and exit inside it, so nothing is recomputed per window
+4) Per fold pick the combo with the best train Sharpe (min MIN_TRADES trades)
+   and score it on the following, unseen test window
+5) Write sniper_params.json from the most recent train window, plus
+   walk_forward_report.md with the out-of-sample results
+
+Params are only written when the stitched out-of-sample Sharpe is positive
+(override with --force).
+"""
+
+import argparse
+import json
+import os
+import pathlib
+from datetime import date
+
+import numpy as np
+
+import backtest
+from config import FNO_SYMBOLS, PARAMS_FILE
+
+BASE        = pathlib.Path(__file__).parent
+REPORT_FILE = BASE / "walk_forward_report.md"
+
+# Window sizes in bars (~1 trading year of training, ~1 quarter of testing)
+TRAIN_BARS = 250
+TEST_BARS  = 60
+MIN_TRADES = 20
+DC_WIN     = 20
+
+WF_GRID = [
+    (rsi_min, adx_min, vol_mul)
+    for rsi_min in [45, 50, 55, 60]
+    for adx_min in [15, 18, 20, 25, 30]
+    for vol_mul in [1.0, 1.5, 2.0]
+]
+
+
+# ── Trades per combo over the full history ─────────────────────────────────
+def simulate_grid(panel: dict, combos: list = WF_GRID) -> dict:
+    """{combo: trades} – each combo simulated once across every bar."""
+    tables = {}
+    trades = {}
+    for rsi_min, adx_min, vol_mul in combos:
+        if vol_mul not in tables:
+            tables[vol_mul] = backtest.exits(panel, vol_mul)
+        trades[(rsi_min, adx_min, vol_mul)] = backtest.simulate(
+            panel, rsi_min, adx_min, vol_mul, DC_WIN, None, exit_table=tables[vol_mul])
+    return trades
+
+
+def window(trades: dict, start: int, end: int) -> dict:
+    """
+    Trades that enter at or after `start` and exit before `end`, with bar
+    indices rebased to the window – exactly what a backtest ending at `end`
+    would have seen.
+    """
+    keep = (trades["entry_bar"] >= start) & (trades["exit_bar"] < end)
+    out  = {k: v[keep] for k, v in trades.items()}
+    out["entry_bar"] = out["entry_bar"] - start
+    out["exit_bar"]  = out["exit_bar"] - start
+    return out
+
+
+def best_combo(trades: dict, start: int, end: int):
+    """Combo with the highest Sharpe in [start, end) among those with ≥ MIN_TRADES trades."""
+    best, best_key = None, None
+    for combo, tr in trades.items():
+        m = backtest.metrics(window(tr, start, end), end - start)
+        if m["trade_count"] < MIN_TRADES:
+            continue
+        key = (m["sharpe"], m["total_pnl_pct"])
+        if best_key is None or key > best_key:
+            best, best_key = (combo, m), key
+    return best
+
+
+# ── Walk-forward folds ──────────────────────────────────────────────────────
+def walk_forward(panel: dict, train: int = TRAIN_BARS, test: int = TEST_BARS,
+                 combos: list = WF_GRID) -> dict:
+    trades = simulate_grid(panel, combos)
+    n_bars = panel["close"].shape[1]
+    dates  = panel["dates"]
+    day    = lambda i: str(dates[i].date()) if hasattr(dates[i], "date") else str(dates[i])
+
+    folds, oos = [], []
+    for t in range(train, n_bars - test + 1, test):
+        pick = best_combo(trades, t - train, t)
+        if pick is None:
+            continue
+        combo, train_m = pick
+        test_tr = window(trades[combo], t, t + test)
+        test_m  = backtest.metrics(test_tr, test)
+        test_tr["exit_bar"] = test_tr["exit_bar"] + t
+        oos.append(test_tr)
+        folds.append({
+            "train":  [day(t - train), day(t - 1)],
+            "test":   [day(t), day(t + test - 1)],
+            "params": dict(zip(("RSI_MIN", "ADX_MIN", "VOL_MULTIPLIER"), combo)),
+            "train_metrics": train_m,
+            "test_metrics":  test_m,
+        })
+
+    # stitched out-of-sample performance across all test windows
+    stitched = {k: np.concatenate([o[k] for o in oos]) for k in oos[0]} if oos else None
+    oos_m    = backtest.metrics(stitched, n_bars) if stitched else None
+
+    latest = best_combo(trades, max(0, n_bars - train), n_bars)
+    return {
+        "folds":   folds,
+        "oos":     oos_m,
+        "latest":  dict(zip(("RSI_MIN", "ADX_MIN", "VOL_MULTIPLIER"), latest[0])) if latest else None,
+        "as_of":   day(n_bars - 1) if n_bars else None,
+    }
+
+
+# ── Outputs ─────────────────────────────────────────────────────────────────
+def write_params(params: dict, path: pathlib.Path = PARAMS_FILE):
+    """Merge tuned values into sniper_params.json (other keys, e.g. DEFAULT_POP, are kept)."""
+    current = json.loads(path.read_text()) if path.exists() else {}
+    current.update(params)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(current, indent=2))
+    os.replace(tmp, path)
+
+
+def write_report(result: dict, path: pathlib.Path = REPORT_FILE):
+    lines = [
+        f"# Walk-forward report ({date.today().isoformat()})",
+        "",
+        f"Train {TRAIN_BARS} bars · test {TEST_BARS} bars · min {MIN_TRADES} trades · "
+        f"data through {result['as_of']}",
+        "",
+        "| Train | Test | RSI | ADX | VOL | Train Sharpe | Test trades | Test win % | Test P&L % | Test Sharpe |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for f in result["folds"]:
+        p, tr, te = f["params"], f["train_metrics"], f["test_metrics"]
+        lines.append(
+            f"| {f['train'][0]} → {f['train'][1]} | {f['test'][0]} → {f['test'][1]} "
+            f"| {p['RSI_MIN']} | {p['ADX_MIN']} | {p['VOL_MULTIPLIER']} | {tr['sharpe']} "
+            f"| {te['trade_count']} | {te['win_rate']} | {te['total_pnl_pct']} | {te['sharpe']} |"
+        )
+    oos = result["oos"]
+    lines += ["", "**Out-of-sample (all test windows)**", ""]
+    lines.append(
+        f"{oos['trade_count']} trades · win {oos['win_rate']}% · P&L {oos['total_pnl_pct']}% · "
+        f"max DD {oos['max_drawdown_pct']}% · Sharpe {oos['sharpe']}" if oos else "No folds – not enough history."
+    )
+    lines += ["", f"**Latest params:** `{json.dumps(result['latest'])}`", ""]
+    path.write_text("\n".join(lines))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Walk-forward tune RSI_MIN / ADX_MIN / VOL_MULTIPLIER.")
+    ap.add_argument("--train", type=int, default=TRAIN_BARS, help="bars per training window")
+    ap.add_argument("--test",  type=int, default=TEST_BARS,  help="bars per test window")
+    ap.add_argument("--days",  type=int, default=backtest.HISTORY_DAYS, help="calendar days of history")
+    ap.add_argument("--force", action="store_true", help="write params even if OOS Sharpe ≤ 0")
+    args = ap.parse_args()
+
+    backtest.authenticate()
+    panel = backtest.load_universe(FNO_SYMBOLS, days=args.days)
+    print(f"📊 Loaded {len(panel['symbols'])} symbols × {len(panel['dates'])} bars")
+
+    result = walk_forward(panel, args.train, args.test)
+    write_report(result)
+    for f in result["folds"]:
+        print(f"🔁 {f['test'][0]} → {f['test'][1]}: {f['params']} "
+              f"OOS sharpe {f['test_metrics']['sharpe']}, P&L {f['test_metrics']['total_pnl_pct']}%")
+
+    oos = result["oos"]
+    if result["latest"] is None:
+        print("⚠️ No combo met the minimum trade count – params unchanged.")
+    elif not args.force and (oos is None or oos["sharpe"] <= 0):
+        print(f"⚠️ Out-of-sample Sharpe {oos and oos['sharpe']} ≤ 0 – params unchanged.")
+    else:
+        write_params({**result["latest"], "TUNED_AS_OF": result["as_of"]})
+        print(f"💾 Wrote {result['latest']} to {PARAMS_FILE.name}")
+    print(f"✅ Walk-forward report written to {REPORT_FILE.name}")